@@ -27,7 +27,7 @@ DEBUG = True
 
 ALLOWED_HOSTS = ['allcaradshubapplication-aohfk56z5q-uc.a.run.app', '*']
 
-CSRF_TRUSTED_ORIGINS = ['https:/allcaradshubapplication-aohfk56z5q-uc.a.run.app']
+CSRF_TRUSTED_ORIGINS = ['https://allcaradshubapplication-aohfk56z5q-uc.a.run.app']
 
 
 # Application definition
@@ -85,6 +85,42 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Search results and extracted offers are kept for TIMEOUT seconds, and when MAX_ENTRIES
+# entries are stored the least recently used ones are evicted.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "search_results": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "search-results",
+        "TIMEOUT": 900,
+        "OPTIONS": {
+            "MAX_ENTRIES": 100,
+        },
+    },
+    "result_sets": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "result-sets",
+        "TIMEOUT": 3600,
+        "OPTIONS": {
+            "MAX_ENTRIES": 100,
+        },
+    },
+    "offers": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "offers",
+        "TIMEOUT": 86400,
+        "OPTIONS": {
+            "MAX_ENTRIES": 20000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -119,3 +155,150 @@ STATIC_URL = "static/"
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+
+# Scrapers
+# Number of offer subpages downloaded and parsed at the same time and the timeout of a single request in seconds
+
+SCRAPER_MAX_WORKERS = 8
+
+SCRAPER_REQUEST_TIMEOUT = 15
+
+# Requests per second sent to every host and number of requests that can be sent at once, lowered
+# automatically when a host answers 429 or 503, and the longest pause taken for its Retry-After header
+
+SCRAPER_RATE_LIMITS = {
+    'gratka.pl': {'rate': 4, 'burst': 8},
+    'www.otomoto.pl': {'rate': 8, 'burst': 16},
+}
+
+SCRAPER_RATE_LIMIT_DEFAULT = {'rate': 5, 'burst': 10}
+
+SCRAPER_RATE_LIMIT_MAX_RETRY_AFTER = 60
+
+# Number of times a request failing with a connection error, timeout, 429 or 5xx response is retried, and the
+# bounds in seconds of the exponential backoff with jitter between the attempts
+
+SCRAPER_RETRIES = 2
+
+SCRAPER_RETRY_BACKOFF_BASE = 0.5
+
+SCRAPER_RETRY_BACKOFF_MAX = 8.0
+
+# Circuit breaker of every portal: once at least SCRAPER_BREAKER_MIN_REQUESTS requests were sent within the last
+# SCRAPER_BREAKER_WINDOW seconds and SCRAPER_BREAKER_ERROR_RATE of them failed, the portal is skipped and reported
+# as degraded for SCRAPER_BREAKER_COOLDOWN seconds, after which a single trial request decides whether it recovered
+
+SCRAPER_BREAKER_WINDOW = 60
+
+SCRAPER_BREAKER_MIN_REQUESTS = 10
+
+SCRAPER_BREAKER_ERROR_RATE = 0.5
+
+SCRAPER_BREAKER_COOLDOWN = 30
+
+# Servers requests to a host are sent to instead, e.g. {'gratka.pl': 'http://127.0.0.1:8001'} to replay recorded
+# pages; set by the benchmark_scrapers command
+
+SCRAPER_HOST_OVERRIDES = {}
+
+# Download every offer subpage ('full'), or build the ads from the listing cards and load their details
+# when a result is expanded ('fast'), when the search form does not choose
+
+SCRAPER_SEARCH_MODE = 'full'
+
+# Number of seconds every portal is given to finish its part of a search before partial results are returned
+
+SCRAPER_DEADLINES = {
+    'gratka': 120,
+    'otomoto': 120,
+}
+
+# Number of page fetches in flight at the same time in one process when searching with the asyncio engine
+
+SCRAPER_ASYNC_MAX_IN_FLIGHT = 200
+
+# Request listing pages 2..max_page in parallel once page 1 is known, and how many of them at the same time
+
+SCRAPER_PREFETCH_PAGES = True
+
+SCRAPER_LISTING_WORKERS = 4
+
+# Searches spanning more pages with search results than SCRAPER_SPLIT_PAGES are split into at most
+# SCRAPER_SPLIT_MAX_BANDS price or production year bands, SCRAPER_SPLIT_WORKERS of them crawled at
+# the same time (0 pages never splits a search)
+
+SCRAPER_SPLIT_PAGES = 20
+
+SCRAPER_SPLIT_MAX_BANDS = 16
+
+SCRAPER_SPLIT_WORKERS = 4
+
+# BeautifulSoup parser used for the pages of every portal and whether only the needed parts of the pages are parsed
+
+SCRAPER_PARSERS = {
+    'gratka': 'lxml',
+    'otomoto': 'lxml',
+}
+
+SCRAPER_RESTRICTED_PARSING = True
+
+# Read offer subpages from the JSON data embedded in them ('embedded'), falling back to their elements when it is
+# missing or incomplete, or always from their elements ('dom'). Decoded with orjson when it is installed
+
+SCRAPER_EXTRACTION = 'embedded'
+
+# Number of seconds a cached offer is used without revalidating it with the portal
+
+SCRAPER_OFFER_FRESHNESS = 3600
+
+# Keep scraped ads in the Ad model and how many of them are written by one statement
+
+SCRAPER_STORE_ADS = True
+
+SCRAPER_STORE_BATCH_SIZE = 500
+
+# Backend running background searches ('thread' in the web process, 'database' for run_search_jobs workers),
+# number of searches run at the same time by the 'thread' backend and how often their progress is saved
+
+SCRAPER_JOB_BACKEND = 'thread'
+
+SCRAPER_JOB_WORKERS = 2
+
+SCRAPER_JOB_PROGRESS_INTERVAL = 1.0
+
+# Number of seconds after which a running search job is considered abandoned and finished jobs are deleted
+
+SCRAPER_JOB_STALE_AFTER = 600
+
+SCRAPER_JOB_RETENTION = 86400
+
+# Number of seconds without new ads after which a streamed search sends a heartbeat
+
+SCRAPER_STREAM_HEARTBEAT = 10
+
+# Largest number of ads returned by one page of the results API
+
+SCRAPER_RESULTS_MAX_PAGE_SIZE = 200
+
+# Number of ads converted and sent at a time by the CSV and Parquet exports, one row group of a Parquet file
+
+SCRAPER_EXPORT_CHUNK_SIZE = 5000
+
+# Number of seconds the offers of a saved search that are no longer listed are remembered
+
+SCRAPER_SAVED_SEARCH_REMOVED_RETENTION = 604800
+
+# Merge ads of the same car found on more than one portal: width of the mileage buckets ads are compared
+# within, largest difference of their mileage, smallest similarity of their titles and largest relative
+# difference of their prices
+
+SCRAPER_DEDUP = True
+
+SCRAPER_DEDUP_MILEAGE_BUCKET = 5000
+
+SCRAPER_DEDUP_MILEAGE_TOLERANCE = 1000
+
+SCRAPER_DEDUP_TITLE_SIMILARITY = 0.5
+
+SCRAPER_DEDUP_PRICE_TOLERANCE = 0.05
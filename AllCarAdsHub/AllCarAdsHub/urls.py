@@ -24,6 +24,20 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('home', views.home, name='home'),
     path('home/', views.home, name='home'),
+    path('search-async/', views.search_async, name='search_async'),
+    path('search-stream/', views.search_stream, name='search_stream'),
+    path('results/<slug:result_id>/', views.search_results, name='search_results'),
+    path('results/<slug:result_id>/aggregates/', views.search_aggregates, name='search_aggregates'),
+    path('results/<slug:result_id>/export/', views.export_results, name='export_results'),
+    path('ads/export/', views.export_ads, name='export_ads'),
+    path('jobs/', views.search_jobs, name='search_jobs'),
+    path('jobs/<uuid:job_id>/', views.search_job_status, name='search_job_status'),
+    path('saved-searches/', views.saved_searches, name='saved_searches'),
+    path('saved-searches/<uuid:saved_search_id>/', views.saved_search_detail, name='saved_search_detail'),
+    path('saved-searches/<uuid:saved_search_id>/refresh/', views.saved_search_refresh, name='saved_search_refresh'),
+    path('offer-details/', views.offer_details, name='offer_details'),
+    path('metrics', views.metrics, name='metrics'),
+    path('metrics/', views.metrics, name='metrics'),
     path('trying/', views.trying, name='trying'),
     ]
 
@@ -1,3 +1,19 @@
 from django.contrib import admin
 
+from allcaradshub_app.models import Ad, SearchJob
+
 # Register your models here.
+
+
+@admin.register(Ad)
+class AdAdmin(admin.ModelAdmin):
+    list_display = ('tytul', 'strona', 'marka', 'model', 'rok_produkcji', 'przebieg', 'cena', 'waluta', 'last_seen')
+    list_filter = ('strona', 'marka')
+    search_fields = ('tytul', 'url')
+
+
+@admin.register(SearchJob)
+class SearchJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'worker', 'created', 'started', 'finished')
+    list_filter = ('status',)
+    readonly_fields = ('params', 'progress', 'result', 'error')
@@ -0,0 +1,214 @@
+# Standard Library Imports
+import math
+
+# Third-Party Library Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from allcaradshub_app.results import filter_rows, get_int_param, get_result_set
+
+# Number of bins of the price histogram and of the price-vs-mileage summary, and the number of
+# scatterplot points sent at most, used when not given in the request
+DEFAULT_HISTOGRAM_BINS = 10
+DEFAULT_SUMMARY_BINS = 20
+DEFAULT_MAX_POINTS = 1000
+
+# Upper limits of the values above accepted from the request
+MAX_BINS = 100
+MAX_POINTS = 10000
+
+# Numeric columns of the ads used by the charts
+NUMERIC_COLUMNS = ['cena', 'przebieg', 'rok_produkcji']
+
+
+def get_ads_frame(table, rows):
+    """
+    Builds a DataFrame of the values needed by the charts straight from the columns of a result set.
+
+    Parameters:
+        table (dict): Table of the result set, built by build_table.
+        rows (np.ndarray): Positions of the ads to include.
+
+    Returns:
+        pd.DataFrame: Columns 'cena', 'przebieg', 'rok_produkcji', 'tytul' and 'url', with NaN for
+            missing or malformed numbers.
+    """
+    return pd.DataFrame({column: table['columns'][column][rows] for column in NUMERIC_COLUMNS + ['tytul', 'url']})
+
+
+def to_json_list(values, decimals=None):
+    """
+    Converts an array to a list that JsonResponse can serialize, with None for NaN.
+
+    Parameters:
+        values (array-like): Numbers to convert.
+        decimals (int, optional): Number of decimal places to round to.
+
+    Returns:
+        list: Python floats and None values.
+    """
+    values = np.asarray(values, dtype=float)
+
+    if decimals is not None:
+        values = np.round(values, decimals)
+
+    return [None if math.isnan(value) else value for value in values.tolist()]
+
+
+def get_median(values):
+    """
+    Returns the median of a Series, or None if it has no values.
+
+    Parameters:
+        values (pd.Series): Numbers, possibly with NaN.
+
+    Returns:
+        float or None: The median.
+    """
+    median = values.median()
+    return None if pd.isna(median) else float(median)
+
+
+def get_price_histogram(prices, bins):
+    """
+    Counts the prices falling into equal-width price ranges.
+
+    Parameters:
+        prices (pd.Series): Prices without NaN.
+        bins (int): Number of price ranges.
+
+    Returns:
+        dict: 'edges' (bins + 1 bounds of the ranges) and 'counts' (number of ads per range).
+    """
+    if prices.empty:
+        return {'edges': [], 'counts': []}
+
+    counts, edges = np.histogram(prices.to_numpy(), bins=bins)
+
+    return {'edges': to_json_list(edges, 0), 'counts': counts.tolist()}
+
+
+def get_binned_summary(ads_df, column, bins):
+    """
+    Summarizes prices over equal-width ranges of another column (e.g., mileage).
+
+    Parameters:
+        ads_df (pd.DataFrame): Frame built by get_ads_frame.
+        column (str): Column the ranges are built on.
+        bins (int): Number of ranges.
+
+    Returns:
+        dict: 'edges' of the ranges, 'counts' of ads and 'median_price' per range (None for empty ranges).
+    """
+    values = ads_df[['cena', column]].dropna()
+
+    if values.empty:
+        return {'edges': [], 'counts': [], 'median_price': []}
+
+    edges = np.histogram_bin_edges(values[column].to_numpy(), bins=bins)
+    # Every value goes to a range [edge_i, edge_i+1), the last range includes its upper edge
+    bin_index = np.clip(np.searchsorted(edges, values[column].to_numpy(), side='right') - 1, 0, bins - 1)
+    grouped = values['cena'].groupby(bin_index)
+
+    counts = grouped.size().reindex(range(bins), fill_value=0)
+    medians = grouped.median().reindex(range(bins))
+
+    return {
+        'edges': to_json_list(edges, 0),
+        'counts': counts.tolist(),
+        'median_price': to_json_list(medians, 2),
+    }
+
+
+def get_year_summary(ads_df):
+    """
+    Summarizes prices per production year.
+
+    Parameters:
+        ads_df (pd.DataFrame): Frame built by get_ads_frame.
+
+    Returns:
+        dict: 'years', 'counts' of ads and 'median_price', 'min_price' and 'max_price' per year.
+    """
+    values = ads_df[['cena', 'rok_produkcji']].dropna()
+    grouped = values.groupby(values['rok_produkcji'].astype(int))['cena'].agg(['size', 'median', 'min', 'max'])
+
+    return {
+        'years': grouped.index.tolist(),
+        'counts': grouped['size'].tolist(),
+        'median_price': to_json_list(grouped['median'], 2),
+        'min_price': to_json_list(grouped['min'], 2),
+        'max_price': to_json_list(grouped['max'], 2),
+    }
+
+
+def downsample_points(ads_df, max_points):
+    """
+    Picks at most max_points price-vs-mileage points for the scatterplot.
+
+    The points are a uniform sample, so dense regions of the plot stay dense.
+
+    Parameters:
+        ads_df (pd.DataFrame): Frame built by get_ads_frame.
+        max_points (int): Largest number of points returned.
+
+    Returns:
+        dict: Parallel 'mileage', 'price', 'title' and 'url' arrays, and 'total', the number of points
+            before downsampling.
+    """
+    points = ads_df[['przebieg', 'cena', 'tytul', 'url']].dropna(subset=['przebieg', 'cena'])
+    total = len(points)
+
+    if total > max_points:
+        # A fixed seed keeps the plot stable between requests
+        points = points.sample(n=max_points, random_state=0)
+
+    return {
+        'mileage': to_json_list(points['przebieg']),
+        'price': to_json_list(points['cena']),
+        'title': points['tytul'].fillna('').astype(str).tolist(),
+        'url': points['url'].fillna('').astype(str).tolist(),
+        'total': total,
+    }
+
+
+def get_aggregates(result_id, query):
+    """
+    Computes the chart data of a stored result set with NumPy and pandas.
+
+    Parameters:
+        result_id (str): ID of the result set.
+        query (QueryDict): Query parameters: 'bins' of the price histogram, 'summary_bins' of the
+            price-vs-mileage summary, 'max_points' of the scatterplot (0 for none) and the column
+            filters accepted by the results API.
+
+    Returns:
+        dict or None: Number of ads, median price and mileage, 'price_histogram', 'price_by_mileage',
+            'price_by_year' and 'points', or None if the result set expired.
+
+    Raises:
+        ValueError: If a query parameter is invalid.
+    """
+    result_set = get_result_set(result_id)
+
+    if result_set is None:
+        return None
+
+    bins = get_int_param(query, 'bins', DEFAULT_HISTOGRAM_BINS, maximum=MAX_BINS)
+    summary_bins = get_int_param(query, 'summary_bins', DEFAULT_SUMMARY_BINS, maximum=MAX_BINS)
+    max_points = get_int_param(query, 'max_points', DEFAULT_MAX_POINTS, minimum=0, maximum=MAX_POINTS)
+
+    table = result_set['table']
+    ads_df = get_ads_frame(table, filter_rows(table, query))
+
+    return {
+        'result_id': result_id,
+        'total': len(ads_df),
+        'median_price': get_median(ads_df['cena']),
+        'median_mileage': get_median(ads_df['przebieg']),
+        'price_histogram': get_price_histogram(ads_df['cena'].dropna(), bins),
+        'price_by_mileage': get_binned_summary(ads_df, 'przebieg', summary_bins),
+        'price_by_year': get_year_summary(ads_df),
+        'points': downsample_points(ads_df, max_points),
+    }
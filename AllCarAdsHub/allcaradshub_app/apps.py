@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AllcaradshubAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "allcaradshub_app"
+
+    def ready(self):
+        # Register the signal receivers
+        from allcaradshub_app import signals  # noqa: F401
@@ -0,0 +1,438 @@
+# Standard Library Imports
+import time
+import asyncio
+import logging
+import weakref
+
+# Third-Party Library Imports
+from asgiref.sync import sync_to_async
+from django.conf import settings
+import aiohttp
+
+# Local Imports
+from allcaradshub_app.crawler import new_progress, prefetch_enabled, record_page, use_listing_card
+from allcaradshub_app.dedup import deduplicate_ads
+from allcaradshub_app.fetch import DEFAULT_REQUEST_TIMEOUT, resolve_url
+from allcaradshub_app.metrics import call_timed, increment, timed
+from allcaradshub_app.offer_cache import lookup_offer, revalidate_offer, store_offer
+from allcaradshub_app.planner import BAND_CRITERIA, get_split_pages, plan_bands_async
+from allcaradshub_app.store import save_ads
+from allcaradshub_app.portals import (
+    ORDER_PRICE_ASC, PORTALS, SEARCH_MODE_FAST, STATUS_COMPLETE, STATUS_DEGRADED, STATUS_FAILED, STATUS_TIMED_OUT,
+    format_position, get_search_deadline, get_search_mode, get_search_options, merge_portal_results,
+)
+from allcaradshub_app.ratelimit import report_response, wait_for_turn_async
+from allcaradshub_app.resilience import (
+    abandon_request, allow_request, get_backoff, get_retries, is_degraded, record_outcome, should_retry,
+)
+
+# Number of page fetches in flight at the same time in one event loop, shared by all searches
+DEFAULT_MAX_IN_FLIGHT = 200
+
+# One limit per event loop, so the cap holds across every search served by the process
+_in_flight_limits = weakref.WeakKeyDictionary()
+
+
+def get_in_flight_limit():
+    """
+    Returns the semaphore limiting the number of page fetches in flight in the running event loop.
+
+    Returns:
+        asyncio.Semaphore: Semaphore shared by all searches running in the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    limit = _in_flight_limits.get(loop)
+
+    if limit is None:
+        limit = asyncio.Semaphore(getattr(settings, 'SCRAPER_ASYNC_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT))
+        _in_flight_limits[loop] = limit
+
+    return limit
+
+
+def create_session():
+    """
+    Creates the keep-alive HTTP session used by a single asynchronous search.
+
+    Returns:
+        aiohttp.ClientSession: Session to be used as an async context manager.
+    """
+    timeout = getattr(settings, 'SCRAPER_REQUEST_TIMEOUT', DEFAULT_REQUEST_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=getattr(settings, 'SCRAPER_ASYNC_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT))
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout))
+
+
+async def fetch_async(session, url, portal, headers=None):
+    """
+    Downloads a page without blocking the event loop.
+
+    The request waits for the rate limit of its host without taking a slot of the in-flight limit,
+    and its status code adapts that rate limit. Failed attempts are retried and recorded the same
+    way as by fetch.
+
+    Parameters:
+        session (aiohttp.ClientSession): Session of the search.
+        url (str): URL of the page.
+        portal (str): Name of the portal the URL belongs to.
+        headers (dict, optional): Extra request headers (e.g., of a conditional request).
+
+    Returns:
+        tuple: Status code, body and headers of the response of the last attempt.
+
+    Raises:
+        PortalUnavailableError: If the circuit breaker of the portal is open.
+        aiohttp.ClientError, asyncio.TimeoutError: If the last attempt failed without a response.
+    """
+    retries = get_retries()
+    url = resolve_url(url)
+
+    for attempt in range(retries + 1):
+        allow_request(portal)
+
+        try:
+            await wait_for_turn_async(url)
+
+            async with get_in_flight_limit():
+                async with session.get(url, headers=headers) as response:
+                    status, body, response_headers = response.status, await response.text(), response.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            record_outcome(portal, False)
+            increment('scraper_responses_total', portal=portal, status='error')
+
+            if attempt == retries:
+                raise
+
+            logging.warning(f"Request to {url} failed ({e!r}), retrying.")
+            await asyncio.sleep(get_backoff(attempt))
+            continue
+        except BaseException:
+            # Also reached when the deadline of the search cancels the request, see abandon_request
+            abandon_request(portal)
+            raise
+
+        report_response(url, status, response_headers)
+        record_outcome(portal, not should_retry(status))
+        increment('scraper_responses_total', portal=portal, status=str(status))
+
+        if attempt == retries or not should_retry(status):
+            return status, body, response_headers
+
+        logging.warning(f"Request to {url} answered {status}, retrying.")
+        await asyncio.sleep(get_backoff(attempt))
+
+
+async def scrape_subpage_async(session, portal_module, subpage_url, brand, model, fingerprint=None):
+    """
+    Scrapes detailed information from a car advertisement subpage without blocking the event loop.
+
+    Parsing runs in a worker thread, so the event loop keeps serving other fetches in the meantime.
+    The offer cache is used the same way as by the portals' scrape_subpage.
+
+    Parameters:
+        session (aiohttp.ClientSession): Session of the search.
+        portal_module (module): Portal module providing parse_subpage (e.g., gratka, otomoto).
+        subpage_url (str): URL of the car advertisement subpage.
+        fingerprint (str, optional): Fingerprint of the offer's listing card.
+
+    Returns:
+        dict or None: Dictionary returned by parse_subpage if successful, else None.
+    """
+    # Use a logger with the name of the current function
+    logger = logging.getLogger(__name__)
+
+    try:
+        cached_ad, headers = await sync_to_async(lookup_offer)(subpage_url, fingerprint)
+
+        if cached_ad is not None:
+            return cached_ad
+
+        with timed('offer_fetch', portal_module.PORTAL):
+            status, subpage_html, response_headers = await fetch_async(
+                session, subpage_url, portal_module.PORTAL, headers=headers
+            )
+        logger.info(f"Scraping subpage: {subpage_url}")
+
+        # The offer did not change since it was cached
+        if status == 304:
+            cached_ad = await sync_to_async(revalidate_offer)(subpage_url, fingerprint)
+
+            if cached_ad is not None:
+                return cached_ad
+
+            with timed('offer_fetch', portal_module.PORTAL):
+                status, subpage_html, response_headers = await fetch_async(session, subpage_url, portal_module.PORTAL)
+
+        if status == 200:
+            single_ad_dict = await asyncio.to_thread(
+                call_timed, 'extract', portal_module.PORTAL, portal_module.parse_subpage, subpage_html, subpage_url,
+                brand, model,
+            )
+
+            if single_ad_dict is not None:
+                await sync_to_async(store_offer)(subpage_url, single_ad_dict, response_headers, fingerprint)
+
+                return single_ad_dict
+
+        # If the request was not successful, log an error
+        else:
+            logger.error(f"Failed to retrieve subpage. Status code: {status}")
+
+    except Exception as e:
+        # Log any exception that occurs during scraping
+        logger.error(f"Error processing subpage {subpage_url}: {e}")
+
+    return None
+
+
+async def scrape_main_page_async(
+    portal_module, params, on_ad=None, prefetch=None, fast=False, start=None, limit=None, progress=None
+):
+    """
+    Scrapes car advertisements from a portal based on specified search criteria using asyncio.
+
+    A search walking all pages from the start is split into price or production year bands crawled
+    concurrently when its results span more than SCRAPER_SPLIT_PAGES pages, like crawler.crawl does.
+
+    Parameters:
+        portal_module (module): Portal module providing build_main_page_url, parse_main_page and parse_subpage.
+        params (dict): Search criteria accepted by the portal's scrape_main_page.
+        on_ad (callable, optional): Called with every scraped ad as soon as it is ready.
+        prefetch (bool, optional): Request pages 2..max_page concurrently once page 1 is known,
+            None to use the SCRAPER_PREFETCH_PAGES setting.
+        fast (bool, optional): Build the ads from the listing cards with the portal's parse_listing_page
+            without downloading the offer subpages.
+        start (tuple, optional): Page number and position on the page of the first offer to scrape, (1, 0) by default.
+        limit (int, optional): Number of ads after which no further page is requested, walking the
+            pages one by one.
+        progress (dict, optional): Record of the crawl created by crawler.new_progress.
+
+    Returns:
+        list of dict: List of dictionaries containing information about scraped car advertisements.
+    """
+    brand, model = params['brand'], params['model']
+    first_page_num, first_position = start or (1, 0)
+    seen_urls = set()
+
+    def record_result(subpage_url, single_ad_dict):
+        if progress is not None:
+            progress['results'][subpage_url] = single_ad_dict
+
+        if single_ad_dict is not None and on_ad is not None:
+            on_ad(single_ad_dict)
+
+    async def scrape_and_report(subpage_url, fingerprint):
+        single_ad_dict = await scrape_subpage_async(session, portal_module, subpage_url, brand, model, fingerprint)
+        record_result(subpage_url, single_ad_dict)
+
+        return single_ad_dict
+
+    async def fetch_page(band_params, page_num):
+        current_url = portal_module.build_main_page_url(**band_params, page_num=page_num)
+        logging.info(f"Using url: {current_url}")
+
+        try:
+            with timed('listing_fetch', portal_module.PORTAL):
+                status, main_page_html, _ = await fetch_async(session, current_url, portal_module.PORTAL)
+        except Exception as e:
+            logging.error(f"Failed to fetch main page {current_url}: {e!r}")
+            return None
+
+        if status != 200:
+            logging.error(f"Failed to fetch main page. Status code: {status}")
+            return None
+
+        if fast:
+            return await asyncio.to_thread(
+                call_timed, 'extract', portal_module.PORTAL, portal_module.parse_listing_page, main_page_html, brand, model
+            )
+
+        return await asyncio.to_thread(
+            call_timed, 'extract', portal_module.PORTAL, portal_module.parse_main_page, main_page_html
+        )
+
+    async def scrape_page(band_params, page_num, position=0, main_page=None):
+        if main_page is None:
+            main_page = await fetch_page(band_params, page_num)
+
+        if main_page is None:
+            return None, []
+
+        max_page, subpage_urls, fingerprints = main_page
+        logging.info(f"Maximum Page Number: {max_page}, actual page: {page_num}")
+        record_page(progress, page_num, max_page, subpage_urls)
+
+        # The same offer may be promoted on several pages, or listed in several bands
+        subpage_urls = [subpage_url for subpage_url in subpage_urls[position:] if subpage_url not in seen_urls]
+        seen_urls.update(subpage_urls)
+
+        if fast:
+            page_ads = [
+                await sync_to_async(use_listing_card)(subpage_url, fingerprints[subpage_url])
+                for subpage_url in subpage_urls
+            ]
+
+            for subpage_url, single_ad_dict in zip(subpage_urls, page_ads):
+                record_result(subpage_url, single_ad_dict)
+
+            return max_page, page_ads
+
+        # All subpages of the page are fetched as concurrent tasks
+        results = await asyncio.gather(*(
+            scrape_and_report(subpage_url, fingerprints.get(subpage_url)) for subpage_url in subpage_urls
+        ))
+
+        return max_page, [result for result in results if result is not None]
+
+    async def crawl_chain(band_params, first_page=None):
+        max_page, all_ads = await scrape_page(band_params, first_page_num, first_position, first_page)
+
+        if max_page is None:
+            return all_ads
+
+        if limit is None and prefetch_enabled(prefetch):
+            # Every remaining page is scheduled at once, the in-flight limit keeps the load bounded
+            pages = await asyncio.gather(*(
+                scrape_page(band_params, page_num) for page_num in range(first_page_num + 1, max_page + 1)
+            ))
+
+            for _, page_ads in pages:
+                all_ads.extend(page_ads)
+        else:
+            page_num = first_page_num + 1
+
+            while page_num <= max_page and (limit is None or len(all_ads) < limit):
+                page_max_page, page_ads = await scrape_page(band_params, page_num)
+
+                # A page that failed after its retries is skipped, unless the portal became unavailable
+                if page_max_page is None and is_degraded(portal_module.PORTAL):
+                    break
+
+                all_ads.extend(page_ads)
+                page_num += 1
+
+        return all_ads
+
+    async with create_session() as session:
+        if start is None and limit is None and progress is None and get_split_pages():
+            bands = await plan_bands_async(
+                {name: params.get(name, '') for name in BAND_CRITERIA},
+                lambda band: fetch_page({**params, **band}, 1),
+            )
+            band_ads = await asyncio.gather(*(
+                crawl_chain({**params, **band}, first_page) for band, first_page in bands
+            ))
+            all_ads = [single_ad_dict for page_ads in band_ads for single_ad_dict in page_ads]
+        else:
+            all_ads = await crawl_chain(params)
+
+    # Keep the ads in the database for later searches, unless their details are missing
+    if not fast:
+        await sync_to_async(save_ads)(all_ads)
+
+    return all_ads
+
+
+async def search_all_portals_async(data, on_ad=None):
+    """
+    Searches all portals concurrently in the running event loop, each within its own deadline.
+
+    Searches asking for their cheapest ads only, with a time budget or resuming at a cursor work the
+    same way as in portals.search_all_portals.
+
+    Parameters:
+        data (dict): Search form data.
+        on_ad (callable, optional): Called with every scraped ad as soon as it is ready.
+
+    Returns:
+        tuple: List of ads from all portals, with cross-portal duplicates merged, and a dictionary
+            mapping every portal to its status ('complete', 'limited', 'timed_out', 'failed' or
+            'degraded'), number of ads, elapsed time in seconds and cursor.
+
+    Raises:
+        ValueError: If an option of portals.get_search_options is invalid.
+    """
+    started = time.monotonic()
+    options = get_search_options(data)
+    partial_ads = {name: [] for name in PORTALS}
+    finished = {}
+    tasks = {}
+
+    def make_collector(name):
+        def collect(ad):
+            partial_ads[name].append(ad)
+
+            if on_ad is not None:
+                on_ad(ad)
+
+        return collect
+
+    portal_ads = {}
+    sources = {}
+    fast = get_search_mode(data) == SEARCH_MODE_FAST
+    cursor = options['cursor']
+    starts = cursor or {}
+    resumable = options['limit'] is not None or options['time_budget'] is not None or cursor is not None
+    progresses = {} if resumable else None
+
+    for name, portal in PORTALS.items():
+        # A resumed search only searches the portals that had offers left
+        if cursor is not None and name not in cursor:
+            sources[name] = {'status': STATUS_COMPLETE, 'ads': 0, 'elapsed': 0.0, 'cursor': None}
+            continue
+
+        if is_degraded(name):
+            logging.warning(f"Skipping portal {name}, its circuit breaker is open.")
+            sources[name] = {
+                'status': STATUS_DEGRADED, 'ads': 0, 'elapsed': 0.0,
+                'cursor': format_position(starts.get(name, (1, 0))) if resumable else None,
+            }
+            continue
+
+        params = portal['get_params'](data)
+
+        if options['limit'] is not None:
+            params['order'] = ORDER_PRICE_ASC
+
+        if resumable:
+            progresses[name] = new_progress()
+
+        task = asyncio.create_task(scrape_main_page_async(
+            portal['module'], params, on_ad=make_collector(name), fast=fast, start=starts.get(name),
+            limit=options['limit'], progress=progresses[name] if resumable else None,
+        ))
+        task.add_done_callback(lambda _, name=name: finished.setdefault(name, time.monotonic()))
+        tasks[name] = task
+
+    for name, task in tasks.items():
+        try:
+            # A portal that overruns its deadline is cancelled and contributes its partial results
+            timeout = max(0, get_search_deadline(name, started, options['time_budget']) - time.monotonic())
+            ads = await asyncio.wait_for(task, timeout=timeout)
+            status = STATUS_COMPLETE
+        except asyncio.TimeoutError:
+            logging.warning(f"Portal {name} did not finish within its deadline. Using partial results.")
+            ads = list(partial_ads[name])
+            status = STATUS_TIMED_OUT
+        except Exception as e:
+            logging.error(f"Portal {name} failed: {e}")
+            ads = list(partial_ads[name])
+            status = STATUS_FAILED
+
+        # Requests refused by the circuit breaker leave the results incomplete whatever the status
+        if is_degraded(name):
+            status = STATUS_DEGRADED
+
+        portal_ads[name] = ads
+        sources[name] = {
+            'status': status,
+            'ads': len(ads),
+            'elapsed': round(finished.get(name, time.monotonic()) - started, 2),
+            'cursor': None,
+        }
+
+    list_of_ads = merge_portal_results(portal_ads, sources, progresses, starts, options['limit'])
+
+    # The same car is often listed on more than one portal
+    list_of_ads = await asyncio.to_thread(deduplicate_ads, list_of_ads)
+
+    return list_of_ads, sources
@@ -0,0 +1,590 @@
+# Standard Library Imports
+import time
+import hashlib
+import logging
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Third-Party Library Imports
+from django.conf import settings
+
+# Local Imports
+from allcaradshub_app.fetch import deadline_reached, fetch, get_max_workers, scrape_concurrently
+from allcaradshub_app.metrics import bind_context, timed
+from allcaradshub_app.offer_cache import lookup_offer
+from allcaradshub_app.planner import get_split_pages, plan_bands
+from allcaradshub_app.resilience import is_degraded
+from allcaradshub_app.store import save_ads
+
+# Number of listing pages downloaded at the same time in prefetch mode, used when not configured in settings.py
+DEFAULT_LISTING_WORKERS = 4
+
+# Number of bands of a split search crawled at the same time, used when not configured in settings.py
+DEFAULT_SPLIT_WORKERS = 4
+
+
+def prefetch_enabled(prefetch):
+    """
+    Resolves whether listing pages are prefetched, falling back to the SCRAPER_PREFETCH_PAGES setting.
+
+    Parameters:
+        prefetch (bool or None): Mode requested by the caller, None to use the setting.
+
+    Returns:
+        bool: True if listing pages 2..max_page are fetched in parallel.
+    """
+    if prefetch is None:
+        return getattr(settings, 'SCRAPER_PREFETCH_PAGES', False)
+    return prefetch
+
+
+def use_listing_card(subpage_url, card):
+    """
+    Returns the ad of an offer found on a page with search results without downloading its subpage.
+
+    The full ad is used when the offer cache has it and it is fresh or its listing card is unchanged,
+    otherwise the ad built from the listing card, whose details are left as None.
+
+    Parameters:
+        subpage_url (str): URL of the car advertisement subpage.
+        card (tuple): Ad built from the listing card and the fingerprint of the card.
+
+    Returns:
+        dict: Ad dictionary.
+    """
+    card_ad, fingerprint = card
+    cached_ad, _ = lookup_offer(subpage_url, fingerprint)
+
+    return cached_ad if cached_ad is not None else card_ad
+
+
+def get_offer_fingerprint(ad):
+    """
+    Returns the fingerprint a saved search compares an offer by between its runs: the price and the
+    title shown on its listing card.
+
+    Parameters:
+        ad (dict): Ad built from the listing card.
+
+    Returns:
+        str: Short hash of the price and the title.
+    """
+    values = f"{ad.get('cena_value')}|{ad.get('tytul_value')}"
+    return hashlib.sha1(values.encode('utf-8')).hexdigest()[:16]
+
+
+def new_refresh(offers):
+    """
+    Creates the state of an incremental refresh of a saved search.
+
+    Parameters:
+        offers (dict): Offers found by the previous run by their URL, each with its 'fingerprint'
+            (see get_offer_fingerprint) and its 'ad'.
+
+    Returns:
+        dict: 'offers' of the previous run, 'seen' mapping the URL of every offer found to its
+            fingerprint, 'ads' mapping it to its ad, and 'downloaded', the URLs of the offers whose
+            subpage was requested.
+    """
+    return {'offers': offers, 'seen': {}, 'ads': {}, 'downloaded': set()}
+
+
+def refresh_listing_card(refresh, scrape_subpage):
+    """
+    Creates the function a refresh of a saved search uses instead of scraping every subpage.
+
+    An offer whose listing card shows the same price and title as on the previous run keeps its ad
+    without any request, and only new or changed offers have their subpage scraped. An offer whose
+    subpage cannot be scraped keeps its previous ad, or the ad of its listing card, without a
+    fingerprint, so the next refresh downloads it again whatever its card shows.
+
+    Parameters:
+        refresh (dict): State created by new_refresh, updated with every offer found.
+        scrape_subpage (callable): Function taking a subpage URL and the fingerprint of its listing
+            card, and returning an ad dictionary or None.
+
+    Returns:
+        callable: Function taking a subpage URL and its card (ad built from the listing card and
+            fingerprint of the card), and returning an ad dictionary.
+    """
+    def scrape(subpage_url, card):
+        card_ad, card_fingerprint = card
+        fingerprint = get_offer_fingerprint(card_ad)
+        previous = refresh['offers'].get(subpage_url)
+
+        if previous is not None and previous['fingerprint'] == fingerprint:
+            single_ad_dict = previous['ad']
+        else:
+            refresh['downloaded'].add(subpage_url)
+            single_ad_dict = scrape_subpage(subpage_url, card_fingerprint)
+
+            if single_ad_dict is None:
+                fingerprint = None
+                single_ad_dict = previous['ad'] if previous is not None else card_ad
+
+        refresh['seen'][subpage_url] = fingerprint
+        refresh['ads'][subpage_url] = single_ad_dict
+
+        return single_ad_dict
+
+    return scrape
+
+
+def new_progress():
+    """
+    Creates the record of how far a crawl got, from which the position to resume it at is found.
+
+    Returns:
+        dict: 'max_page' (None until a page with search results is parsed), 'pages', mapping every
+            parsed page number to its subpage URLs, and 'results', mapping every attempted subpage URL
+            to its ad or None.
+    """
+    return {'max_page': None, 'pages': {}, 'results': {}}
+
+
+def record_page(progress, page_num, max_page, subpage_urls):
+    """
+    Records the subpage URLs listed on a page with search results.
+
+    Parameters:
+        progress (dict or None): Record created by new_progress, None when the crawl is not tracked.
+        page_num (int): Number of the page.
+        max_page (int): Maximum page number shown on the page.
+        subpage_urls (list of str): Subpage URLs in the order they appear on the page.
+    """
+    if progress is not None:
+        progress['max_page'] = max_page
+        progress['pages'][page_num] = list(subpage_urls)
+
+
+def track_subpages(scrape_subpage, progress):
+    """
+    Wraps a subpage scraping function to record every attempted subpage and its ad.
+
+    Parameters:
+        scrape_subpage (callable): Function taking a subpage URL and the fingerprint (or card) of its
+            listing card, and returning an ad dictionary or None.
+        progress (dict): Record created by new_progress.
+
+    Returns:
+        callable: Function with the same signature.
+    """
+    def scrape(subpage_url, fingerprint=None):
+        single_ad_dict = scrape_subpage(subpage_url, fingerprint)
+        progress['results'][subpage_url] = single_ad_dict
+        return single_ad_dict
+
+    return scrape
+
+
+def collect_progress(progress, start=None):
+    """
+    Lists the ads of a tracked crawl in the order of the pages with search results, up to the first
+    offer that was not attempted, and returns the position to resume the crawl at.
+
+    Ads scraped after that offer (e.g., by a concurrent worker) are left out, so resuming at the
+    returned position neither skips nor repeats an ad. The offer cache makes scraping them again cheap.
+
+    Parameters:
+        progress (dict): Record of the crawl created by new_progress.
+        start (tuple, optional): Page number and position on the page the crawl started at, (1, 0) by default.
+
+    Returns:
+        tuple: List of (page number, position) and ad pairs, and the (page number, position) of the
+            first offer that was not attempted, or None if every page was crawled.
+    """
+    page_num, position = start or (1, 0)
+    max_page = progress['max_page']
+    pages = dict(progress['pages'])
+    results = dict(progress['results'])
+    entries = []
+    seen_urls = set()
+
+    if max_page is None:
+        return entries, (page_num, position)
+
+    while page_num <= max_page:
+        subpage_urls = pages.get(page_num)
+
+        if subpage_urls is None:
+            return entries, (page_num, position)
+
+        for index in range(position, len(subpage_urls)):
+            subpage_url = subpage_urls[index]
+
+            if subpage_url not in results:
+                return entries, (page_num, index)
+
+            # The same offer may be promoted on several pages
+            if results[subpage_url] is not None and subpage_url not in seen_urls:
+                seen_urls.add(subpage_url)
+                entries.append(((page_num, index), results[subpage_url]))
+
+        page_num += 1
+        position = 0
+
+    return entries, None
+
+
+def fetch_main_page(portal, build_url, parse_main_page, page_num, deadline=None):
+    """
+    Downloads and parses a single page with search results.
+
+    Parameters:
+        portal (str): Name of the portal.
+        build_url (callable): Function returning the URL of a page with search results for a page number.
+        parse_main_page (callable): Portal function returning max_page, subpage URLs and card fingerprints of a page.
+        page_num (int): Number of the page.
+        deadline (float, optional): time.monotonic() value after which the request is not retried.
+
+    Returns:
+        tuple or None: Result of parse_main_page, or None if the page could not be fetched.
+    """
+    current_url = build_url(page_num)
+
+    # Request the current page, which fetch retries on transient errors
+    try:
+        with timed('listing_fetch', portal):
+            main_page_response = fetch(current_url, portal, deadline=deadline)
+    except Exception as e:
+        logging.error(f"Failed to fetch main page {current_url}: {e}")
+        return None
+
+    logging.info(f"Using url: {current_url}")
+
+    if main_page_response.status_code != 200:
+        logging.error(f"Failed to fetch main page. Status code: {main_page_response.status_code}")
+        return None
+
+    with timed('extract', portal):
+        return parse_main_page(main_page_response.text)
+
+
+def crawl(
+    portal, build_url, parse_main_page, scrape_subpage, deadline=None, on_ad=None, on_page=None, prefetch=None,
+    store=True, start=None, limit=None, progress=None, split=None,
+):
+    """
+    Walks the pages with search results of a portal and scrapes every offer subpage found on them.
+
+    In the default mode pages are walked one by one and the subpages of each page are scraped
+    concurrently before the next page is requested. In prefetch mode all remaining pages are requested
+    in parallel as soon as page 1 reveals max_page, and their links feed one shared subpage pool.
+
+    Listing-only searches pass a parse_main_page returning the listing cards instead of their
+    fingerprints and use_listing_card as scrape_subpage, so no subpage is downloaded.
+
+    A crawl can start in the middle of the pages, as returned by collect_progress for an earlier
+    one, and stop early once limit ads are scraped, in which case the pages are always walked one
+    by one so no page past the last one needed is requested.
+
+    Otherwise a search whose results span more than SCRAPER_SPLIT_PAGES pages is split into price
+    or production year bands (see planner.plan_bands), which are crawled in parallel and merged
+    without duplicates, so it does not depend on one long chain of pages the portal may cut short.
+
+    Parameters:
+        portal (str): Name of the portal.
+        build_url (callable): Function returning the URL of a page with search results for a page number,
+            and for the 'price_from', 'price_to', 'year_from' and 'year_to' keyword arguments of a band
+            when split is given.
+        parse_main_page (callable): Portal function returning max_page, subpage URLs and card fingerprints of a page.
+        scrape_subpage (callable): Function taking a subpage URL and the fingerprint (or card) of its listing
+            card, and returning an ad dictionary or None.
+        deadline (float, optional): time.monotonic() value after which scraping stops.
+        on_ad (callable, optional): Called with every scraped ad as soon as it is ready.
+        on_page (callable, optional): Called with the page number and max_page of every fetched page
+            with search results.
+        prefetch (bool, optional): Whether to prefetch listing pages, None to use SCRAPER_PREFETCH_PAGES.
+        store (bool, optional): Whether to keep the ads in the Ad model, False for ads built from
+            listing cards, whose missing details would overwrite the stored ones.
+        start (tuple, optional): Page number and position on the page of the first offer to scrape, (1, 0) by default.
+        limit (int, optional): Number of ads after which no further page is requested.
+        progress (dict, optional): Record created by new_progress, filled with the parsed pages and
+            attempted subpages.
+        split (dict, optional): 'price_from', 'price_to', 'year_from' and 'year_to' of the search,
+            None to never split it. Searches starting in the middle, limited or tracked are not split.
+
+    Returns:
+        list of dict: List of dictionaries containing information about scraped car advertisements.
+    """
+    start = start or (1, 0)
+
+    if progress is not None:
+        scrape_subpage = track_subpages(scrape_subpage, progress)
+
+    def crawl_chain(build_url, first_page=None, on_ad=on_ad, on_page=on_page):
+        if limit is None and prefetch_enabled(prefetch):
+            return crawl_prefetched(
+                portal, build_url, parse_main_page, scrape_subpage, deadline, on_ad, on_page, start, progress,
+                first_page,
+            )
+
+        return crawl_sequential(
+            portal, build_url, parse_main_page, scrape_subpage, deadline, on_ad, on_page, start, limit, progress,
+            first_page,
+        )
+
+    if split is not None and start == (1, 0) and limit is None and progress is None and get_split_pages():
+        bands = plan_bands(
+            split,
+            lambda band: fetch_main_page(portal, functools.partial(build_url, **band), parse_main_page, 1, deadline),
+            deadline,
+        )
+
+        if not bands:
+            logging.info('There is no offers when considering searching details.')
+            all_ads = []
+        elif len(bands) == 1:
+            band, first_page = bands[0]
+            all_ads = crawl_chain(functools.partial(build_url, **band), first_page)
+        else:
+            all_ads = crawl_bands(portal, build_url, bands, crawl_chain, on_ad, on_page)
+    else:
+        all_ads = crawl_chain(build_url)
+
+    logging.info(f"Scraped {len(all_ads)} ads of {portal}.")
+
+    # Keep the ads in the database for later searches
+    if store:
+        save_ads(all_ads)
+
+    return all_ads
+
+
+def crawl_bands(portal, build_url, bands, crawl_chain, on_ad, on_page):
+    """
+    Crawls the bands of a split search in parallel and merges their ads.
+
+    An offer listed in more than one band (e.g., whose price changed between the requests) is kept
+    and reported once. Pages are reported to on_page as the number of pages fetched over the total
+    number of pages of all bands.
+
+    Parameters:
+        portal (str): Name of the portal.
+        build_url (callable): URL builder of the search, taking the criteria of a band as keyword arguments.
+        bands (list of tuple): Search criteria and parsed first page of every band, as returned by plan_bands.
+        crawl_chain (callable): Function crawling the pages of one band, given its URL builder, first
+            page, on_ad and on_page callbacks.
+        on_ad (callable or None): Called with every scraped ad as soon as it is ready.
+        on_page (callable or None): Called with the number of pages fetched and the total number of pages.
+
+    Returns:
+        list of dict: Ads of all bands, in the order of the bands.
+    """
+    seen_urls = set()
+    seen_lock = threading.Lock()
+    pages_fetched = itertools.count(1)
+    total_pages = sum(1 if first_page is None else first_page[0] for _, first_page in bands)
+
+    def report_ad(single_ad_dict):
+        with seen_lock:
+            if single_ad_dict['url_value'] in seen_urls:
+                return
+
+            seen_urls.add(single_ad_dict['url_value'])
+
+        if on_ad is not None:
+            on_ad(single_ad_dict)
+
+    def report_page(page_num, max_page):
+        if on_page is not None:
+            on_page(next(pages_fetched), total_pages)
+
+    split_workers = getattr(settings, 'SCRAPER_SPLIT_WORKERS', DEFAULT_SPLIT_WORKERS)
+    logging.info(f"Crawling {len(bands)} bands of {portal} with {total_pages} pages in total.")
+
+    with ThreadPoolExecutor(max_workers=split_workers) as executor:
+        futures = [
+            executor.submit(
+                bind_context(crawl_chain), functools.partial(build_url, **band), first_page, report_ad, report_page
+            )
+            for band, first_page in bands
+        ]
+        band_ads = [future.result() for future in futures]
+
+    all_ads = []
+    merged_urls = set()
+
+    for single_ad_dict in itertools.chain.from_iterable(band_ads):
+        if single_ad_dict['url_value'] not in merged_urls:
+            merged_urls.add(single_ad_dict['url_value'])
+            all_ads.append(single_ad_dict)
+
+    return all_ads
+
+
+def crawl_sequential(
+    portal, build_url, parse_main_page, scrape_subpage, deadline, on_ad, on_page, start, limit, progress,
+    first_page=None,
+):
+    """
+    Walks the pages with search results one by one. See crawl for the parameters, first_page is the
+    parsed first page when it was already fetched.
+    """
+    all_ads = []
+    page_num, position = start
+    max_page = None
+    while True:
+        if deadline_reached(deadline):
+            logging.warning(f"Deadline reached before page {page_num}. Returning partial results.")
+            break
+
+        if first_page is not None:
+            main_page, first_page = first_page, None
+        else:
+            main_page = fetch_main_page(portal, build_url, parse_main_page, page_num, deadline)
+
+        if main_page is None:
+            # A page that failed after its retries is skipped, unless the number of pages is not
+            # known yet or the portal became unavailable
+            if max_page is None or page_num >= max_page or is_degraded(portal):
+                break
+
+            logging.warning(f"Skipping page {page_num} of {portal}.")
+            page_num += 1
+            position = 0
+            continue
+
+        max_page, subpage_urls, fingerprints = main_page
+        record_page(progress, page_num, max_page, subpage_urls)
+
+        if max_page == 0:
+            logging.info('There is no offers when considering searching details.')
+            break
+
+        logging.info(f"Maximum Page Number: {max_page}, actual page: {page_num}")
+
+        if on_page is not None:
+            on_page(page_num, max_page)
+
+        # Download and scrape the subpages of the current page concurrently
+        all_ads.extend(scrape_concurrently(
+            lambda subpage_url: scrape_subpage(subpage_url, fingerprints.get(subpage_url)),
+            subpage_urls[position:],
+            deadline=deadline,
+            on_result=on_ad,
+        ))
+
+        # Increment the page number
+        page_num += 1
+        position = 0
+
+        # Check if we reached the maximum page number
+        if page_num > max_page:
+            logging.info("Reached maximum page number. Stopping.")
+            break
+
+        if limit is not None and len(all_ads) >= limit:
+            logging.info(f"Scraped {len(all_ads)} ads of the {limit} asked for. Stopping.")
+            break
+
+    return all_ads
+
+
+def crawl_prefetched(
+    portal, build_url, parse_main_page, scrape_subpage, deadline, on_ad, on_page, start, progress, first_page=None,
+):
+    """
+    Requests all pages with search results in parallel once the first one is known. See crawl for the
+    parameters, first_page is the parsed first page when it was already fetched.
+    """
+    first_page_num, first_position = start
+
+    if first_page is not None:
+        main_page = first_page
+    else:
+        main_page = fetch_main_page(portal, build_url, parse_main_page, first_page_num, deadline)
+
+    if main_page is None:
+        return []
+
+    max_page, first_subpage_urls, first_fingerprints = main_page
+
+    if max_page == 0:
+        logging.info('There is no offers when considering searching details.')
+        return []
+
+    logging.info(f"Maximum Page Number: {max_page}. Prefetching pages {first_page_num + 1}..{max_page}.")
+
+    listing_workers = getattr(settings, 'SCRAPER_LISTING_WORKERS', DEFAULT_LISTING_WORKERS)
+    listing_executor = ThreadPoolExecutor(max_workers=listing_workers)
+    subpage_executor = ThreadPoolExecutor(max_workers=get_max_workers())
+
+    # Results are keyed by (page number, position on the page) to keep the order of the sequential mode
+    results = {}
+    results_lock = threading.Lock()
+    seen_urls = set()
+    subpage_futures = []
+
+    def report(key):
+        def done(future):
+            if future.cancelled() or future.exception() is not None:
+                return
+
+            result = future.result()
+
+            if result is not None:
+                with results_lock:
+                    results[key] = result
+
+                if on_ad is not None:
+                    on_ad(result)
+
+        return done
+
+    def queue_subpages(page_num, subpage_urls, fingerprints, first_position=0):
+        record_page(progress, page_num, max_page, subpage_urls)
+
+        if on_page is not None:
+            on_page(page_num, max_page)
+
+        for position, subpage_url in enumerate(subpage_urls):
+            # The same offer may be promoted on several pages
+            if position < first_position or subpage_url in seen_urls:
+                continue
+
+            seen_urls.add(subpage_url)
+            future = subpage_executor.submit(bind_context(scrape_subpage), subpage_url, fingerprints.get(subpage_url))
+            future.add_done_callback(report((page_num, position)))
+            subpage_futures.append(future)
+
+    try:
+        queue_subpages(first_page_num, first_subpage_urls, first_fingerprints, first_position)
+
+        listing_futures = {
+            listing_executor.submit(
+                bind_context(fetch_main_page), portal, build_url, parse_main_page, page_num, deadline
+            ): page_num
+            for page_num in range(first_page_num + 1, max_page + 1)
+        }
+
+        # Links of every listing page join the subpage pool as soon as the page arrives
+        pending = set(listing_futures)
+        while pending:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when='FIRST_COMPLETED')
+
+            if not done:
+                logging.warning(f"Deadline reached, skipping {len(pending)} remaining pages.")
+                break
+
+            for future in done:
+                main_page = future.result() if future.exception() is None else None
+
+                if main_page is not None:
+                    queue_subpages(listing_futures[future], main_page[1], main_page[2])
+
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        _, not_done = wait(subpage_futures, timeout=timeout)
+
+        if not_done:
+            logging.warning(f"Deadline reached, skipping {len(not_done)} remaining subpages.")
+
+    finally:
+        listing_executor.shutdown(wait=False, cancel_futures=True)
+        subpage_executor.shutdown(wait=False, cancel_futures=True)
+
+    with results_lock:
+        return [results[key] for key in sorted(results)]
@@ -0,0 +1,352 @@
+# Standard Library Imports
+import re
+import math
+import zlib
+import logging
+from collections import defaultdict
+
+# Third-Party Library Imports
+import numpy as np
+from django.conf import settings
+
+# Local Imports
+from allcaradshub_app.store import to_number
+
+# Values used when the SCRAPER_DEDUP_* settings are not configured in settings.py
+DEFAULT_MILEAGE_BUCKET = 5000
+DEFAULT_MILEAGE_TOLERANCE = 1000
+DEFAULT_TITLE_SIMILARITY = 0.5
+DEFAULT_PRICE_TOLERANCE = 0.05
+
+# MinHash signatures have BANDS * ROWS_PER_BAND values. Two titles become candidates when all values
+# of at least one band are equal, which is likely above a Jaccard similarity of about (1 / BANDS) ** (1 / ROWS_PER_BAND).
+BANDS = 10
+ROWS_PER_BAND = 3
+NUM_PERM = BANDS * ROWS_PER_BAND
+
+
+# Number of ads in the neighbouring blocks of an ad above which only ads sharing an LSH band are compared
+MAX_BLOCK_COMPARISONS = 50
+
+# Parameters of the hash functions (a * x + b) mod _PRIME simulating the permutations of MinHash
+_PRIME = (1 << 61) - 1
+_random = np.random.RandomState(1)
+_PERM_A = _random.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _random.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+
+
+def get_shingles(ad):
+    """
+    Returns the shingles the title of an ad is compared by: its lowercased words and numbers.
+
+    The brand and model are left out, since every candidate shares them.
+
+    Parameters:
+        ad (dict): Ad dictionary.
+
+    Returns:
+        set of str: Words of the title.
+    """
+    words = set(re.findall(r'\w+(?:[.,]\w+)*', str(ad.get('tytul_value') or '').lower()))
+    common = set(re.findall(r'\w+', f"{ad.get('marka_value') or ''} {ad.get('model_value') or ''}".lower()))
+    return words - common
+
+
+def get_minhash(shingles):
+    """
+    Computes the MinHash signature of a set of shingles.
+
+    Parameters:
+        shingles (set of str): Shingles of a title.
+
+    Returns:
+        np.ndarray: NUM_PERM minimum hash values.
+    """
+    if not shingles:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+
+    hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles), dtype=np.uint64)
+    # Values stay below 2 ** 63, so the products and sums do not overflow
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _PRIME
+    return permuted.min(axis=1)
+
+
+def get_blocking_keys(ad, mileage_bucket, price_tolerance):
+    """
+    Returns the blocking key of an ad and the keys of the blocks its candidates can be in.
+
+    Ads are blocked on brand, model, production year, mileage bucket and price bucket, where price
+    buckets are price_tolerance wide on a logarithmic scale. Candidates are also looked up in the
+    neighbouring buckets, so close values on both sides of a bucket edge still meet.
+
+    Parameters:
+        ad (dict): Ad dictionary.
+        mileage_bucket (int): Width of the mileage buckets in kilometres.
+        price_tolerance (float): Largest relative difference of the prices of duplicates.
+
+    Returns:
+        tuple: The key of the ad and the list of keys to look up, or (None, []) if the ad lacks the
+            production year, mileage or price.
+    """
+    year = to_number(ad.get('rok_produkcji_value'))
+    mileage = to_number(ad.get('przebieg_value'))
+    price = to_number(ad.get('cena_value'))
+
+    if year is None or mileage is None or price is None or price <= 0:
+        return None, []
+
+    prefix = (str(ad.get('marka_value') or '').lower(), str(ad.get('model_value') or '').lower(), int(year))
+    mileage_key = int(mileage // mileage_bucket)
+    price_key = int(math.log(price) // math.log1p(price_tolerance))
+    offsets = (-1, 0, 1)
+
+    return (
+        prefix + (mileage_key, price_key),
+        [prefix + (mileage_key + i, price_key + j) for i in offsets for j in offsets],
+    )
+
+
+def are_close(ad, other, tolerances):
+    """
+    Checks whether two candidate ads have close enough mileage and price to describe the same car.
+
+    Parameters:
+        ad (dict): First ad.
+        other (dict): Second ad.
+        tolerances (dict): Largest mileage difference in kilometres ('mileage') and largest relative
+            price difference ('price').
+
+    Returns:
+        bool: True if both values are within the tolerances.
+    """
+    mileage = to_number(ad.get('przebieg_value'))
+    other_mileage = to_number(other.get('przebieg_value'))
+
+    if abs(mileage - other_mileage) > tolerances['mileage']:
+        return False
+
+    price = to_number(ad.get('cena_value'))
+    other_price = to_number(other.get('cena_value'))
+
+    return abs(price - other_price) <= tolerances['price'] * max(price, other_price)
+
+
+def get_band_keys(signature):
+    """
+    Splits a MinHash signature into the LSH bands titles are bucketed by.
+
+    Parameters:
+        signature (np.ndarray): MinHash signature.
+
+    Returns:
+        list of bytes: BANDS keys of ROWS_PER_BAND values each.
+    """
+    return [signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes() for band in range(BANDS)]
+
+
+def get_offers(ad):
+    """
+    Returns the offers an ad stands for: its own, or those of every portal for an ad merged before.
+
+    Parameters:
+        ad (dict): Ad dictionary, possibly merged by merge_ads.
+
+    Returns:
+        list of dict: Portal, URL and price of every offer.
+    """
+    if ad.get('oferty_value'):
+        return ad['oferty_value']
+
+    return [{'strona_value': ad.get('strona_value'), 'url_value': ad.get('url_value'), 'cena_value': ad.get('cena_value')}]
+
+
+def get_portals(ad):
+    """
+    Returns the portals an ad is offered on.
+
+    Parameters:
+        ad (dict): Ad dictionary, possibly merged by merge_ads.
+
+    Returns:
+        set of str: Names of the portals of its offers.
+    """
+    return {offer.get('strona_value') for offer in get_offers(ad)}
+
+
+def merge_ads(group):
+    """
+    Merges duplicate ads into the record of the first one, listing the offers of every portal.
+
+    Parameters:
+        group (list of dict): Duplicate ads in the order they were found, possibly merged before.
+
+    Returns:
+        dict: Copy of the first ad with 'oferty_value', the portal, URL and price of every offer.
+    """
+    merged = dict(group[0])
+    merged['oferty_value'] = [offer for ad in group for offer in get_offers(ad)]
+    return merged
+
+
+def find_duplicate_pairs(list_of_ads, mileage_bucket, tolerances):
+    """
+    Finds the pairs of ads of different portals that describe the same car.
+
+    An ad is compared with the ads of other portals in its neighbouring blocks. When those hold more
+    than MAX_BLOCK_COMPARISONS ads, only the ones sharing an LSH band of the title are compared.
+
+    Parameters:
+        list_of_ads (list of dict): Ads of all portals.
+        mileage_bucket (int): Width of the mileage buckets in kilometres.
+        tolerances (dict): Tolerances passed to are_close and the smallest title similarity ('title').
+
+    Returns:
+        list of tuple: Title similarity and indexes of both ads of every confirmed pair.
+    """
+    blocks = defaultdict(list)
+    lookups = {}
+
+    for index, ad in enumerate(list_of_ads):
+        key, lookup_keys = get_blocking_keys(ad, mileage_bucket, tolerances['price'])
+
+        if key is not None:
+            blocks[key].append(index)
+            lookups[index] = lookup_keys
+
+    ad_portals = [get_portals(ad) for ad in list_of_ads]
+    signatures = {}
+    band_indexes = {}
+
+    def get_signature(index):
+        if index not in signatures:
+            signatures[index] = get_minhash(get_shingles(list_of_ads[index]))
+        return signatures[index]
+
+    def get_band_index(key):
+        # LSH buckets of a block, built the first time a crowded neighbourhood needs them
+        if key not in band_indexes:
+            band_index = defaultdict(list)
+
+            for index in blocks[key]:
+                for band, band_key in enumerate(get_band_keys(get_signature(index))):
+                    band_index[(band, band_key)].append(index)
+
+            band_indexes[key] = band_index
+
+        return band_indexes[key]
+
+    pairs = []
+
+    for index, lookup_keys in lookups.items():
+        ad = list_of_ads[index]
+        own_portals = ad_portals[index]
+        lookup_keys = [key for key in lookup_keys if key in blocks]
+
+        if sum(len(blocks[key]) for key in lookup_keys) <= MAX_BLOCK_COMPARISONS:
+            candidates = [other_index for key in lookup_keys for other_index in blocks[key]]
+        else:
+            candidates = set()
+            band_keys = get_band_keys(get_signature(index))
+
+            for key in lookup_keys:
+                band_index = get_band_index(key)
+
+                for band, band_key in enumerate(band_keys):
+                    candidates.update(band_index.get((band, band_key), ()))
+
+        for other_index in candidates:
+            # Every pair is compared once, and only across portals
+            if other_index <= index or ad_portals[other_index] & own_portals:
+                continue
+
+            other = list_of_ads[other_index]
+
+            if not are_close(ad, other, tolerances):
+                continue
+
+            similarity = float(np.mean(get_signature(index) == get_signature(other_index)))
+
+            if similarity >= tolerances['title']:
+                pairs.append((similarity, index, other_index))
+
+    return pairs
+
+
+def deduplicate_ads(list_of_ads):
+    """
+    Merges ads of the same car listed on more than one portal.
+
+    Ads are first grouped into blocks by brand, model, production year, mileage bucket and price
+    bucket, and only ads of different portals within neighbouring blocks are compared. In crowded
+    neighbourhoods only ads whose MinHash title signatures share an LSH band become candidates, so
+    large blocks are not compared pair by pair either. Candidates are confirmed on mileage, price
+    and estimated title similarity, and the most similar pairs are merged first, with at most one
+    ad of every portal in a merged ad.
+
+    Ads merged before, such as those of an earlier search, are merged further without repeating a
+    portal, so the ads of a search can be deduplicated again with ads added later.
+
+    Parameters:
+        list_of_ads (list of dict): Ads of all portals.
+
+    Returns:
+        list of dict: Ads with every group of duplicates replaced by one merged ad at the position
+            of its first member.
+    """
+    if not getattr(settings, 'SCRAPER_DEDUP', True):
+        return list_of_ads
+
+    mileage_bucket = getattr(settings, 'SCRAPER_DEDUP_MILEAGE_BUCKET', DEFAULT_MILEAGE_BUCKET)
+    tolerances = {
+        'mileage': getattr(settings, 'SCRAPER_DEDUP_MILEAGE_TOLERANCE', DEFAULT_MILEAGE_TOLERANCE),
+        'price': getattr(settings, 'SCRAPER_DEDUP_PRICE_TOLERANCE', DEFAULT_PRICE_TOLERANCE),
+        'title': getattr(settings, 'SCRAPER_DEDUP_TITLE_SIMILARITY', DEFAULT_TITLE_SIMILARITY),
+    }
+
+    pairs = find_duplicate_pairs(list_of_ads, mileage_bucket, tolerances)
+
+    # Union-find over the confirmed pairs, keeping the portals of every group
+    parent = list(range(len(list_of_ads)))
+    portals = {}
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for _, index, other_index in sorted(pairs, reverse=True):
+        root, other_root = find(index), find(other_index)
+        root_portals = portals.get(root, get_portals(list_of_ads[index]))
+        other_portals = portals.get(other_root, get_portals(list_of_ads[other_index]))
+
+        if root == other_root or root_portals & other_portals:
+            continue
+
+        parent[other_root] = root
+        portals[root] = root_portals | other_portals
+
+    groups = defaultdict(list)
+
+    for index, ad in enumerate(list_of_ads):
+        groups[find(index)].append(ad)
+
+    deduplicated = []
+    seen_roots = set()
+
+    for index in range(len(list_of_ads)):
+        root = find(index)
+
+        if root in seen_roots:
+            continue
+
+        seen_roots.add(root)
+        group = groups[root]
+        deduplicated.append(group[0] if len(group) == 1 else merge_ads(group))
+
+    logging.info(
+        f"Merged {len(list_of_ads) - len(deduplicated)} duplicate ads of {len(list_of_ads)} "
+        f"after comparing {len(pairs)} confirmed pairs."
+    )
+
+    return deduplicated
@@ -0,0 +1,300 @@
+# Standard Library Imports
+import re
+import json
+
+# Third-Party Library Imports
+from django.conf import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Local Imports
+from allcaradshub_app.extraction import strip_units, to_float, to_int, to_text
+
+# Where the fields of offer subpages are read from when SCRAPER_EXTRACTION is not configured in settings.py:
+# the JSON data embedded in the page, or the elements of the page
+DEFAULT_EXTRACTION = 'embedded'
+EXTRACTION_MODES = ('embedded', 'dom')
+
+# Scripts holding the embedded data, found in the raw HTML without parsing the page
+JSON_LD_SCRIPT = re.compile(r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S | re.I)
+NEXT_DATA_SCRIPT = re.compile(r'<script[^>]*id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S | re.I)
+
+# schema.org types describing the car of an offer
+VEHICLE_TYPES = ('Car', 'Vehicle', 'Product')
+
+# Fields every offer must have: a page whose embedded data lacks one is read from its elements instead, and an
+# offer whose elements lack one is dropped
+REQUIRED_FIELDS = ('tytul_value', 'cena_value', 'waluta_value', 'rok_produkcji_value', 'przebieg_value')
+
+# Conditions of schema.org offers as shown by the portals
+CONDITIONS = {
+    'UsedCondition': 'Używany',
+    'NewCondition': 'Nowy',
+    'DamagedCondition': 'Uszkodzony',
+}
+
+
+def get_extraction_mode():
+    """
+    Returns where the fields of offer subpages are read from, configured with SCRAPER_EXTRACTION.
+
+    Returns:
+        str: 'embedded' to read the JSON data embedded in the pages, falling back to the elements of
+            the page when it is missing or incomplete, or 'dom' to always read the elements.
+    """
+    return getattr(settings, 'SCRAPER_EXTRACTION', DEFAULT_EXTRACTION)
+
+
+def loads(text):
+    """
+    Decodes JSON with orjson when it is installed, or the standard library otherwise.
+
+    Parameters:
+        text (str): JSON document.
+
+    Returns:
+        The decoded value.
+
+    Raises:
+        ValueError: If the document is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+
+    return json.loads(text)
+
+
+def find_json_ld(html):
+    """
+    Finds and decodes the JSON-LD objects embedded in a page.
+
+    Lists and @graph containers are flattened, and scripts that are not valid JSON are skipped.
+
+    Parameters:
+        html (str): HTML of the page.
+
+    Returns:
+        list of dict: Decoded objects in the order they appear.
+    """
+    objects = []
+
+    for match in JSON_LD_SCRIPT.finditer(html):
+        try:
+            data = loads(match.group(1).strip())
+        except ValueError:
+            continue
+
+        pending = data if isinstance(data, list) else [data]
+
+        for item in pending:
+            if isinstance(item, dict):
+                objects.append(item)
+                objects.extend(node for node in item.get('@graph') or [] if isinstance(node, dict))
+
+    return objects
+
+
+def find_next_data(html):
+    """
+    Finds and decodes the data a Next.js page is rendered from.
+
+    Parameters:
+        html (str): HTML of the page.
+
+    Returns:
+        dict or None: Decoded __NEXT_DATA__ object, or None if the page has none.
+    """
+    match = NEXT_DATA_SCRIPT.search(html)
+
+    if match is None:
+        return None
+
+    try:
+        data = loads(match.group(1).strip())
+    except ValueError:
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+def find_vehicle(objects):
+    """
+    Returns the JSON-LD object describing the car of an offer.
+
+    Parameters:
+        objects (list of dict): Objects returned by find_json_ld.
+
+    Returns:
+        dict or None: First object of one of VEHICLE_TYPES with an offer, or None.
+    """
+    for item in objects:
+        types = item.get('@type')
+        types = types if isinstance(types, list) else [types]
+
+        if any(vehicle_type in types for vehicle_type in VEHICLE_TYPES) and item.get('offers'):
+            return item
+
+    return None
+
+
+def get_path(data, path):
+    """
+    Returns the value found by following a path of keys through nested objects.
+
+    Lists on the way are replaced by their first item.
+
+    Parameters:
+        data (dict): Decoded JSON object.
+        path (tuple of str): Keys to follow.
+
+    Returns:
+        The value, or None if a key is missing.
+    """
+    for key in path:
+        if isinstance(data, list):
+            data = data[0] if data else None
+
+        if not isinstance(data, dict):
+            return None
+
+        data = data.get(key)
+
+    if isinstance(data, list):
+        data = data[0] if data else None
+
+    return data
+
+
+def to_year(text):
+    """
+    Converts a date or a year to the year.
+
+    Parameters:
+        text (str): Text such as '2015' or '2015-03-01'.
+
+    Returns:
+        int: The year.
+
+    Raises:
+        ValueError: If the text does not start with a year.
+    """
+    return int(text.strip()[:4])
+
+
+def to_condition(text):
+    """
+    Converts a schema.org item condition to the condition shown by the portals.
+
+    Parameters:
+        text (str): Condition such as 'https://schema.org/UsedCondition'.
+
+    Returns:
+        str: Condition such as 'Używany', or the text itself if it is unknown.
+    """
+    name = text.rstrip('/').rsplit('/', 1)[-1]
+    return CONDITIONS.get(name, name)
+
+
+def compile_json_fields(fields):
+    """
+    Compiles the spec of the fields read from embedded JSON data.
+
+    Parameters:
+        fields (list of tuple): Target key, one or more paths of keys (see get_path) tried in order,
+            and converter of every field.
+
+    Returns:
+        list of tuple: Target key, tuple of paths and converter of every field.
+    """
+    return [
+        (key, paths if isinstance(paths[0], tuple) else (paths,), convert)
+        for key, paths, convert in fields
+    ]
+
+
+def extract_json_fields(data, fields, ad):
+    """
+    Extracts fields from embedded JSON data into an ad.
+
+    Fields that are missing or whose value cannot be converted are left as they are.
+
+    Parameters:
+        data (dict): Decoded JSON object.
+        fields (list of tuple): Fields compiled by compile_json_fields.
+        ad (dict): Ad the values are stored in.
+    """
+    for key, paths, convert in fields:
+        for path in paths:
+            value = get_path(data, path)
+
+            if value is None or isinstance(value, (dict, list, bool)):
+                continue
+
+            try:
+                ad[key] = convert(str(value).strip())
+                break
+            except ValueError:
+                continue
+
+
+def is_complete(ad):
+    """
+    Checks whether an ad read from an offer subpage has every field of REQUIRED_FIELDS.
+
+    Parameters:
+        ad (dict): Ad to check.
+
+    Returns:
+        bool: True if none of the required fields is None.
+    """
+    return all(ad.get(key) is not None for key in REQUIRED_FIELDS)
+
+
+# Fields of a schema.org Car (target key, paths of keys, converter), the way both portals describe their offers
+JSON_LD_FIELDS = compile_json_fields([
+    ('tytul_value', ('name',), to_text),
+    ('marka_value', (('brand', 'name'), ('brand',), ('manufacturer', 'name')), to_text),
+    ('model_value', (('model', 'name'), ('model',)), to_text),
+    ('cena_value', (('offers', 'price'), ('offers', 'priceSpecification', 'price')), to_float),
+    ('waluta_value', (('offers', 'priceCurrency'), ('offers', 'priceSpecification', 'priceCurrency')), to_text),
+    ('rok_produkcji_value', (('vehicleModelDate',), ('productionDate',), ('modelDate',)), to_year),
+    ('przebieg_value', (('mileageFromOdometer', 'value'), ('mileageFromOdometer',)), to_int),
+    (
+        'pojemnosc_value',
+        (('vehicleEngine', 'engineDisplacement', 'value'), ('vehicleEngine', 'engineDisplacement')),
+        strip_units('cm3', 'CMQ', convert=to_int),
+    ),
+    ('moc_value', (('vehicleEngine', 'enginePower', 'value'), ('vehicleEngine', 'enginePower')), to_int),
+    ('typ_nadwozia_value', ('bodyType',), to_text),
+    ('liczba_drzwi_value', ('numberOfDoors',), to_int),
+    ('liczba_miejsc_value', (('vehicleSeatingCapacity',), ('seatingCapacity',)), to_int),
+    ('kolor_value', ('color',), to_text),
+    ('stan_value', (('itemCondition',), ('offers', 'itemCondition')), to_condition),
+    ('lokalizacja_value', (
+        ('offers', 'availableAtOrFrom', 'address', 'addressLocality'),
+        ('offers', 'seller', 'address', 'addressLocality'),
+    ), to_text),
+])
+
+
+def extract_json_ld(html, ad):
+    """
+    Extracts the fields of the schema.org Car embedded in a page into an ad.
+
+    Parameters:
+        html (str): HTML of the page.
+        ad (dict): Ad the values are stored in.
+
+    Returns:
+        bool: True if the page describes a car.
+    """
+    vehicle = find_vehicle(find_json_ld(html))
+
+    if vehicle is None:
+        return False
+
+    extract_json_fields(vehicle, JSON_LD_FIELDS, ad)
+    return True
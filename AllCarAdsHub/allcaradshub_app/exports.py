@@ -0,0 +1,320 @@
+# Standard Library Imports
+import io
+import csv
+import itertools
+
+# Third-Party Library Imports
+from django.conf import settings
+from django.db.models import F, Q
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Local Imports
+from allcaradshub_app.extraction import AD_KEYS
+from allcaradshub_app.models import Ad
+from allcaradshub_app.records import FLOAT_FIELDS, get_column_values
+from allcaradshub_app.results import (
+    EXACT_FILTER_FIELDS, get_range_limits, get_result_set, get_sort, select_rows,
+)
+from allcaradshub_app.store import AD_FIELDS, INTEGER_FIELDS
+
+# Number of ads converted and sent at a time, one row group of a Parquet file, used when
+# SCRAPER_EXPORT_CHUNK_SIZE is not configured in settings.py
+DEFAULT_EXPORT_CHUNK_SIZE = 5000
+
+# Formats of the exports: content type and file extension
+FORMAT_CSV = 'csv'
+FORMAT_PARQUET = 'parquet'
+EXPORT_FORMATS = {
+    FORMAT_CSV: ('text/csv; charset=utf-8', 'csv'),
+    FORMAT_PARQUET: ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def get_chunk_size():
+    """
+    Returns the number of ads converted and sent at a time, configured with SCRAPER_EXPORT_CHUNK_SIZE.
+
+    Returns:
+        int: Number of ads per chunk.
+    """
+    return getattr(settings, 'SCRAPER_EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE)
+
+
+def get_export_format(query):
+    """
+    Reads the format of an export from the query parameters.
+
+    Parameters:
+        query (QueryDict): Query parameters of the request, 'format' being 'csv' (the default) or 'parquet'.
+
+    Returns:
+        str: Format of the export.
+
+    Raises:
+        ValueError: If the format is unknown, or is Parquet and pyarrow is not installed.
+    """
+    export_format = query.get('format') or FORMAT_CSV
+
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Cannot export as {export_format}. Choose one of: {', '.join(EXPORT_FORMATS)}.")
+
+    if export_format == FORMAT_PARQUET and pa is None:
+        raise ValueError('Parquet exports need the pyarrow package, export as csv instead.')
+
+    return export_format
+
+
+def iter_table_chunks(table, rows):
+    """
+    Yields the ads of a result set chunk by chunk, each chunk converted column by column.
+
+    Parameters:
+        table (dict): Table of the result set, built by build_table.
+        rows (np.ndarray): Positions of the ads to export, in order.
+
+    Yields:
+        list of list: Values of every field of AD_FIELDS for the ads of a chunk.
+    """
+    chunk_size = get_chunk_size()
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        yield [get_column_values(table, field, chunk) for field in AD_FIELDS]
+
+
+def iter_queryset_chunks(queryset):
+    """
+    Yields stored ads chunk by chunk, read with a database cursor so the query is never loaded whole.
+
+    Prices are converted to floats and empty texts to None, the way scraped ads hold them.
+
+    Parameters:
+        queryset (QuerySet): Ads to export.
+
+    Yields:
+        list of list: Values of every field of AD_FIELDS for the ads of a chunk.
+    """
+    chunk_size = get_chunk_size()
+    values = queryset.values_list(*AD_FIELDS).iterator(chunk_size=chunk_size)
+
+    while True:
+        batch = list(itertools.islice(values, chunk_size))
+
+        if not batch:
+            return
+
+        columns = []
+
+        for field, column in zip(AD_FIELDS, zip(*batch)):
+            if field in FLOAT_FIELDS:
+                column = [None if value is None else float(value) for value in column]
+            elif field not in INTEGER_FIELDS:
+                column = [value or None for value in column]
+
+            columns.append(list(column))
+
+        yield columns
+
+
+def write_csv(chunks):
+    """
+    Writes ads as CSV, yielding the text of every chunk as soon as it is written.
+
+    Parameters:
+        chunks (iterable of list): Columns of the ads, as yielded by iter_table_chunks.
+
+    Yields:
+        str: Header row, then the rows of every chunk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(AD_KEYS)
+
+    for columns in chunks:
+        writer.writerows(zip(*columns))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def get_parquet_schema():
+    """
+    Returns the schema of Parquet exports: the keys of the scraped ads with typed columns.
+
+    Returns:
+        pa.Schema: Float price, integer numeric fields and string text fields.
+    """
+    types = [
+        pa.float64() if field in FLOAT_FIELDS else pa.int64() if field in INTEGER_FIELDS else pa.string()
+        for field in AD_FIELDS
+    ]
+    return pa.schema(list(zip(AD_KEYS, types)))
+
+
+class ParquetSink(io.RawIOBase):
+    """
+    Output of a streamed Parquet file, whose bytes are taken out after every row group while its
+    position keeps counting all bytes written, as the footer of the file refers to it.
+    """
+    def __init__(self):
+        super().__init__()
+        self.pending = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.pending.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        """
+        Returns and forgets the bytes written since the last call.
+
+        Returns:
+            bytes: The written bytes.
+        """
+        data = b''.join(self.pending)
+        self.pending.clear()
+        return data
+
+
+def write_parquet(chunks):
+    """
+    Writes ads as a Parquet file, one row group per chunk, yielding every row group as soon as it is written.
+
+    Parameters:
+        chunks (iterable of list): Columns of the ads, as yielded by iter_table_chunks.
+
+    Yields:
+        bytes: Row groups of the file, then its footer.
+    """
+    schema = get_parquet_schema()
+    sink = ParquetSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    try:
+        for columns in chunks:
+            arrays = [pa.array(column, type=column_type) for column, column_type in zip(columns, schema.types)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+
+    yield sink.drain()
+
+
+def write_export(chunks, export_format):
+    """
+    Writes ads in the format of an export.
+
+    Parameters:
+        chunks (iterable of list): Columns of the ads, as yielded by iter_table_chunks.
+        export_format (str): 'csv' or 'parquet'.
+
+    Returns:
+        generator: Parts of the file, to be streamed.
+    """
+    if export_format == FORMAT_PARQUET:
+        return write_parquet(chunks)
+
+    return write_csv(chunks)
+
+
+def export_result_set(result_id, query):
+    """
+    Exports the ads of a stored result set, filtered and sorted like the results API.
+
+    Parameters:
+        result_id (str): ID of the result set.
+        query (QueryDict): Query parameters: 'format', 'sort', 'order' and the column filters of
+            results.get_results_page.
+
+    Returns:
+        tuple or None: Parts of the file and its format, or None if the result set expired.
+
+    Raises:
+        ValueError: If a query parameter is invalid.
+    """
+    export_format = get_export_format(query)
+    result_set = get_result_set(result_id)
+
+    if result_set is None:
+        return None
+
+    table = result_set['table']
+    rows = select_rows(table, query)
+
+    return write_export(iter_table_chunks(table, rows), export_format), export_format
+
+
+def get_stored_ads(query):
+    """
+    Selects the ads kept in the Ad model matching the column filters of the results API.
+
+    Parameters:
+        query (QueryDict): Query parameters: 'sort', 'order', range filters such as 'cena_min',
+            exact filters such as 'marka' or 'strona' and 'q' for text in the title.
+
+    Returns:
+        QuerySet: Matching ads, sorted by the field asked for with ads without a value at the end,
+            then in the order they were stored.
+
+    Raises:
+        ValueError: If a query parameter is invalid.
+    """
+    sort, descending = get_sort(query)
+    conditions = Q()
+
+    for field, suffix, limit in get_range_limits(query):
+        conditions &= Q(**{f"{field}__{'gte' if suffix == '_min' else 'lte'}": limit})
+
+    for field in EXACT_FILTER_FIELDS:
+        values = [value for value in query.getlist(field) if value]
+
+        if values:
+            conditions &= Q.create([(f'{field}__iexact', value) for value in values], connector=Q.OR)
+
+    text = query.get('q', '').strip()
+
+    if text:
+        conditions &= Q(tytul__icontains=text)
+
+    ordering = ['pk']
+
+    if sort:
+        ordering.insert(0, F(sort).desc(nulls_last=True) if descending else F(sort).asc(nulls_last=True))
+
+    return Ad.objects.filter(conditions).order_by(*ordering)
+
+
+def export_stored_ads(query):
+    """
+    Exports the ads kept in the Ad model, which outlive the cached result sets.
+
+    Parameters:
+        query (QueryDict): Query parameters: 'format' and those of get_stored_ads.
+
+    Returns:
+        tuple: Parts of the file and its format.
+
+    Raises:
+        ValueError: If a query parameter is invalid.
+    """
+    export_format = get_export_format(query)
+    queryset = get_stored_ads(query)
+
+    return write_export(iter_queryset_chunks(queryset), export_format), export_format
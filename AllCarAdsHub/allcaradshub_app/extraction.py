@@ -0,0 +1,261 @@
+# Standard Library Imports
+import re
+import logging
+
+# Characters kept by the numeric converters: digits, separators and the sign
+NON_NUMERIC = re.compile(r'[^\d,.\-]')
+
+# Keys of every ad scraped from an offer subpage, in the order they are shown
+AD_KEYS = (
+    'marka_value', 'model_value', 'cena_value', 'waluta_value', 'rok_produkcji_value', 'przebieg_value',
+    'pojemnosc_value', 'moc_value', 'typ_nadwozia_value', 'liczba_drzwi_value', 'liczba_miejsc_value',
+    'kolor_value', 'kraj_pochodzenia_value', 'zarejestrowany_w_polsce_value', 'stan_value',
+    'lokalizacja_value', 'tytul_value', 'url_value', 'strona_value',
+)
+
+
+def new_ad(brand, model, url, portal):
+    """
+    Creates an ad with every field set to None but those known before the subpage is read.
+
+    Parameters:
+        brand (str): Brand searched for.
+        model (str): Model searched for.
+        url (str): URL of the offer subpage.
+        portal (str): Name of the portal.
+
+    Returns:
+        dict: Ad keyed by AD_KEYS.
+    """
+    ad = dict.fromkeys(AD_KEYS)
+    ad.update(marka_value=brand, model_value=model, url_value=url, strona_value=portal)
+    return ad
+
+
+def to_text(text):
+    """
+    Returns the text of a field as it is.
+
+    Parameters:
+        text (str): Stripped text of the element holding the value.
+
+    Returns:
+        str: The same text.
+    """
+    return text
+
+
+def to_float(text):
+    """
+    Converts the text of a numeric field with spaces, units and a decimal comma to a float.
+
+    Parameters:
+        text (str): Text such as '120 000 km', '150 KM' or '49 900,50 zł'.
+
+    Returns:
+        float: The number.
+
+    Raises:
+        ValueError: If the text holds no number.
+    """
+    return float(NON_NUMERIC.sub('', text).replace(',', '.'))
+
+
+def to_int(text):
+    """
+    Converts the text of a numeric field to an integer.
+
+    Parameters:
+        text (str): Text such as '2015'.
+
+    Returns:
+        int: The number, with any fractional part dropped.
+
+    Raises:
+        ValueError: If the text holds no number.
+    """
+    return int(to_float(text))
+
+
+def strip_units(*units, convert=to_text):
+    """
+    Creates a converter removing spaces and units from the text of a field before converting it.
+
+    Units are removed first so that digits within them, such as the 3 of 'cm3', are not read as
+    part of the number.
+
+    Parameters:
+        *units (str): Units to remove (e.g., 'cm3').
+        convert (callable, optional): Converter of the remaining text, such as to_int. The text is
+            kept a string by default.
+
+    Returns:
+        callable: The converter.
+    """
+    def strip(text):
+        for unit in units:
+            text = text.replace(unit, '')
+
+        return convert(text.replace(' ', ''))
+
+    return strip
+
+
+def make_selector(selector):
+    """
+    Creates a function finding the element holding a field's value.
+
+    Parameters:
+        selector (tuple or callable): Tag name and CSS class of the element (None matches any class),
+            or a function taking the element to search in and returning the element or None.
+
+    Returns:
+        callable: Function taking the element to search in.
+    """
+    if callable(selector):
+        return selector
+
+    tag, class_name = selector
+
+    if class_name is None:
+        return lambda element: element.find(tag)
+
+    return lambda element: element.find(tag, class_=class_name)
+
+
+def compile_page_fields(fields):
+    """
+    Compiles the spec of the fields found once per page, such as the title or the price.
+
+    Parameters:
+        fields (list of tuple): Target key, selector (see make_selector) and converter of every field.
+
+    Returns:
+        list of tuple: Target key, selector function and converter of every field.
+    """
+    return [(key, make_selector(selector), convert) for key, selector, convert in fields]
+
+
+def compile_labelled_fields(fields):
+    """
+    Compiles the spec of the fields listed as label and value pairs into a dispatch table.
+
+    Parameters:
+        fields (list of tuple): Label shown on the page, target key, selector of the value within the
+            labelled item (see make_selector) and converter of every field.
+
+    Returns:
+        dict: Target key, selector function and converter of every field by its label.
+    """
+    return {label: (key, make_selector(selector), convert) for label, key, selector, convert in fields}
+
+
+def extract_page_fields(soup, fields, ad):
+    """
+    Extracts the fields found once per page into an ad.
+
+    Fields whose element is missing or whose value cannot be converted are left as they are.
+
+    Parameters:
+        soup (BeautifulSoup): Parsed page.
+        fields (list of tuple): Fields compiled by compile_page_fields.
+        ad (dict): Ad the values are stored in.
+
+    Returns:
+        list of str: Keys of the fields that could not be extracted.
+    """
+    missing = []
+
+    for key, select, convert in fields:
+        element = select(soup)
+
+        if element is None:
+            missing.append(key)
+            continue
+
+        try:
+            ad[key] = convert(element.get_text().strip())
+        except ValueError:
+            missing.append(key)
+
+    return missing
+
+
+def extract_labelled_fields(items, get_label, fields, ad):
+    """
+    Extracts the fields listed as label and value pairs into an ad in a single pass over the items.
+
+    Every item is looked up by its label in the dispatch table, so a page costs one lookup per item
+    instead of one comparison per item and field, and items of unknown labels are skipped.
+
+    Parameters:
+        items (iterable of Tag): Elements holding a label and a value each.
+        get_label (callable): Function taking an item and returning its label, or None.
+        fields (dict): Dispatch table compiled by compile_labelled_fields.
+        ad (dict): Ad the values are stored in.
+
+    Returns:
+        list of str: Keys of the fields that could not be extracted, including those never listed.
+    """
+    found = set()
+
+    for item in items:
+        field = fields.get(get_label(item))
+
+        if field is None:
+            continue
+
+        key, select, convert = field
+        element = select(item)
+
+        if element is None:
+            continue
+
+        try:
+            ad[key] = convert(element.get_text().strip())
+            found.add(key)
+        except ValueError:
+            continue
+
+    return [key for key, _, _ in fields.values() if key not in found]
+
+
+def extract_labelled_values(pairs, fields, ad):
+    """
+    Extracts the fields listed as label and value pairs of embedded data into an ad.
+
+    Uses the same dispatch table as extract_labelled_fields, so the labels of a portal are declared
+    once whether its pages are read from their elements or from their embedded data.
+
+    Parameters:
+        pairs (iterable of tuple): Label and value of every listed field.
+        fields (dict): Dispatch table compiled by compile_labelled_fields.
+        ad (dict): Ad the values are stored in.
+    """
+    for label, value in pairs:
+        field = fields.get(label)
+
+        if field is None or value is None or isinstance(value, (dict, list, bool)):
+            continue
+
+        key, _, convert = field
+
+        try:
+            ad[key] = convert(str(value).strip())
+        except ValueError:
+            continue
+
+
+def log_missing_fields(portal, url, missing):
+    """
+    Logs the fields that could not be extracted from an offer subpage, once per page.
+
+    Parameters:
+        portal (str): Name of the portal.
+        url (str): URL of the offer subpage.
+        missing (list of str): Keys of the missing fields.
+    """
+    logger = logging.getLogger(__name__)
+
+    if missing and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Fields {', '.join(missing)} not found on {portal} subpage {url}")
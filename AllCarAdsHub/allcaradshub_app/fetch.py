@@ -0,0 +1,233 @@
+# Standard Library Imports
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from urllib.parse import urlsplit, urlunsplit
+
+# Third-Party Library Imports
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+
+# Local Imports
+from allcaradshub_app.metrics import bind_context, increment
+from allcaradshub_app.ratelimit import report_response, wait_for_turn
+from allcaradshub_app.resilience import (
+    abandon_request, allow_request, get_backoff, get_retries, record_outcome, should_retry,
+)
+
+# Defaults used when the values are not configured in settings.py
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUEST_TIMEOUT = 15
+
+# One keep-alive session per portal, shared by every search running in this process
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_max_workers():
+    """
+    Returns the number of offer subpages that are downloaded and parsed at the same time.
+
+    Returns:
+        int: Size of the worker pool used by scrape_concurrently.
+    """
+    return getattr(settings, 'SCRAPER_MAX_WORKERS', DEFAULT_MAX_WORKERS)
+
+
+def get_session(portal):
+    """
+    Returns the keep-alive HTTP session used for all requests to a portal.
+
+    The session is created on first use and its connection pool is sized to the worker pool,
+    so concurrent subpage downloads reuse open connections instead of opening a new one each time.
+
+    Parameters:
+        portal (str): Name of the portal (e.g., 'gratka', 'otomoto').
+
+    Returns:
+        requests.Session: Session shared by all threads scraping the portal.
+    """
+    with _sessions_lock:
+        session = _sessions.get(portal)
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=get_max_workers())
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[portal] = session
+
+    return session
+
+
+def resolve_url(url):
+    """
+    Redirects a URL to the server configured for its host in SCRAPER_HOST_OVERRIDES.
+
+    Used to point the scrapers at a local server replaying recorded pages, e.g.
+    {'gratka.pl': 'http://127.0.0.1:8001'}. Only the scheme and host are replaced.
+
+    Parameters:
+        url (str): URL of a page.
+
+    Returns:
+        str: URL to send the request to.
+    """
+    overrides = getattr(settings, 'SCRAPER_HOST_OVERRIDES', None)
+
+    if not overrides:
+        return url
+
+    parts = urlsplit(url)
+    override = overrides.get(parts.netloc)
+
+    if override is None:
+        return url
+
+    target = urlsplit(override)
+    return urlunsplit((target.scheme, target.netloc, parts.path, parts.query, parts.fragment))
+
+
+def wait_to_retry(attempt, deadline=None):
+    """
+    Sleeps for the backoff before retrying a failed request, never past the deadline of the search.
+
+    Parameters:
+        attempt (int): Number of the failed attempt, starting from 0.
+        deadline (float, optional): time.monotonic() value after which no request is retried.
+
+    Returns:
+        bool: True if the request may be retried, False if the deadline passed.
+    """
+    delay = get_backoff(attempt)
+
+    if deadline is not None:
+        delay = min(delay, deadline - time.monotonic())
+
+    if delay > 0:
+        time.sleep(delay)
+
+    return not deadline_reached(deadline)
+
+
+def fetch(url, portal, headers=None, deadline=None):
+    """
+    Downloads a page through the portal's shared session.
+
+    The request waits for the rate limit of its host, and its status code adapts that rate limit,
+    so every thread scraping a host shares one request rate. Connection errors, timeouts and
+    transient error responses are retried up to SCRAPER_RETRIES times with exponential backoff, and
+    every attempt is recorded by the portal's circuit breaker. No request is retried once the
+    deadline passes, so a worker does not outlive the search it serves.
+
+    Parameters:
+        url (str): URL of the page.
+        portal (str): Name of the portal the URL belongs to.
+        headers (dict, optional): Extra request headers (e.g., of a conditional request).
+        deadline (float, optional): time.monotonic() value after which no request is retried.
+
+    Returns:
+        requests.Response: Response of the last attempt.
+
+    Raises:
+        PortalUnavailableError: If the circuit breaker of the portal is open.
+        requests.RequestException: If the last attempt failed without a response.
+    """
+    timeout = getattr(settings, 'SCRAPER_REQUEST_TIMEOUT', DEFAULT_REQUEST_TIMEOUT)
+    retries = get_retries()
+    url = resolve_url(url)
+
+    for attempt in range(retries + 1):
+        allow_request(portal)
+
+        try:
+            wait_for_turn(url)
+            response = get_session(portal).get(url, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            record_outcome(portal, False)
+            increment('scraper_responses_total', portal=portal, status='error')
+
+            if attempt == retries or not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                raise
+
+            logging.warning(f"Request to {url} failed ({e}), retrying.")
+
+            if not wait_to_retry(attempt, deadline):
+                raise
+
+            continue
+        except BaseException:
+            # An interrupted trial request reopens the circuit breaker instead of blocking the portal for good
+            abandon_request(portal)
+            raise
+
+        report_response(url, response.status_code, response.headers)
+        record_outcome(portal, not should_retry(response.status_code))
+        increment('scraper_responses_total', portal=portal, status=str(response.status_code))
+
+        if attempt == retries or not should_retry(response.status_code):
+            return response
+
+        logging.warning(f"Request to {url} answered {response.status_code}, retrying.")
+
+        if not wait_to_retry(attempt, deadline):
+            return response
+
+
+def scrape_concurrently(scrape, urls, deadline=None, on_result=None):
+    """
+    Runs a scraping function for every URL on a bounded pool of worker threads.
+
+    Parameters:
+        scrape (callable): Function taking a single URL and returning a result or None.
+        urls (list of str): URLs to scrape.
+        deadline (float, optional): time.monotonic() value after which pending URLs are dropped.
+        on_result (callable, optional): Called with every result that is not None as soon as it is ready.
+
+    Returns:
+        list: Results that are not None, in the same order as the URLs.
+    """
+    if not urls:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=min(get_max_workers(), len(urls)))
+    futures = {executor.submit(bind_context(scrape), url): index for index, url in enumerate(urls)}
+    results = {}
+
+    try:
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+
+        for future in as_completed(futures, timeout=timeout):
+            result = future.result()
+
+            if result is not None:
+                results[futures[future]] = result
+
+                if on_result is not None:
+                    on_result(result)
+
+    except TimeoutError:
+        logging.warning(f"Deadline reached, skipping {len(urls) - len(results)} remaining subpages.")
+
+    finally:
+        # Drop the subpages that did not start yet, the running ones finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logging.info(f"Scraped {len(urls)} subpages concurrently.")
+
+    return [results[index] for index in sorted(results)]
+
+
+def deadline_reached(deadline):
+    """
+    Checks whether a scraping deadline has passed.
+
+    Parameters:
+        deadline (float or None): time.monotonic() value of the deadline, None if there is no deadline.
+
+    Returns:
+        bool: True if the deadline is set and has passed, else False.
+    """
+    return deadline is not None and time.monotonic() >= deadline
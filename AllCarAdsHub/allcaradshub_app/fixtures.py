@@ -0,0 +1,226 @@
+# Standard Library Imports
+import os
+import json
+import time
+import random
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+# Third-Party Library Imports
+import requests
+
+# Local Imports
+from allcaradshub_app.fetch import fetch
+from allcaradshub_app.portals import PORTALS
+
+# Files of a fixtures directory: the search form data of the recording, and the index of every
+# portal's subdirectory mapping the path of every recorded page to its file
+SEARCH_FILE = 'search.json'
+INDEX_FILE = 'index.json'
+
+# Sanitized pages of both portals shipped with the app, replayed by benchmark_scrapers and the tests
+# when no other fixtures directory is given
+DEFAULT_FIXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixture_pages')
+
+
+def get_fixture_key(url):
+    """
+    Returns the key a recorded page is found by: the path and query of its URL as sent on the wire.
+
+    Parameters:
+        url (str): URL of the page, or the path and query of a request.
+
+    Returns:
+        str: Unquoted path and query, so differently encoded requests of the same page match.
+    """
+    if url.startswith('/'):
+        return unquote(url)
+
+    return unquote(requests.Request('GET', url).prepare().path_url)
+
+
+def record_fixtures(directory, data, max_pages=None, max_offers=None):
+    """
+    Downloads the pages of a live search into a fixtures directory.
+
+    For every portal, the pages with search results and the offer subpages they link to are saved
+    as they were received, with an index mapping their paths to the files.
+
+    Parameters:
+        directory (str): Directory the fixtures are written to.
+        data (dict): Search form data.
+        max_pages (int, optional): Largest number of pages with search results recorded per portal.
+        max_offers (int, optional): Largest number of offer subpages recorded per portal.
+
+    Returns:
+        dict: Number of pages with search results and offer subpages recorded for every portal.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, SEARCH_FILE), 'w', encoding='utf-8') as search_file:
+        json.dump(data, search_file, indent=2)
+
+    recorded = {}
+
+    for name, portal in PORTALS.items():
+        portal_module = portal['module']
+        params = portal['get_params'](data)
+        portal_directory = os.path.join(directory, name)
+        os.makedirs(portal_directory, exist_ok=True)
+        index = {'host': None, 'pages': {}}
+        subpage_urls = []
+
+        def save(url, response, file_name):
+            with open(os.path.join(portal_directory, file_name), 'w', encoding='utf-8') as page_file:
+                page_file.write(response.text)
+
+            index['host'] = urlsplit(url).netloc
+            index['pages'][get_fixture_key(url)] = file_name
+
+        page_num = 1
+        max_page = 1
+
+        while page_num <= max_page and (max_pages is None or page_num <= max_pages):
+            url = portal_module.build_main_page_url(**params, page_num=page_num)
+            response = fetch(url, name)
+
+            if response.status_code != 200:
+                logging.error(f"Failed to record page {page_num} of {name}. Status code: {response.status_code}")
+                break
+
+            save(url, response, f'main_{page_num}.html')
+            max_page, page_subpage_urls, _ = portal_module.parse_main_page(response.text)
+            subpage_urls.extend(subpage_url for subpage_url in page_subpage_urls if subpage_url not in subpage_urls)
+            page_num += 1
+
+        main_pages = len(index['pages'])
+
+        for offer_num, subpage_url in enumerate(subpage_urls[:max_offers], start=1):
+            response = fetch(subpage_url, name)
+
+            if response.status_code == 200:
+                save(subpage_url, response, f'offer_{offer_num}.html')
+
+        with open(os.path.join(portal_directory, INDEX_FILE), 'w', encoding='utf-8') as index_file:
+            json.dump(index, index_file, indent=2)
+
+        recorded[name] = {'main_pages': main_pages, 'offers': len(index['pages']) - main_pages}
+        logging.info(f"Recorded {recorded[name]} pages of {name}.")
+
+    return recorded
+
+
+def load_search(directory):
+    """
+    Reads the search form data a fixtures directory was recorded with.
+
+    Parameters:
+        directory (str): Fixtures directory.
+
+    Returns:
+        dict: Search form data.
+    """
+    with open(os.path.join(directory, SEARCH_FILE), encoding='utf-8') as search_file:
+        return json.load(search_file)
+
+
+def load_fixtures(directory, portal):
+    """
+    Reads the recorded pages of a portal.
+
+    Parameters:
+        directory (str): Fixtures directory.
+        portal (str): Name of the portal.
+
+    Returns:
+        dict: 'host' the pages were recorded from, 'pages', mapping the key of every page to its body
+            in bytes, and 'main_pages', the set of keys of the pages with search results, or None if
+            the portal has no fixtures.
+    """
+    portal_directory = os.path.join(directory, portal)
+    index_path = os.path.join(portal_directory, INDEX_FILE)
+
+    if not os.path.exists(index_path):
+        return None
+
+    with open(index_path, encoding='utf-8') as index_file:
+        index = json.load(index_file)
+
+    pages = {}
+    main_pages = set()
+
+    for key, file_name in index['pages'].items():
+        with open(os.path.join(portal_directory, file_name), 'rb') as page_file:
+            pages[key] = page_file.read()
+
+        if file_name.startswith('main_'):
+            main_pages.add(key)
+
+    return {'host': index['host'], 'pages': pages, 'main_pages': main_pages}
+
+
+def start_fixture_server(pages, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+    """
+    Starts a local HTTP server replaying recorded pages in a background thread.
+
+    Every response is delayed by latency seconds, varied by up to jitter seconds either way, and a
+    share of error_rate requests is answered with 503 instead of the page. Pages that were not
+    recorded are answered with 404.
+
+    Parameters:
+        pages (dict): Bodies of the recorded pages by their keys, as returned by load_fixtures.
+        latency (float, optional): Mean delay of a response in seconds.
+        jitter (float, optional): Largest deviation from the mean delay in seconds.
+        error_rate (float, optional): Probability of answering a request with 503.
+        seed (int, optional): Seed of the random delays and errors, so runs are reproducible.
+
+    Returns:
+        tuple: The server (stop it with shutdown()), its base URL, and a dictionary of counters of
+            the 'requests', 'errors' and 'not_found' responses and the 'bytes' sent.
+    """
+    stats = {'requests': 0, 'errors': 0, 'not_found': 0, 'bytes': 0}
+    stats_lock = threading.Lock()
+    rng = random.Random(seed)
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            with stats_lock:
+                delay = max(0.0, latency + rng.uniform(-jitter, jitter))
+                failed = rng.random() < error_rate
+                stats['requests'] += 1
+
+            if delay:
+                time.sleep(delay)
+
+            body = pages.get(get_fixture_key(self.path))
+
+            if failed or body is None:
+                with stats_lock:
+                    stats['errors' if failed else 'not_found'] += 1
+
+                self.send_response(503 if failed else 404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            with stats_lock:
+                stats['bytes'] += len(body)
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fixture-server', daemon=True).start()
+
+    return server, f'http://127.0.0.1:{server.server_port}', stats
@@ -1,99 +1,268 @@
 # Standard Library Imports
-import time
-import random
+import re
 import logging
 
-# Third-Party Library Imports
-from bs4 import BeautifulSoup
-import pandas as pd
-import requests
+# Local Imports
+from allcaradshub_app.crawler import crawl, refresh_listing_card, use_listing_card
+from allcaradshub_app.embedded import extract_json_ld, get_extraction_mode, is_complete
+from allcaradshub_app.extraction import (
+    compile_labelled_fields, compile_page_fields, extract_labelled_fields, extract_page_fields,
+    log_missing_fields, new_ad, strip_units, to_float, to_int, to_text,
+)
+from allcaradshub_app.fetch import fetch
+from allcaradshub_app.metrics import increment, timed
+from allcaradshub_app.offer_cache import lookup_offer, revalidate_offer, store_offer
+from allcaradshub_app.parsers import get_card_fingerprint, has_class, make_soup, make_strainer
 
 # Configure logging settings (you can customize this based on your needs)
 logging.basicConfig(level=logging.INFO)
 
+# Name of the portal, used as the value of 'strona_value' and as the key of the shared session
+PORTAL = 'gratka'
 
-def scrape_subpage(subpage_url, brand, model):
+# Query parameters sorting the search results, by the sort order of the search
+ORDERS = {
+    'price_asc': '&sortowanie=cena-calkowita:asc',
+}
+
+# Only the parts of the pages read by the parsers are built into the soup:
+# the offers counter, the pagination input and the listing on pages with search results,
+MAIN_PAGE_STRAINER = make_strainer(
+    lambda name, attrs: (name == 'span' and attrs.get('data-cy') == 'offersCount')
+    or (name == 'input' and attrs.get('aria-label') == 'Numer strony wyników')
+    or (name == 'div' and has_class(attrs, 'listing'))
+)
+
+# and the parameter list, the price and the title on offer subpages
+SUBPAGE_STRAINER = make_strainer(
+    lambda name, attrs: name == 'li'
+    or (name == 'h1' and has_class(attrs, 'sticker__title'))
+    or (name == 'span' and (has_class(attrs, 'priceInfo__value') or has_class(attrs, 'priceInfo__currency')))
+)
+
+
+def to_currency(text):
+    """
+    Converts the currency shown next to the price to its code.
+
+    Parameters:
+        text (str): Currency as shown on the page, such as 'zł'.
+
+    Returns:
+        str: Currency code, such as 'PLN'.
+    """
+    return text.replace(' ', '').replace('\n', '').replace('zł', 'PLN')
+
+
+def get_parameter_label(item):
+    """
+    Returns the label of an item of the parameter list, such as 'Rok produkcji'.
+
+    Parameters:
+        item (Tag): <li> element of the parameter list.
+
+    Returns:
+        str or None: Label of the item.
+    """
+    label = item.find('span')
+    return label.get_text(strip=True) if label else None
+
+
+# Fields extracted from every offer subpage: the ones shown once on the page (target key, element, converter)
+SUBPAGE_FIELDS = compile_page_fields([
+    ('cena_value', ('span', 'priceInfo__value'), to_float),
+    ('waluta_value', ('span', 'priceInfo__currency'), to_currency),
+    ('tytul_value', ('h1', 'sticker__title'), to_text),
+])
+
+# and the items of the parameter list (label, target key, element within the item, converter)
+SUBPAGE_PARAMETERS = compile_labelled_fields([
+    ('Rok produkcji', 'rok_produkcji_value', ('b', 'parameters__value'), to_int),
+    ('Przebieg', 'przebieg_value', ('b', 'parameters__value'), to_int),
+    ('Pojemność silnika [cm3]', 'pojemnosc_value', ('b', 'parameters__value'), strip_units('cm3', convert=to_int)),
+    ('Moc silnika', 'moc_value', ('b', 'parameters__value'), to_int),
+    ('Typ nadwozia', 'typ_nadwozia_value', ('b', 'parameters__value'), to_text),
+    ('Liczba drzwi', 'liczba_drzwi_value', ('b', 'parameters__value'), to_int),
+    ('Liczba miejsc', 'liczba_miejsc_value', ('b', 'parameters__value'), to_int),
+    ('Kolor', 'kolor_value', ('b', 'parameters__value'), to_text),
+    ('Kraj pierwszej rejestracji', 'kraj_pochodzenia_value', ('b', 'parameters__value'), to_text),
+    ('Zarejestrowany w Polsce', 'zarejestrowany_w_polsce_value', ('b', 'parameters__value'), to_text),
+    ('Stan pojazdu', 'stan_value', ('b', 'parameters__value'), to_text),
+    ('Lokalizacja', 'lokalizacja_value', ('b', 'parameters__value'), to_text),
+])
+
+
+def to_price_currency(text):
+    """
+    Converts the price shown on a listing card to the code of its currency.
+
+    Parameters:
+        text (str): Price such as '49 900 zł'.
+
+    Returns:
+        str: Currency code, such as 'PLN'.
+    """
+    return to_currency(re.sub(r'[\d\s,.]', '', text))
+
+
+def get_card_parameter_label(item):
+    """
+    Recognizes a parameter of a listing card, which are shown without labels, by its value.
+
+    Parameters:
+        item (Tag): <li> element of the parameter.
+
+    Returns:
+        str or None: 'year', 'mileage' or 'capacity', or None for other parameters.
+    """
+    text = item.get_text(strip=True)
+
+    if re.fullmatch(r'\d{4}', text):
+        return 'year'
+
+    if text.endswith('km'):
+        return 'mileage'
+
+    if text.endswith('cm3'):
+        return 'capacity'
+
+    return None
+
+
+# Fields of the listing cards on pages with search results (target key, element within the card, converter)
+CARD_FIELDS = compile_page_fields([
+    ('tytul_value', ('h2', None), to_text),
+    ('cena_value', ('p', 'teaserUnified__price'), to_float),
+    ('waluta_value', ('p', 'teaserUnified__price'), to_price_currency),
+    ('lokalizacja_value', ('span', 'teaserUnified__location'), to_text),
+])
+
+# and their parameters, recognized by get_card_parameter_label (label, target key, element, converter)
+CARD_PARAMETERS = compile_labelled_fields([
+    ('year', 'rok_produkcji_value', lambda item: item, to_int),
+    ('mileage', 'przebieg_value', lambda item: item, to_int),
+    ('capacity', 'pojemnosc_value', lambda item: item, strip_units('cm3', convert=to_int)),
+])
+
+
+def parse_embedded_subpage(subpage_html, subpage_url, brand, model):
+    """
+    Extracts detailed information from the schema.org Car embedded as JSON-LD in a car advertisement
+    subpage on Gratka.pl, without parsing the page.
+
+    Parameters:
+        subpage_html (str): HTML of the car advertisement subpage.
+        subpage_url (str): URL of the car advertisement subpage.
+
+    Returns:
+        dict or None: Dictionary with the keys returned by parse_subpage, or None if the page has no
+            embedded data or it lacks any of the required fields.
+    """
+    single_ad_dict = new_ad(brand, model, subpage_url, PORTAL)
+
+    with timed('parse', PORTAL):
+        if not extract_json_ld(subpage_html, single_ad_dict):
+            return None
+
+    return single_ad_dict if is_complete(single_ad_dict) else None
+
+
+def parse_subpage(subpage_html, subpage_url, brand, model):
+    """
+    Extracts detailed information from the HTML of a car advertisement subpage on Gratka.pl.
+
+    Parameters:
+        subpage_html (str): HTML of the car advertisement subpage.
+        subpage_url (str): URL of the car advertisement subpage.
+
+    Returns:
+        dict or None: Dictionary containing extracted parameters from the subpage, or None if the offer
+            lacks any of the fields of embedded.REQUIRED_FIELDS. Keys include 'marka_value',
+            'model_value', 'cena_value', 'waluta_value', 'rok_produkcji_value', 'przebieg_value',
+            'pojemnosc_value', 'moc_value', 'typ_nadwozia_value', 'liczba_drzwi_value',
+            'liczba_miejsc_value', 'kolor_value', 'kraj_pochodzenia_value',
+            'zarejestrowany_w_polsce_value', 'stan_value', 'lokalizacja_value', 'tytul_value',
+            'url_value', and 'strona_value'.
+    """
+    # Use a logger with the name of the current function
+    logger = logging.getLogger(__name__)
+
+    if get_extraction_mode() == 'embedded':
+        single_ad_dict = parse_embedded_subpage(subpage_html, subpage_url, brand, model)
+
+        if single_ad_dict is not None:
+            increment('scraper_extractions_total', portal=PORTAL, source='embedded')
+            logger.debug(single_ad_dict)
+            return single_ad_dict
+
+    increment('scraper_extractions_total', portal=PORTAL, source='dom')
+
+    # Parse the HTML of the current page
+    subpage_soup = make_soup(subpage_html, PORTAL, SUBPAGE_STRAINER)
+
+    single_ad_dict = new_ad(brand, model, subpage_url, PORTAL)
+    missing = extract_page_fields(subpage_soup, SUBPAGE_FIELDS, single_ad_dict)
+    missing += extract_labelled_fields(subpage_soup.find_all('li'), get_parameter_label, SUBPAGE_PARAMETERS, single_ad_dict)
+    log_missing_fields(PORTAL, subpage_url, missing)
+
+    # Log the resulting dictionary
+    logger.debug(single_ad_dict)
+
+    # Offers lacking a required field are dropped, whichever way they were read
+    if not is_complete(single_ad_dict):
+        logger.info(f"Offer {subpage_url} lacks a required field. Skipping it.")
+        return None
+
+    return single_ad_dict
+
+
+def scrape_subpage(subpage_url, brand, model, fingerprint=None, deadline=None):
     """
     Scrapes detailed information from a car advertisement subpage on Gratka.pl.
 
+    The subpage is downloaded once through the shared portal session and its body is handed
+    straight to parse_subpage. Offers found in the offer cache are not downloaded while they are
+    fresh or their listing card is unchanged, and are revalidated with a conditional request otherwise.
+
     Parameters:
         subpage_url (str): URL of the car advertisement subpage.
+        fingerprint (str, optional): Fingerprint of the offer's listing card.
+        deadline (float, optional): time.monotonic() value after which the request is not retried.
 
     Returns:
-        dict or None: Dictionary containing extracted parameters from the subpage if successful, else None.
-            Keys include 'marka_value', 'model_value', 'cena_value', 'waluta_value',
-            'rok_produkcji_value', 'przebieg_value', 'pojemnosc_value', 'moc_value',
-            'typ_nadwozia_value', 'liczba_drzwi_value', 'liczba_miejsc_value', 'kolor_value',
-            'kraj_pochodzenia_value', 'zarejestrowany_w_polsce_value', 'stan_value',
-            'lokalizacja_value', 'tytul_value', 'url_value', and 'strona_value'.
+        dict or None: Dictionary returned by parse_subpage if successful, else None.
     """
     # Use a logger with the name of the current function
     logger = logging.getLogger(__name__)
 
     try:
-        subpage_response = requests.get(subpage_url)
+        cached_ad, headers = lookup_offer(subpage_url, fingerprint)
+
+        if cached_ad is not None:
+            return cached_ad
+
+        with timed('offer_fetch', PORTAL):
+            subpage_response = fetch(subpage_url, PORTAL, headers=headers, deadline=deadline)
         logger.info(f"Scraping subpage: {subpage_url}")
 
+        # The offer did not change since it was cached
+        if subpage_response.status_code == 304:
+            cached_ad = revalidate_offer(subpage_url, fingerprint)
+
+            if cached_ad is not None:
+                return cached_ad
+
+            with timed('offer_fetch', PORTAL):
+                subpage_response = fetch(subpage_url, PORTAL, deadline=deadline)
+
         if subpage_response.status_code == 200:
-            # Parse the HTML of the current page
-            subpage_soup = BeautifulSoup(subpage_response.text, 'html.parser')
-
-            # Find all <li> elements with <span> and <b> inside
-            parameter_items = subpage_soup.find_all('li')
-
-            # Dictionary to store extracted parameters
-            parameters = {}
-
-            for item in parameter_items:
-                # Find <span> and <b> tags within each <li> element
-                span = item.find('span')
-                b = item.find('b', class_='parameters__value')
-
-                if span and b:
-                    # Extract parameter name and value
-                    parameter_name = span.get_text(strip=True)
-                    parameter_value = b.get_text(strip=True)
-
-                    # Store in the dictionary
-                    parameters[parameter_name] = parameter_value
-
-            single_ad_dict = {
-                "marka_value": brand,
-                "model_value": model,
-                "cena_value": float(subpage_soup.find('span', class_='priceInfo__value')
-                                    .text.strip()
-                                    .replace("\n", "")
-                                    .replace(" ", "")
-                                    .replace("zł", "")
-                                    .replace(",", ".")
-                                    ),
-                "waluta_value": subpage_soup.find('span', class_='priceInfo__currency').text.strip(' ')
-                .replace(" ", "")
-                .replace("\n", "")
-                .replace('zł', 'PLN'),
-                "rok_produkcji_value": int(parameters.get('Rok produkcji', None)),
-                "przebieg_value": float(parameters.get('Przebieg', None)),
-                "pojemnosc_value": parameters.get('Pojemność silnika [cm3]', None)
-                .replace(" ", "")
-                .replace("cm3", ""),
-                "moc_value": float(parameters.get('Moc silnika', None)),
-                "typ_nadwozia_value": parameters.get('Typ nadwozia', None),
-                "liczba_drzwi_value": parameters.get('Liczba drzwi', None),
-                "liczba_miejsc_value": parameters.get('Liczba miejsc', None),
-                "kolor_value": parameters.get('Kolor', None),
-                "kraj_pochodzenia_value": parameters.get('Kraj pierwszej rejestracji', None),
-                "zarejestrowany_w_polsce_value": parameters.get('Zarejestrowany w Polsce', None),
-                "stan_value": parameters.get('Stan pojazdu', None),
-                "lokalizacja_value": parameters.get('Lokalizacja', None),#.split(',')[0],
-                "tytul_value": subpage_soup.find('h1', class_='sticker__title').text.strip(),
-                "url_value": subpage_url,
-                "strona_value": "gratka",
-            }
-
-            # Log the resulting dictionary
-            logger.info(single_ad_dict)
+            with timed('extract', PORTAL):
+                single_ad_dict = parse_subpage(subpage_response.text, subpage_url, brand, model)
 
-            return single_ad_dict
+            if single_ad_dict is not None:
+                store_offer(subpage_url, single_ad_dict, subpage_response.headers, fingerprint)
+
+                return single_ad_dict
 
         # If the request was not successful, log an error
         else:
@@ -103,16 +272,159 @@ def scrape_subpage(subpage_url, brand, model):
         # Log any exception that occurs during scraping
         logger.error(f"Error processing subpage {subpage_url}: {e}")
 
-    # Introduce a random delay between 0.5 and 1.5 seconds
-    delay = random.uniform(0.5, 1.5)
-    time.sleep(delay)
-
     return None
 
 
+def build_main_page_url(
+    brand, model, year_from, year_to, engine_cap_from, engine_cap_to, price_from, price_to,
+    fuel, mileage_from, mileage_to, gearbox, engine_power_from, engine_power_to, town, distance, page_num,
+    order='',
+):
+    """
+    Builds the URL of a page with search results on Gratka.pl.
+
+    Parameters:
+        Search criteria as in scrape_main_page, the number of the page (page_num) and the sort order
+        of the results (order), one of ORDERS or '' for the portal's default.
+
+    Returns:
+        str: URL of the page with search results.
+    """
+    return (
+        f'https://gratka.pl/motoryzacja/osobowe/{brand}/{model}/{fuel}/od-{year_from}/{town}?'
+        f'page={page_num}&skrzynia-biegow[0]={gearbox}&'
+        f'cena-calkowita:min={price_from}&cena-calkowita:max={price_to}&'
+        f'rok-produkcji:max={year_to}&przebieg:min={mileage_from}&przebieg:max={mileage_to}&'
+        f'pojemnosc-silnika:min={engine_cap_from}&pojemnosc-silnika:max={engine_cap_to}&'
+        f'moc-silnika:min={engine_power_from}&moc-silnika:max={engine_power_to}&promien={distance}'
+        + ORDERS.get(order, '')
+    )
+
+
+def get_max_page(main_page_soup):
+    """
+    Finds the number of pages with search results.
+
+    Parameters:
+        main_page_soup (BeautifulSoup): Parsed page with search results.
+
+    Returns:
+        int: Maximum page number, 0 if there are no offers and 1 if the pagination input is missing.
+    """
+    offer_count = main_page_soup.find('span', {'data-cy': 'offersCount'}).text.strip()
+
+    if offer_count == '(0)':
+        return 0
+
+    try:
+        # Find the input element with the id 'pagination__input-1746878645'
+        input_element = main_page_soup.find('input', {'aria-label': 'Numer strony wyników'})
+        # Extract the value of the 'max' attribute
+        return int(input_element.get('maxlength'))
+    except (IndexError, AttributeError, ValueError):
+        logging.warning("Error occurred while extracting max_page. Setting max_page to 1.")
+        return 1
+
+
+def find_offer_links(main_page_soup):
+    """
+    Finds the links to offer subpages in the listing of a page with search results.
+
+    Parameters:
+        main_page_soup (BeautifulSoup): Parsed page with search results.
+
+    Returns:
+        dict: First link to every subpage URL, in the order they appear on the page.
+    """
+    offer_links = {}
+    offers_soup = main_page_soup.find('div', {'class': 'listing'})
+
+    # Find and collect links to subpages
+    for subpage_link in offers_soup.find_all('a', href=True):
+        subpage_url = subpage_link['href']
+
+        # Check if the href attribute contains the desired pattern
+        if subpage_url not in offer_links \
+                and subpage_url.startswith('https://gratka.pl/motoryzacja/') \
+                and "/osobowe/" not in subpage_url:
+            offer_links[subpage_url] = subpage_link
+
+    return offer_links
+
+
+def parse_main_page(main_page_html):
+    """
+    Extracts the number of pages and the links to offer subpages from a page with search results.
+
+    Parameters:
+        main_page_html (str): HTML of the page with search results.
+
+    Returns:
+        tuple: Maximum page number (0 if there are no offers), the list of unique subpage URLs
+            in the order they appear on the page and a dictionary mapping every subpage URL to the
+            fingerprint of its listing card.
+    """
+    # Parse the HTML of the current page
+    main_page_soup = make_soup(main_page_html, PORTAL, MAIN_PAGE_STRAINER)
+    max_page = get_max_page(main_page_soup)
+
+    if max_page == 0:
+        return 0, [], {}
+
+    offer_links = find_offer_links(main_page_soup)
+    fingerprints = {subpage_url: get_card_fingerprint(link) for subpage_url, link in offer_links.items()}
+
+    return max_page, list(offer_links), fingerprints
+
+
+def parse_listing_page(main_page_html, brand, model):
+    """
+    Extracts the number of pages and an ad from every listing card of a page with search results.
+
+    The ads have the title, price, currency, location, production year, mileage and engine capacity
+    shown on the cards, the other details are left as None.
+
+    Parameters:
+        main_page_html (str): HTML of the page with search results.
+        brand (str): Brand searched for.
+        model (str): Model searched for.
+
+    Returns:
+        tuple: Maximum page number (0 if there are no offers), the list of unique subpage URLs in the
+            order they appear on the page and a dictionary mapping every subpage URL to the ad built
+            from its listing card and the fingerprint of the card.
+    """
+    # Parse the HTML of the current page
+    main_page_soup = make_soup(main_page_html, PORTAL, MAIN_PAGE_STRAINER)
+    max_page = get_max_page(main_page_soup)
+
+    if max_page == 0:
+        return 0, [], {}
+
+    offer_links = find_offer_links(main_page_soup)
+    cards = {}
+
+    for subpage_url, link in offer_links.items():
+        single_ad_dict = new_ad(brand, model, subpage_url, PORTAL)
+        card = link.find_parent('article')
+
+        if card is not None:
+            extract_page_fields(card, CARD_FIELDS, single_ad_dict)
+            extract_labelled_fields(card.find_all('li'), get_card_parameter_label, CARD_PARAMETERS, single_ad_dict)
+
+        if single_ad_dict['tytul_value'] is None:
+            single_ad_dict['tytul_value'] = link.get_text(strip=True) or None
+
+        cards[subpage_url] = (single_ad_dict, get_card_fingerprint(link))
+
+    return max_page, list(offer_links), cards
+
+
 def scrape_main_page(
     brand, model, year_from, year_to, engine_cap_from, engine_cap_to, price_from, price_to,
-    fuel, mileage_from, mileage_to, gearbox, engine_power_from, engine_power_to, town, distance
+    fuel, mileage_from, mileage_to, gearbox, engine_power_from, engine_power_to, town, distance,
+    order='', deadline=None, on_ad=None, on_page=None, prefetch=None, fast=False, start=None, limit=None,
+    progress=None, refresh=None,
 ):
     """
     Scrapes car advertisements from Gratka.pl based on specified search criteria.
@@ -134,85 +446,57 @@ def scrape_main_page(
         engine_power_to (int): Maximum engine power.
         town (str): Location.
         distance (int): Search radius around the specified town.
+        order (str, optional): Sort order of the search results, one of ORDERS or '' for the portal's default.
+        deadline (float, optional): time.monotonic() value after which scraping stops and the ads
+            collected so far are returned.
+        on_ad (callable, optional): Called with every scraped ad as soon as it is ready.
+        on_page (callable, optional): Called with the page number and max_page of every fetched page
+            with search results.
+        prefetch (bool, optional): Request pages 2..max_page in parallel once page 1 is known,
+            None to use the SCRAPER_PREFETCH_PAGES setting.
+        fast (bool, optional): Build the ads from the listing cards without downloading the offer subpages.
+        start (tuple, optional): Page number and position on the page of the first offer to scrape.
+        limit (int, optional): Number of ads after which no further page is requested.
+        progress (dict, optional): Record of the crawl created by crawler.new_progress.
+        refresh (dict, optional): State of a refresh of a saved search created by crawler.new_refresh,
+            whose unchanged offers are taken from the listing cards without downloading their subpages.
 
     Returns:
         list of dict: List of dictionaries containing information about scraped car advertisements.
     """
-    all_ads = []
-    page_num = 1
-    while True:
-        current_url = (
-            f'https://gratka.pl/motoryzacja/osobowe/{brand}/{model}/{fuel}/od-{year_from}/{town}?'
-            f'page={page_num}&skrzynia-biegow[0]={gearbox}&'
-            f'cena-calkowita:min={price_from}&cena-calkowita:max={price_to}&'
-            f'rok-produkcji:max={year_to}&przebieg:min={mileage_from}&przebieg:max={mileage_to}&'
-            f'pojemnosc-silnika:min={engine_cap_from}&pojemnosc-silnika:max={engine_cap_to}&'
-            f'moc-silnika:min={engine_power_from}&moc-silnika:max={engine_power_to}&promien={distance}'
+    scrape_offer = lambda subpage_url, fingerprint=None: scrape_subpage(
+        subpage_url, brand, model, fingerprint, deadline
+    )
+
+    if refresh is not None:
+        parse_page = lambda main_page_html: parse_listing_page(main_page_html, brand, model)
+        scrape_offer = refresh_listing_card(refresh, scrape_offer)
+    elif fast:
+        parse_page = lambda main_page_html: parse_listing_page(main_page_html, brand, model)
+        scrape_offer = use_listing_card
+    else:
+        parse_page = parse_main_page
+
+    # Bands of a split search narrow down the price and production year of the search
+    def build_url(page_num, price_from=price_from, price_to=price_to, year_from=year_from, year_to=year_to):
+        return build_main_page_url(
+            brand, model, year_from, year_to, engine_cap_from, engine_cap_to, price_from, price_to,
+            fuel, mileage_from, mileage_to, gearbox, engine_power_from, engine_power_to, town, distance, page_num,
+            order,
         )
 
-        # Request the current page
-        main_page_response = requests.get(current_url)
-        logging.info(f"Using url: {current_url}")
-
-        if main_page_response.status_code == 200:
-            # Parse the HTML of the current page
-            main_page_soup = BeautifulSoup(main_page_response.text, 'html.parser')
-            offer_count = main_page_soup.find('span', {'data-cy': 'offersCount'}).text.strip()
-            print(offer_count)
-            if offer_count != '(0)':
-                try:
-                    # Find the input element with the id 'pagination__input-1746878645'
-                    input_element = main_page_soup.find('input', {'aria-label': 'Numer strony wyników'})
-                    # Extract the value of the 'max' attribute
-                    max_page = int(input_element.get('maxlength'))
-                except (IndexError, AttributeError, ValueError):
-                    max_page = 1
-                    logging.warning("Error occurred while extracting max_page. Setting max_page to 1.")
-
-                logging.info(f"Maximum Page Number: {max_page}, actual page: {page_num}")
-
-
-                processed_links = set()
-
-                offers_soup = main_page_soup.find('div', {'class': 'listing'})
-
-                # Find and iterate through links to subpages
-                subpage_links = offers_soup.find_all('a', href=True)
-
-                for subpage_link in subpage_links:
-                    subpage_url = subpage_link['href']
-
-                    # Check if the href attribute contains the desired pattern
-                    if subpage_url not in processed_links \
-                            and subpage_url.startswith('https://gratka.pl/motoryzacja/') \
-                            and "/osobowe/" not in subpage_url:
-                        processed_links.add(subpage_url)
-                        # Step 4: Open and scrape the subpage
-                        subpage_response = requests.get(subpage_url)
-
-                        print(subpage_response)
-
-                        if subpage_response.status_code == 200:
-                            result = scrape_subpage(subpage_url, brand, model)
-                            if result is not None:
-                                all_ads.append(result)
-                            else:
-                                logging.info(f"Failed to fetch details for subpage: {subpage_url}")
-
-                # Increment the page number
-                page_num += 1
-
-                # Check if we reached the maximum page number
-                if page_num > max_page:
-                    ads_df = pd.DataFrame(all_ads)
-                    logging.info(ads_df)
-                    logging.info("Reached maximum page number. Stopping.")
-                    break
-            else:
-                logging.info('There is no offers when considering searching details.')
-                break
-        else:
-            logging.error(f"Failed to fetch main page. Status code: {main_page_response.status_code}")
-            break
-
-    return all_ads
+    return crawl(
+        PORTAL,
+        build_url,
+        parse_page,
+        scrape_offer,
+        deadline=deadline,
+        on_ad=on_ad,
+        on_page=on_page,
+        prefetch=prefetch,
+        store=not fast,
+        start=start,
+        limit=limit,
+        progress=progress,
+        split={'price_from': price_from, 'price_to': price_to, 'year_from': year_from, 'year_to': year_to},
+    )
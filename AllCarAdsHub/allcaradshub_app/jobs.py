@@ -0,0 +1,291 @@
+# Standard Library Imports
+import os
+import time
+import socket
+import logging
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-Party Library Imports
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+# Local Imports
+from allcaradshub_app.models import SearchJob
+from allcaradshub_app.portals import PORTALS, get_next_cursor, search_all_portals
+from allcaradshub_app.results import store_result_set
+from allcaradshub_app.search_cache import cache_search, get_cached_search
+
+# Backends running queued searches: threads of the web process, or run_search_jobs worker processes
+BACKEND_THREAD = 'thread'
+BACKEND_DATABASE = 'database'
+
+# Values used when the SCRAPER_JOB_* settings are not configured in settings.py
+DEFAULT_JOB_BACKEND = BACKEND_THREAD
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_PROGRESS_INTERVAL = 1.0
+DEFAULT_STALE_AFTER = 600
+DEFAULT_RETENTION = 86400
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_backend():
+    """
+    Returns the backend running queued searches, configured with the SCRAPER_JOB_BACKEND setting.
+
+    Returns:
+        str: 'thread' to run searches in the web process, 'database' to leave them to run_search_jobs.
+    """
+    return getattr(settings, 'SCRAPER_JOB_BACKEND', DEFAULT_JOB_BACKEND)
+
+
+def get_executor():
+    """
+    Returns the thread pool running searches in the web process, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: Pool with SCRAPER_JOB_WORKERS threads.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            max_workers = getattr(settings, 'SCRAPER_JOB_WORKERS', DEFAULT_JOB_WORKERS)
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search-job')
+
+        return _executor
+
+
+def get_worker_name():
+    """
+    Returns the name a worker records on the jobs it claims.
+
+    Returns:
+        str: Host name, process ID and thread name.
+    """
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+
+
+def enqueue_search(data):
+    """
+    Creates a background job for a search and hands it to the configured backend.
+
+    A search found in the search cache gives a job that is already done.
+
+    Parameters:
+        data (dict): Search form data.
+
+    Returns:
+        SearchJob: The created job.
+    """
+    cleanup_jobs()
+
+    cached_search = get_cached_search(data)
+
+    if cached_search is not None:
+        result_id = store_result_set(data, cached_search['list_of_ads'], cached_search['sources'])
+
+        return SearchJob.objects.create(
+            params=data,
+            status=SearchJob.DONE,
+            result={
+                **cached_search, 'cursor': get_next_cursor(cached_search['sources']), 'cached': True,
+                'result_id': result_id,
+            },
+            started=timezone.now(),
+            finished=timezone.now(),
+        )
+
+    job = SearchJob.objects.create(params=data)
+
+    if get_backend() == BACKEND_THREAD:
+        get_executor().submit(run_queued_job, job.pk)
+
+    return job
+
+
+def claim_job(job_id, worker):
+    """
+    Marks a queued job as running, unless another worker claimed it first.
+
+    Parameters:
+        job_id (UUID): ID of the job.
+        worker (str): Name of the worker claiming the job.
+
+    Returns:
+        SearchJob or None: The claimed job, or None if it is no longer queued.
+    """
+    claimed = SearchJob.objects.filter(pk=job_id, status=SearchJob.QUEUED).update(
+        status=SearchJob.RUNNING, started=timezone.now(), worker=worker
+    )
+
+    if not claimed:
+        return None
+
+    return SearchJob.objects.get(pk=job_id)
+
+
+def claim_next_job(worker):
+    """
+    Claims the oldest queued job.
+
+    Parameters:
+        worker (str): Name of the worker claiming the job.
+
+    Returns:
+        SearchJob or None: The claimed job, or None if there is nothing to run.
+    """
+    while True:
+        job_id = (
+            SearchJob.objects.filter(status=SearchJob.QUEUED).order_by('created').values_list('pk', flat=True).first()
+        )
+
+        if job_id is None:
+            return None
+
+        job = claim_job(job_id, worker)
+
+        if job is not None:
+            return job
+
+
+def run_queued_job(job_id):
+    """
+    Claims and runs a job in a thread of the web process.
+
+    Parameters:
+        job_id (UUID): ID of the job.
+    """
+    try:
+        job = claim_job(job_id, get_worker_name())
+
+        if job is not None:
+            run_job(job)
+    finally:
+        close_old_connections()
+
+
+def run_job(job):
+    """
+    Runs the search of a claimed job, saving its progress while the portals are scraped.
+
+    Progress is written at most once per SCRAPER_JOB_PROGRESS_INTERVAL seconds. The finished search
+    is stored in the job and in the search cache.
+
+    Parameters:
+        job (SearchJob): Job in the 'running' status.
+    """
+    progress = {name: {'pages': 0, 'max_page': 0, 'ads': 0} for name in PORTALS}
+    progress_lock = threading.Lock()
+    interval = getattr(settings, 'SCRAPER_JOB_PROGRESS_INTERVAL', DEFAULT_PROGRESS_INTERVAL)
+    last_saved = 0.0
+
+    def save_progress(force=False):
+        nonlocal last_saved
+
+        with progress_lock:
+            now = time.monotonic()
+
+            if not force and now - last_saved < interval:
+                return
+
+            last_saved = now
+            snapshot = {name: dict(counts) for name, counts in progress.items()}
+
+        try:
+            SearchJob.objects.filter(pk=job.pk).update(progress=snapshot)
+        finally:
+            # Progress is reported from the scraper threads, which would otherwise keep their connection open
+            close_old_connections()
+
+    def on_ad(ad):
+        with progress_lock:
+            progress[ad['strona_value']]['ads'] += 1
+
+        save_progress()
+
+    def on_page(name, page_num, max_page):
+        with progress_lock:
+            progress[name]['pages'] += 1
+            progress[name]['max_page'] = max_page
+
+        save_progress()
+
+    logging.info(f"Running search job {job.pk}.")
+
+    try:
+        list_of_ads, sources = search_all_portals(job.params, on_ad=on_ad, on_page=on_page)
+        cache_search(job.params, list_of_ads, sources)
+        result_id = store_result_set(job.params, list_of_ads, sources)
+    except Exception as e:
+        logging.error(f"Search job {job.pk} failed: {e}")
+        SearchJob.objects.filter(pk=job.pk).update(status=SearchJob.FAILED, error=str(e), finished=timezone.now())
+        return
+
+    save_progress(force=True)
+
+    SearchJob.objects.filter(pk=job.pk).update(
+        status=SearchJob.DONE,
+        result={
+            'list_of_ads': list_of_ads, 'sources': sources, 'cursor': get_next_cursor(sources), 'cached': False,
+            'cache_age': 0, 'result_id': result_id,
+        },
+        finished=timezone.now(),
+    )
+
+    logging.info(f"Search job {job.pk} done with {len(list_of_ads)} ads.")
+
+
+def cleanup_jobs():
+    """
+    Fails jobs whose worker stopped in the middle of a search and deletes old finished jobs.
+
+    A job running longer than SCRAPER_JOB_STALE_AFTER seconds is failed, since every search ends
+    within its portal deadlines. Finished jobs are kept for SCRAPER_JOB_RETENTION seconds.
+    """
+    now = timezone.now()
+    stale_after = getattr(settings, 'SCRAPER_JOB_STALE_AFTER', DEFAULT_STALE_AFTER)
+    retention = getattr(settings, 'SCRAPER_JOB_RETENTION', DEFAULT_RETENTION)
+
+    stale = SearchJob.objects.filter(status=SearchJob.RUNNING, started__lt=now - timedelta(seconds=stale_after)).update(
+        status=SearchJob.FAILED, error='The worker running the search stopped.', finished=now
+    )
+
+    if stale:
+        logging.warning(f"Failed {stale} search jobs left running by a stopped worker.")
+
+    SearchJob.objects.filter(
+        status__in=[SearchJob.DONE, SearchJob.FAILED], finished__lt=now - timedelta(seconds=retention)
+    ).delete()
+
+
+def get_job_status(job):
+    """
+    Builds the status response of a job.
+
+    Parameters:
+        job (SearchJob): The job.
+
+    Returns:
+        dict: Job ID, status, per-portal progress and, once the job is done, the fields of the search
+            response ('list_of_ads', 'sources', 'cached', 'cache_age', 'result_id').
+    """
+    status = {
+        'job_id': str(job.pk),
+        'status': job.status,
+        'progress': job.progress,
+        'created': job.created.isoformat(),
+        'started': job.started.isoformat() if job.started else None,
+        'finished': job.finished.isoformat() if job.finished else None,
+    }
+
+    if job.status == SearchJob.DONE:
+        status.update(job.result)
+    elif job.status == SearchJob.FAILED:
+        status['error'] = job.error
+
+    return status
@@ -0,0 +1,59 @@
+# Standard Library Imports
+import time
+
+# Third-Party Library Imports
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+# Local Imports
+from allcaradshub_app.portals import PORTALS
+
+# Parser configurations compared by the benchmark: name, parser and whether restricted parsing is used
+CONFIGURATIONS = [
+    ('html.parser, full document', 'html.parser', False),
+    ('lxml, full document', 'lxml', False),
+    ('lxml, restricted', 'lxml', True),
+]
+
+
+class Command(BaseCommand):
+    help = 'Measures the parse time per page of saved listing or offer pages for every parser configuration.'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('portal', choices=list(PORTALS), help='Portal the pages come from.')
+        parser.add_argument('kind', choices=['main', 'offer'], help='Page with search results or offer subpage.')
+        parser.add_argument('files', nargs='+', help='Saved HTML pages.')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of times every page is parsed.')
+
+    def handle(self, *args, **options):
+        portal = options['portal']
+        portal_module = PORTALS[portal]['module']
+        pages = []
+
+        for file_name in options['files']:
+            with open(file_name, encoding='utf-8') as html_file:
+                pages.append(html_file.read())
+
+        if options['kind'] == 'main':
+            parse = portal_module.parse_main_page
+        else:
+            parse = lambda html: portal_module.parse_subpage(html, 'https://example.com/', '', '')
+
+        baseline = None
+
+        for name, parser, restricted in CONFIGURATIONS:
+            # Offer subpages are read from their elements, whatever SCRAPER_EXTRACTION is, so the parsers are compared
+            with override_settings(
+                SCRAPER_PARSERS={portal: parser}, SCRAPER_RESTRICTED_PARSING=restricted, SCRAPER_EXTRACTION='dom',
+            ):
+                started = time.perf_counter()
+
+                for _ in range(options['repeat']):
+                    for html in pages:
+                        parse(html)
+
+                per_page = (time.perf_counter() - started) / (options['repeat'] * len(pages)) * 1000
+
+            baseline = baseline or per_page
+            self.stdout.write(f'{name:<30} {per_page:8.2f} ms/page  {baseline / per_page:5.1f}x')
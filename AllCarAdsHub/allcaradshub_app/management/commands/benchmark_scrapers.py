@@ -0,0 +1,218 @@
+# Standard Library Imports
+import json
+import time
+import asyncio
+import tracemalloc
+
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+# Local Imports
+from allcaradshub_app.async_engine import scrape_main_page_async
+from allcaradshub_app.embedded import EXTRACTION_MODES
+from allcaradshub_app.fixtures import DEFAULT_FIXTURES_DIRECTORY, load_fixtures, load_search, start_fixture_server
+from allcaradshub_app.offer_cache import OFFER_CACHE
+from allcaradshub_app.portals import PORTALS
+from allcaradshub_app.ratelimit import reset_buckets
+from allcaradshub_app.resilience import reset_breakers
+
+# Fetch strategies compared by the benchmark: pages one by one, pages prefetched in parallel, and the asyncio engine
+MODES = ['sequential', 'prefetch', 'async']
+
+
+def run_scraper(portal, params, mode, fast=False):
+    """
+    Runs the scraper of a portal end to end in one of the benchmarked modes.
+
+    Parameters:
+        portal (str): Name of the portal.
+        params (dict): Search parameters of the portal.
+        mode (str): 'sequential', 'prefetch' or 'async'.
+        fast (bool, optional): Build the ads from the listing cards without downloading the offer subpages.
+
+    Returns:
+        list of dict: Scraped ads.
+    """
+    if mode == 'async':
+        return asyncio.run(scrape_main_page_async(PORTALS[portal]['module'], params, prefetch=True, fast=fast))
+
+    return PORTALS[portal]['scrape'](**params, prefetch=mode == 'prefetch', fast=fast)
+
+
+def measure_parsing(portal, fixtures, repeat):
+    """
+    Measures the parse time per page of the recorded pages of a portal.
+
+    Parameters:
+        portal (str): Name of the portal.
+        fixtures (dict): Recorded pages of the portal, as returned by load_fixtures.
+        repeat (int): Number of times every page is parsed.
+
+    Returns:
+        dict: Milliseconds per page with search results ('main') and per offer subpage ('offer'),
+            None when no such pages were recorded.
+    """
+    portal_module = PORTALS[portal]['module']
+    timings = {}
+
+    for kind, parse in (
+        ('main', portal_module.parse_main_page),
+        ('offer', lambda html: portal_module.parse_subpage(html, 'https://example.com/', '', '')),
+    ):
+        htmls = [
+            body.decode('utf-8') for key, body in fixtures['pages'].items()
+            if (key in fixtures['main_pages']) == (kind == 'main')
+        ]
+
+        if not htmls:
+            timings[kind] = None
+            continue
+
+        started = time.perf_counter()
+
+        for _ in range(repeat):
+            for html in htmls:
+                parse(html)
+
+        timings[kind] = round((time.perf_counter() - started) / (repeat * len(htmls)) * 1000, 3)
+
+    return timings
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the scrapers end to end against recorded pages served by a local server with injected latency '
+        'and errors, and reports pages/sec, ads/sec, parse time per page and peak memory.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory', nargs='?', default=DEFAULT_FIXTURES_DIRECTORY,
+            help='Fixtures directory written by record_fixtures, the pages shipped with the app by default.',
+        )
+        parser.add_argument('--portal', action='append', choices=list(PORTALS), help='Portals to run, all by default.')
+        parser.add_argument('--mode', action='append', choices=MODES, help='Fetch strategies to run, all by default.')
+        parser.add_argument('--parser', help='BeautifulSoup parser to use instead of SCRAPER_PARSERS.')
+        parser.add_argument(
+            '--extraction', choices=EXTRACTION_MODES, help='Extraction of offer subpages to use instead of SCRAPER_EXTRACTION.'
+        )
+        parser.add_argument('--fast', action='store_true', help='Run listing-only searches, skipping offer subpages.')
+        parser.add_argument('--latency', type=float, default=0.05, help='Mean delay of a response in seconds.')
+        parser.add_argument('--jitter', type=float, default=0.02, help='Largest deviation from the mean delay.')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503.')
+        parser.add_argument('--rate', type=float, default=1000, help='Requests per second allowed by the rate limiter.')
+        parser.add_argument('--repeat', type=int, default=1, help='Number of timed runs per portal and mode.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the injected latency and errors.')
+        parser.add_argument('--no-memory', action='store_true', help='Skip the extra run measuring peak memory.')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON, e.g. for CI.')
+
+    def handle(self, *args, **options):
+        try:
+            data = load_search(options['directory'])
+        except OSError as e:
+            raise CommandError(f'Cannot read the fixtures: {e}')
+
+        report = []
+
+        for portal in options['portal'] or list(PORTALS):
+            fixtures = load_fixtures(options['directory'], portal)
+
+            if fixtures is None:
+                self.stderr.write(f'No fixtures of {portal}, skipping it.')
+                continue
+
+            params = PORTALS[portal]['get_params'](data)
+            overrides = {
+                'SCRAPER_STORE_ADS': False,
+                'SCRAPER_RATE_LIMIT_DEFAULT': {'rate': options['rate'], 'burst': options['rate']},
+                'SCRAPER_RATE_LIMITS': {},
+            }
+
+            if options['parser']:
+                overrides['SCRAPER_PARSERS'] = {portal: options['parser']}
+
+            if options['extraction']:
+                overrides['SCRAPER_EXTRACTION'] = options['extraction']
+
+            with override_settings(**overrides):
+                parsing = measure_parsing(portal, fixtures, repeat=5)
+
+                for mode in options['mode'] or MODES:
+                    result = self.run_mode(portal, params, mode, fixtures, options)
+                    report.append({'portal': portal, 'mode': mode, **result, 'parse_ms': parsing})
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'portal':<10}{'mode':<12}{'seconds':>9}{'pages/s':>10}{'ads/s':>9}{'ads':>6}{'errors':>8}"
+            f"{'main ms':>9}{'offer ms':>10}{'peak MB':>9}"
+        )
+
+        for row in report:
+            peak = '-' if row['peak_mb'] is None else f"{row['peak_mb']:.1f}"
+            main_ms = '-' if row['parse_ms']['main'] is None else f"{row['parse_ms']['main']:.2f}"
+            offer_ms = '-' if row['parse_ms']['offer'] is None else f"{row['parse_ms']['offer']:.2f}"
+            self.stdout.write(
+                f"{row['portal']:<10}{row['mode']:<12}{row['seconds']:>9.2f}{row['pages_per_second']:>10.1f}"
+                f"{row['ads_per_second']:>9.1f}{row['ads']:>6}{row['errors']:>8}{main_ms:>9}{offer_ms:>10}{peak:>9}"
+            )
+
+    def run_mode(self, portal, params, mode, fixtures, options):
+        """
+        Runs a portal's scraper in one mode against a fresh fixture server and averages the timed runs.
+        """
+        runs = []
+        peak_mb = None
+
+        for run in range(options['repeat'] + (0 if options['no_memory'] else 1)):
+            traced = run == options['repeat']
+            server, base_url, stats = start_fixture_server(
+                fixtures['pages'], options['latency'], options['jitter'], options['error_rate'], options['seed']
+            )
+
+            # Every run starts cold: no cached offers, full token buckets and closed circuit breakers
+            caches[OFFER_CACHE].clear()
+            reset_buckets()
+            reset_breakers()
+
+            try:
+                with override_settings(SCRAPER_HOST_OVERRIDES={fixtures['host']: base_url}):
+                    if traced:
+                        tracemalloc.start()
+
+                    started = time.perf_counter()
+                    ads = run_scraper(portal, params, mode, options['fast'])
+                    seconds = time.perf_counter() - started
+
+                    if traced:
+                        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                        tracemalloc.stop()
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            if not traced:
+                runs.append({'seconds': seconds, 'ads': len(ads), **stats})
+
+        if not runs:
+            raise CommandError('Nothing was timed, use --repeat 1 or more.')
+
+        seconds = sum(run['seconds'] for run in runs) / len(runs)
+        pages = sum(run['requests'] for run in runs) / len(runs)
+        ads = sum(run['ads'] for run in runs) / len(runs)
+
+        return {
+            'seconds': round(seconds, 3),
+            'pages': round(pages),
+            'ads': round(ads),
+            'pages_per_second': round(pages / seconds, 2),
+            'ads_per_second': round(ads / seconds, 2),
+            'errors': sum(run['errors'] for run in runs) // len(runs),
+            'not_found': sum(run['not_found'] for run in runs) // len(runs),
+            'peak_mb': None if peak_mb is None else round(peak_mb, 2),
+        }
@@ -0,0 +1,30 @@
+# Standard Library Imports
+import json
+
+# Third-Party Library Imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Local Imports
+from allcaradshub_app.fixtures import record_fixtures
+
+
+class Command(BaseCommand):
+    help = 'Records the pages of a live search of every portal as fixtures for benchmark_scrapers.'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory the fixtures are written to.')
+        parser.add_argument('search', help='Search form data as JSON, e.g. \'{"brand": "audi", "model": "a4"}\'.')
+        parser.add_argument('--max-pages', type=int, help='Largest number of pages with search results per portal.')
+        parser.add_argument('--max-offers', type=int, help='Largest number of offer subpages per portal.')
+
+    def handle(self, *args, **options):
+        try:
+            data = json.loads(options['search'])
+        except json.JSONDecodeError as e:
+            raise CommandError(f'Invalid search data: {e}')
+
+        recorded = record_fixtures(options['directory'], data, options['max_pages'], options['max_offers'])
+
+        for name, counts in recorded.items():
+            self.stdout.write(f"{name:<10} {counts['main_pages']} pages with search results, {counts['offers']} offers")
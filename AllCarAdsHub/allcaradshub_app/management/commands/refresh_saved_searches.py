@@ -0,0 +1,51 @@
+# Standard Library Imports
+from datetime import timedelta
+
+# Third-Party Library Imports
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+# Local Imports
+from allcaradshub_app.models import SavedSearch
+from allcaradshub_app.saved_searches import refresh_saved_search
+
+
+class Command(BaseCommand):
+    help = (
+        'Refreshes the saved searches, e.g. daily from cron, downloading only the offers that are new or '
+        'changed since their previous run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', action='append', help='Saved searches to refresh, all by default.')
+        parser.add_argument(
+            '--older-than', type=float, default=0,
+            help='Only refresh searches last refreshed more than this many hours ago.',
+        )
+
+    def handle(self, *args, **options):
+        saved = SavedSearch.objects.order_by('refreshed')
+
+        if options['id']:
+            saved = saved.filter(pk__in=options['id'])
+
+        if options['older_than']:
+            refreshed_before = timezone.now() - timedelta(hours=options['older_than'])
+            saved = saved.filter(Q(refreshed__isnull=True) | Q(refreshed__lt=refreshed_before))
+
+        try:
+            saved_ids = list(saved.values_list('pk', flat=True))
+        except ValidationError as e:
+            raise CommandError(f'Invalid saved search ID: {e}')
+
+        for saved_id in saved_ids:
+            saved_search = SavedSearch.objects.get(pk=saved_id)
+            changes = refresh_saved_search(saved_search)['changes']
+            self.stdout.write(
+                f"Refreshed {saved_search}: {len(changes['new'])} new, {len(changes['changed'])} changed, "
+                f"{len(changes['removed'])} removed, {changes['unchanged']} unchanged."
+            )
+            close_old_connections()
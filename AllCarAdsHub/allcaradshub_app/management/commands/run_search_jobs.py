@@ -0,0 +1,36 @@
+# Standard Library Imports
+import time
+
+# Third-Party Library Imports
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+# Local Imports
+from allcaradshub_app.jobs import claim_next_job, cleanup_jobs, get_worker_name, run_job
+
+
+class Command(BaseCommand):
+    help = 'Runs queued search jobs. Used with SCRAPER_JOB_BACKEND = "database", one job at a time per process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when there are no queued jobs left.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between checks for new jobs.')
+
+    def handle(self, *args, **options):
+        worker = get_worker_name()
+        self.stdout.write(f'Worker {worker} waiting for search jobs.')
+
+        while True:
+            cleanup_jobs()
+            job = claim_next_job(worker)
+
+            if job is not None:
+                self.stdout.write(f'Running search job {job.pk}.')
+                run_job(job)
+                close_old_connections()
+                continue
+
+            if options['once']:
+                break
+
+            time.sleep(options['poll_interval'])
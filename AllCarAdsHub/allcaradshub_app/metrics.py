@@ -0,0 +1,331 @@
+# Standard Library Imports
+import time
+import inspect
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+
+# Upper bounds in seconds of the histogram buckets, from a cached parse to a whole search
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Metrics exposed on the metrics endpoint: type and help text
+METRICS = {
+    'scraper_stage_seconds': (
+        'histogram', 'Time spent in a stage of scraping (listing_fetch, offer_fetch, parse, extract), excluding nested stages.'
+    ),
+    'scraper_responses_total': ('counter', 'Responses received from the portals by status code, or error without a response.'),
+    'scraper_extractions_total': (
+        'counter', 'Offer subpages read from their embedded data or, when it is missing or incomplete, from their elements.'
+    ),
+    'search_view_seconds': ('histogram', 'Time taken by a search view to build its response.'),
+    'search_view_responses_total': ('counter', 'Responses of the search views by status code.'),
+}
+
+# Values of every metric by their label values, shared by all threads of the process
+_counters = defaultdict(float)
+_histograms = {}
+_metrics_lock = threading.Lock()
+
+# Span being timed in the current context, whose nested spans are subtracted from its own time,
+# and the timing breakdown of the request being served
+_current_span = contextvars.ContextVar('current_span', default=None)
+_current_timings = contextvars.ContextVar('current_timings', default=None)
+_timings_lock = threading.Lock()
+
+
+def get_labels_key(labels):
+    """
+    Returns the key a series of a metric is stored by.
+
+    Parameters:
+        labels (dict): Label names and values.
+
+    Returns:
+        tuple: Sorted pairs of label names and values.
+    """
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def increment(name, amount=1, **labels):
+    """
+    Increments a counter.
+
+    Parameters:
+        name (str): Name of the counter, one of METRICS.
+        amount (float, optional): Value added to the counter.
+        **labels: Label values of the series (e.g., portal='otomoto', status='200').
+    """
+    with _metrics_lock:
+        _counters[(name, get_labels_key(labels))] += amount
+
+
+def observe(name, value, **labels):
+    """
+    Records a value in a histogram.
+
+    Parameters:
+        name (str): Name of the histogram, one of METRICS.
+        value (float): Observed value in seconds.
+        **labels: Label values of the series.
+    """
+    key = (name, get_labels_key(labels))
+
+    with _metrics_lock:
+        histogram = _histograms.get(key)
+
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                histogram['buckets'][index] += 1
+                break
+
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+@contextmanager
+def timed(stage, portal):
+    """
+    Times a stage of scraping into the scraper_stage_seconds histogram and the current request's timings.
+
+    Time spent in spans nested within this one (e.g., parsing within extraction) is only counted
+    for the nested stage.
+
+    Parameters:
+        stage (str): Name of the stage (e.g., 'listing_fetch', 'offer_fetch', 'parse', 'extract').
+        portal (str): Name of the portal.
+    """
+    parent = _current_span.get()
+    span = {'nested': 0.0}
+    token = _current_span.set(span)
+    started = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _current_span.reset(token)
+
+        if parent is not None:
+            with _timings_lock:
+                parent['nested'] += elapsed
+
+        own_time = max(0.0, elapsed - span['nested'])
+        observe('scraper_stage_seconds', own_time, stage=stage, portal=portal)
+        add_timing(portal, stage, own_time)
+
+
+def call_timed(stage, portal, function, *args):
+    """
+    Calls a function within a span, e.g. in a worker thread, so the time spent waiting for the
+    thread is not counted.
+
+    Parameters:
+        stage (str): Name of the stage.
+        portal (str): Name of the portal.
+        function (callable): Function to call.
+        *args: Arguments of the function.
+
+    Returns:
+        The result of the function.
+    """
+    with timed(stage, portal):
+        return function(*args)
+
+
+def add_timing(portal, stage, seconds):
+    """
+    Adds the time of a stage to the timing breakdown of the request being served, if any.
+
+    Parameters:
+        portal (str): Name of the portal.
+        stage (str): Name of the stage.
+        seconds (float): Time spent in the stage.
+    """
+    timings = _current_timings.get()
+
+    if timings is None:
+        return
+
+    with _timings_lock:
+        stage_timings = timings['portals'].setdefault(portal, {}).setdefault(stage, {'count': 0, 'seconds': 0.0})
+        stage_timings['count'] += 1
+        stage_timings['seconds'] += seconds
+
+
+def get_timings():
+    """
+    Returns the timing breakdown of the request being served so far.
+
+    Seconds of a stage are summed over its spans, which run concurrently, so they can exceed the
+    time of the request.
+
+    Returns:
+        dict or None: 'elapsed' seconds of the request and 'portals', mapping every portal to the
+            number of spans and seconds of every stage, or None outside an instrumented view.
+    """
+    timings = _current_timings.get()
+
+    if timings is None:
+        return None
+
+    with _timings_lock:
+        return {
+            'elapsed': round(time.perf_counter() - timings['started'], 3),
+            'portals': {
+                portal: {
+                    stage: {'count': values['count'], 'seconds': round(values['seconds'], 3)}
+                    for stage, values in stages.items()
+                }
+                for portal, stages in timings['portals'].items()
+            },
+        }
+
+
+def bind_context(function):
+    """
+    Binds a function to a copy of the current context, so spans it times in a worker thread are
+    added to the timings of the request that started it.
+
+    Parameters:
+        function (callable): Function to be run in another thread.
+
+    Returns:
+        callable: Function running in the copied context.
+    """
+    return functools.partial(contextvars.copy_context().run, function)
+
+
+def instrument_view(name):
+    """
+    Decorates a search view to time its responses and collect the timing breakdown of its request.
+
+    Works with both synchronous and asynchronous views.
+
+    Parameters:
+        name (str): Name of the view in the view label of the metrics.
+
+    Returns:
+        callable: The decorator.
+    """
+    def record(response, started):
+        observe('search_view_seconds', time.perf_counter() - started, view=name)
+        increment('search_view_responses_total', view=name, status=str(response.status_code))
+
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                started = time.perf_counter()
+                token = _current_timings.set({'started': started, 'portals': {}})
+
+                try:
+                    response = await view(request, *args, **kwargs)
+                finally:
+                    _current_timings.reset(token)
+
+                record(response, started)
+                return response
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            started = time.perf_counter()
+            token = _current_timings.set({'started': started, 'portals': {}})
+
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                _current_timings.reset(token)
+
+            record(response, started)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def format_labels(labels_key, extra=()):
+    """
+    Formats the labels of a series in the Prometheus text format.
+
+    Parameters:
+        labels_key (tuple): Pairs of label names and values.
+        extra (tuple, optional): Additional pairs, such as the bucket bound.
+
+    Returns:
+        str: Labels in braces, or an empty string if there are none.
+    """
+    pairs = list(labels_key) + list(extra)
+
+    if not pairs:
+        return ''
+
+    escape = lambda value: value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+def format_value(value):
+    """
+    Formats the value of a series in the Prometheus text format without losing precision.
+
+    Parameters:
+        value (float): Value of a counter or the sum of a histogram.
+
+    Returns:
+        str: Whole numbers as integers (e.g., '1234567'), other numbers as the shortest repr of the float.
+    """
+    value = float(value)
+
+    if value.is_integer():
+        return str(int(value))
+
+    return repr(value)
+
+
+def render_metrics():
+    """
+    Renders all metrics in the Prometheus text exposition format.
+
+    Metrics are kept per process, so every worker process of the server exposes its own values.
+
+    Returns:
+        str: Metrics with their HELP and TYPE lines.
+    """
+    with _metrics_lock:
+        counters = dict(_counters)
+        histograms = {key: {**values, 'buckets': list(values['buckets'])} for key, values in _histograms.items()}
+
+    lines = []
+
+    for name, (metric_type, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+
+        if metric_type == 'counter':
+            for (metric_name, labels_key), value in sorted(counters.items()):
+                if metric_name == name:
+                    lines.append(f'{name}{format_labels(labels_key)} {format_value(value)}')
+            continue
+
+        for (metric_name, labels_key), histogram in sorted(histograms.items()):
+            if metric_name != name:
+                continue
+
+            cumulative = 0
+
+            for bound, count in zip(BUCKETS, histogram['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{format_labels(labels_key, [("le", f"{bound:g}")])} {cumulative}')
+
+            lines.append(f'{name}_bucket{format_labels(labels_key, [("le", "+Inf")])} {histogram["count"]}')
+            lines.append(f'{name}_sum{format_labels(labels_key)} {format_value(histogram["sum"])}')
+            lines.append(f'{name}_count{format_labels(labels_key)} {histogram["count"]}')
+
+    return '\n'.join(lines) + '\n'
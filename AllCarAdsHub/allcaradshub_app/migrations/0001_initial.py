@@ -0,0 +1,44 @@
+# Generated by Django 5.0 on 2026-10-18 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marka', models.CharField(blank=True, max_length=100)),
+                ('model', models.CharField(blank=True, max_length=100)),
+                ('cena', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('waluta', models.CharField(blank=True, max_length=10)),
+                ('rok_produkcji', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('przebieg', models.PositiveIntegerField(blank=True, null=True)),
+                ('pojemnosc', models.PositiveIntegerField(blank=True, null=True)),
+                ('moc', models.PositiveIntegerField(blank=True, null=True)),
+                ('typ_nadwozia', models.CharField(blank=True, max_length=100)),
+                ('liczba_drzwi', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('liczba_miejsc', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('kolor', models.CharField(blank=True, max_length=100)),
+                ('kraj_pochodzenia', models.CharField(blank=True, max_length=100)),
+                ('zarejestrowany_w_polsce', models.CharField(blank=True, max_length=20)),
+                ('stan', models.CharField(blank=True, max_length=50)),
+                ('lokalizacja', models.CharField(blank=True, max_length=255)),
+                ('tytul', models.CharField(blank=True, max_length=255)),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('strona', models.CharField(max_length=20)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['marka', 'model'], name='allcaradshu_marka_b25a79_idx'), models.Index(fields=['rok_produkcji'], name='allcaradshu_rok_pro_66beb3_idx'), models.Index(fields=['cena'], name='allcaradshu_cena_3e973a_idx'), models.Index(fields=['przebieg'], name='allcaradshu_przebie_20c837_idx')],
+            },
+        ),
+    ]
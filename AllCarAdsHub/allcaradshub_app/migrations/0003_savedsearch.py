@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-18 08:33
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('allcaradshub_app', '0002_searchjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('params', models.JSONField()),
+                ('offers', models.JSONField(default=dict)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('refreshed', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,107 @@
+import uuid
+
 from django.db import models
 
 # Create your models here.
+
+
+class Ad(models.Model):
+    """
+    Car advertisement scraped from one of the portals.
+
+    Field names mirror the keys of the dictionaries produced by scrape_subpage without the '_value'
+    suffix (e.g., 'cena_value' is stored in 'cena'), with numbers stored as numbers.
+    """
+    marka = models.CharField(max_length=100, blank=True)
+    model = models.CharField(max_length=100, blank=True)
+    cena = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    waluta = models.CharField(max_length=10, blank=True)
+    rok_produkcji = models.PositiveSmallIntegerField(null=True, blank=True)
+    przebieg = models.PositiveIntegerField(null=True, blank=True)
+    pojemnosc = models.PositiveIntegerField(null=True, blank=True)
+    moc = models.PositiveIntegerField(null=True, blank=True)
+    typ_nadwozia = models.CharField(max_length=100, blank=True)
+    liczba_drzwi = models.PositiveSmallIntegerField(null=True, blank=True)
+    liczba_miejsc = models.PositiveSmallIntegerField(null=True, blank=True)
+    kolor = models.CharField(max_length=100, blank=True)
+    kraj_pochodzenia = models.CharField(max_length=100, blank=True)
+    zarejestrowany_w_polsce = models.CharField(max_length=20, blank=True)
+    stan = models.CharField(max_length=50, blank=True)
+    lokalizacja = models.CharField(max_length=255, blank=True)
+    tytul = models.CharField(max_length=255, blank=True)
+    url = models.URLField(max_length=500, unique=True)
+    strona = models.CharField(max_length=20)
+
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['marka', 'model']),
+            models.Index(fields=['rok_produkcji']),
+            models.Index(fields=['cena']),
+            models.Index(fields=['przebieg']),
+        ]
+
+    def __str__(self):
+        return f'{self.tytul} ({self.strona})'
+
+
+class SearchJob(models.Model):
+    """
+    Search running in the background, polled by the frontend through its ID.
+
+    'progress' maps every portal to the number of fetched pages with search results, max_page and the
+    number of ads found so far. 'result' holds the list of ads and the per-portal sources once done.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    params = models.JSONField()
+    progress = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created']),
+        ]
+
+    def __str__(self):
+        return f'{self.id} ({self.status})'
+
+
+class SavedSearch(models.Model):
+    """
+    Search kept to be refreshed later, downloading only the offers that are new or changed since its last run.
+
+    'offers' maps the URL of every offer the search found to the fingerprint of its listing card, its ad
+    and its status, 'active' or 'removed' once it is no longer listed. 'result' holds the list of ads,
+    the per-portal sources and the changes found by the last run.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=200, blank=True)
+    params = models.JSONField()
+    offers = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+
+    created = models.DateTimeField(auto_now_add=True)
+    refreshed = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name or self.id} ({len(self.offers)} offers)'
@@ -0,0 +1,114 @@
+# Standard Library Imports
+import time
+import logging
+
+# Third-Party Library Imports
+from django.conf import settings
+from django.core.cache import caches
+
+# Alias of the cache configured in settings.CACHES that holds extracted offers
+OFFER_CACHE = 'offers'
+
+# Number of seconds a cached offer is used without asking the portal, when not configured in settings.py
+DEFAULT_OFFER_FRESHNESS = 3600
+
+
+def get_offer_key(subpage_url):
+    """
+    Returns the cache key of an offer.
+
+    Parameters:
+        subpage_url (str): URL of the car advertisement subpage.
+
+    Returns:
+        str: Cache key of the offer.
+    """
+    return 'offer:' + subpage_url
+
+
+def lookup_offer(subpage_url, fingerprint=None):
+    """
+    Looks up an offer in the cache and decides whether it has to be downloaded again.
+
+    A cached offer is used as is when it was parsed less than SCRAPER_OFFER_FRESHNESS seconds ago or
+    when its listing card still has the same fingerprint. Otherwise the caller gets the headers of a
+    conditional request, so an unchanged page costs a 304 response instead of a download and a parse.
+
+    Parameters:
+        subpage_url (str): URL of the car advertisement subpage.
+        fingerprint (str, optional): Fingerprint of the offer's listing card on the current search.
+
+    Returns:
+        tuple: The cached ad dictionary if it can be used (else None) and the headers of the request
+            to send otherwise.
+    """
+    cached = caches[OFFER_CACHE].get(get_offer_key(subpage_url))
+
+    if cached is None:
+        return None, {}
+
+    freshness = getattr(settings, 'SCRAPER_OFFER_FRESHNESS', DEFAULT_OFFER_FRESHNESS)
+
+    if time.time() - cached['parsed_at'] < freshness:
+        logging.debug(f"Using fresh cached offer: {subpage_url}")
+        return cached['ad'], {}
+
+    if fingerprint is not None and fingerprint == cached['fingerprint']:
+        logging.debug(f"Listing card unchanged, using cached offer: {subpage_url}")
+        return cached['ad'], {}
+
+    headers = {}
+
+    if cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+
+    if cached['last_modified']:
+        headers['If-Modified-Since'] = cached['last_modified']
+
+    return None, headers
+
+
+def store_offer(subpage_url, ad, response_headers, fingerprint=None):
+    """
+    Stores an extracted offer with the validators needed to revalidate it later.
+
+    Parameters:
+        subpage_url (str): URL of the car advertisement subpage.
+        ad (dict): Dictionary extracted from the subpage.
+        response_headers (Mapping): Headers of the response the offer was extracted from.
+        fingerprint (str, optional): Fingerprint of the offer's listing card.
+    """
+    caches[OFFER_CACHE].set(get_offer_key(subpage_url), {
+        'ad': ad,
+        'etag': response_headers.get('ETag'),
+        'last_modified': response_headers.get('Last-Modified'),
+        'fingerprint': fingerprint,
+        'parsed_at': time.time(),
+    })
+
+
+def revalidate_offer(subpage_url, fingerprint=None):
+    """
+    Marks a cached offer as fresh again after the portal answered a conditional request with 304.
+
+    Parameters:
+        subpage_url (str): URL of the car advertisement subpage.
+        fingerprint (str, optional): Fingerprint of the offer's listing card.
+
+    Returns:
+        dict or None: The cached ad dictionary, or None if it was evicted in the meantime.
+    """
+    cache = caches[OFFER_CACHE]
+    cached = cache.get(get_offer_key(subpage_url))
+
+    if cached is None:
+        return None
+
+    cached['parsed_at'] = time.time()
+
+    if fingerprint is not None:
+        cached['fingerprint'] = fingerprint
+
+    cache.set(get_offer_key(subpage_url), cached)
+
+    return cached['ad']
@@ -1,26 +1,208 @@
 # Standard Library Imports
-import time
-import random
 import logging
 
-# Third-Party Library Imports
-from bs4 import BeautifulSoup
-import pandas as pd
-import requests
+# Local Imports
+from allcaradshub_app.crawler import crawl, refresh_listing_card, use_listing_card
+from allcaradshub_app.embedded import (
+    compile_json_fields, extract_json_fields, extract_json_ld, find_next_data, get_extraction_mode, get_path,
+    is_complete,
+)
+from allcaradshub_app.extraction import (
+    compile_labelled_fields, compile_page_fields, extract_labelled_fields, extract_labelled_values,
+    extract_page_fields, log_missing_fields, new_ad, strip_units, to_float, to_int, to_text,
+)
+from allcaradshub_app.fetch import fetch
+from allcaradshub_app.metrics import increment, timed
+from allcaradshub_app.offer_cache import lookup_offer, revalidate_offer, store_offer
+from allcaradshub_app.parsers import get_card_fingerprint, has_class, make_soup, make_strainer
 
 # Configure logging settings (you can customize this based on your needs)
 logging.basicConfig(level=logging.INFO)
 
+# Name of the portal, used as the value of 'strona_value' and as the key of the shared session
+PORTAL = 'otomoto'
+
+# Query parameters sorting the search results, by the sort order of the search
+ORDERS = {
+    'price_asc': '&search%5Border%5D=filter_float_price%3Aasc',
+}
+
+# Only the parts of the pages read by the parsers are built into the soup:
+# offer cards, links and the pagination list on pages with search results,
+MAIN_PAGE_STRAINER = make_strainer(
+    lambda name, attrs: name == 'article'
+    or (name == 'a' and 'href' in attrs)
+    or (name == 'ul' and has_class(attrs, 'pagination-list'))
+)
+
+# and the headers (title, price, 404 message), the currency, the location link and the details on offer subpages
+SUBPAGE_STRAINER = make_strainer(
+    lambda name, attrs: name in ('h3', 'h4')
+    or (name == 'p' and has_class(attrs, 'offer-price__currency'))
+    or (name == 'a' and attrs.get('href', '').startswith(('https://maps', '#map')))
+    or (name == 'div' and attrs.get('data-testid') == 'advert-details-item')
+)
+
+# CSS classes of the elements holding the label and the value of an item of the details list
+DETAILS_LABEL_CLASS = 'e18eslyg4 ooa-12b2ph5'
+DETAILS_VALUE_CLASS = 'e16lfxpc0 ooa-1pe3502 er34gjf0'
+DETAILS_LINK_CLASS = 'e16lfxpc1 ooa-1ftbcn2'
+
+
+def find_location(soup):
+    """
+    Finds the element holding the location of the offer: the parent of the map icon in the location link.
+
+    Parameters:
+        soup (BeautifulSoup): Parsed offer subpage.
+
+    Returns:
+        Tag or None: Element whose text is the location.
+    """
+    location_link = soup.find(
+        'a',
+        {
+            'class': 'edhv9y51 ooa-oxkwx3', 'color': 'text-global-highlight',
+            'href': lambda x: x and (x.startswith('https://maps') or x.startswith('#map'))
+        }
+    )
+    icon = location_link.find('svg') if location_link else None
+    return icon.find_parent() if icon else None
+
+
+def get_details_label(details_div):
+    """
+    Returns the label of an item of the details list, such as 'Rok produkcji'.
+
+    Parameters:
+        details_div (Tag): Item of the details list.
+
+    Returns:
+        str or None: Label of the item.
+    """
+    label = details_div.find('p', class_=DETAILS_LABEL_CLASS)
+    return label.get_text(strip=True) if label else None
+
+
+# Fields extracted from every offer subpage: the ones shown once on the page (target key, element, converter)
+SUBPAGE_FIELDS = compile_page_fields([
+    ('tytul_value', ('h3', 'offer-title big-text ezl3qpx2 ooa-ebtemw er34gjf0'), to_text),
+    ('lokalizacja_value', find_location, to_text),
+    ('cena_value', ('h3', 'offer-price__number'), to_float),
+    ('waluta_value', ('p', 'offer-price__currency'), to_text),
+])
+
+# and the items of the details list (label, target key, element within the item, converter)
+SUBPAGE_DETAILS = compile_labelled_fields([
+    ('Marka pojazdu', 'marka_value', ('p', DETAILS_VALUE_CLASS), to_text),
+    ('Model pojazdu', 'model_value', ('p', DETAILS_VALUE_CLASS), to_text),
+    ('Rok produkcji', 'rok_produkcji_value', ('p', DETAILS_VALUE_CLASS), to_int),
+    ('Przebieg', 'przebieg_value', ('p', DETAILS_VALUE_CLASS), to_int),
+    ('Pojemność skokowa', 'pojemnosc_value', ('p', DETAILS_VALUE_CLASS), strip_units('cm3', convert=to_int)),
+    ('Moc', 'moc_value', ('p', DETAILS_VALUE_CLASS), to_int),
+    ('Typ nadwozia', 'typ_nadwozia_value', ('a', DETAILS_LINK_CLASS), to_text),
+    ('Liczba drzwi', 'liczba_drzwi_value', ('p', DETAILS_VALUE_CLASS), to_int),
+    ('Liczba miejsc', 'liczba_miejsc_value', ('p', DETAILS_VALUE_CLASS), to_int),
+    ('Kolor', 'kolor_value', ('a', DETAILS_LINK_CLASS), to_text),
+    ('Kraj pochodzenia', 'kraj_pochodzenia_value', ('a', DETAILS_LINK_CLASS), to_text),
+    ('Zarejestrowany w Polsce', 'zarejestrowany_w_polsce_value', ('p', DETAILS_VALUE_CLASS), to_text),
+    ('Stan', 'stan_value', ('a', DETAILS_LINK_CLASS), to_text),
+])
+
+# Fields of the advert the pages are rendered from, whose details list uses the labels of SUBPAGE_DETAILS
+# (target key, paths of keys, converter)
+ADVERT_FIELDS = compile_json_fields([
+    ('tytul_value', ('title',), to_text),
+    ('cena_value', ('price', 'value'), to_float),
+    ('waluta_value', ('price', 'currency'), to_text),
+    ('lokalizacja_value', (('seller', 'location', 'address'), ('seller', 'location', 'city', 'name')), to_text),
+])
+
+
+def find_card_currency(card):
+    """
+    Finds the currency shown next to the price on a listing card.
+
+    Parameters:
+        card (Tag): <article> of the listing card.
+
+    Returns:
+        Tag or None: Element whose text is the currency.
+    """
+    price = card.find('h3')
+    return price.find_next_sibling('p') if price else None
+
+
+def get_card_parameter_label(item):
+    """
+    Returns the name of a parameter of a listing card, such as 'mileage'.
+
+    Parameters:
+        item (Tag): <dd> element of the parameter.
+
+    Returns:
+        str or None: Value of its data-parameter attribute.
+    """
+    return item.get('data-parameter')
+
+
+# Fields of the listing cards on pages with search results (target key, element within the card, converter)
+CARD_FIELDS = compile_page_fields([
+    ('tytul_value', (['h1', 'h2'], None), to_text),
+    ('cena_value', ('h3', None), to_float),
+    ('waluta_value', find_card_currency, to_text),
+])
+
+# and their parameters, labelled by the data-parameter attribute holding the value itself
+CARD_PARAMETERS = compile_labelled_fields([
+    ('year', 'rok_produkcji_value', lambda item: item, to_int),
+    ('mileage', 'przebieg_value', lambda item: item, to_int),
+])
+
+
+def parse_embedded_subpage(subpage_html, subpage_url, brand, model):
+    """
+    Extracts detailed information from the data embedded in a car advertisement subpage on Otomoto.pl.
+
+    The advert of the Next.js data the page is rendered from is read first, and the schema.org Car of
+    its JSON-LD if there is none. Neither requires parsing the page.
+
+    Parameters:
+        subpage_html (str): HTML of the car advertisement subpage.
+        subpage_url (str): URL of the car advertisement subpage.
 
-def scrape_subpage(subpage_url, brand, model):
+    Returns:
+        dict or None: Dictionary with the keys returned by parse_subpage, or None if the page has no
+            embedded data or it lacks any of the required fields.
     """
-    Scrapes detailed information from a car advertisement subpage on Gratka.pl.
+    single_ad_dict = new_ad(brand, model, subpage_url, PORTAL)
+
+    with timed('parse', PORTAL):
+        advert = get_path(find_next_data(subpage_html), ('props', 'pageProps', 'advert'))
+
+        if isinstance(advert, dict):
+            extract_json_fields(advert, ADVERT_FIELDS, single_ad_dict)
+            details = [detail for detail in advert.get('details') or [] if isinstance(detail, dict)]
+            extract_labelled_values(
+                ((detail.get('label'), detail.get('value')) for detail in details), SUBPAGE_DETAILS, single_ad_dict
+            )
+        elif not extract_json_ld(subpage_html, single_ad_dict):
+            return None
+
+    return single_ad_dict if is_complete(single_ad_dict) else None
+
+
+def parse_subpage(subpage_html, subpage_url, brand, model):
+    """
+    Extracts detailed information from the HTML of a car advertisement subpage on Otomoto.pl.
 
     Parameters:
+        subpage_html (str): HTML of the car advertisement subpage.
         subpage_url (str): URL of the car advertisement subpage.
 
     Returns:
-        dict or None: Dictionary containing extracted parameters from the subpage if successful, else None.
+        dict or None: Dictionary containing extracted parameters from the subpage, or None if the offer
+            page does not exist anymore or lacks any of the fields of embedded.REQUIRED_FIELDS.
             Keys include 'marka_value', 'model_value', 'cena_value', 'waluta_value',
             'rok_produkcji_value', 'przebieg_value', 'pojemnosc_value', 'moc_value',
             'typ_nadwozia_value', 'liczba_drzwi_value', 'liczba_miejsc_value', 'kolor_value',
@@ -30,211 +212,92 @@ def scrape_subpage(subpage_url, brand, model):
     # Use a logger with the name of the current function
     logger = logging.getLogger(__name__)
 
+    if get_extraction_mode() == 'embedded':
+        single_ad_dict = parse_embedded_subpage(subpage_html, subpage_url, brand, model)
+
+        if single_ad_dict is not None:
+            increment('scraper_extractions_total', portal=PORTAL, source='embedded')
+            logger.debug(single_ad_dict)
+            return single_ad_dict
+
+    increment('scraper_extractions_total', portal=PORTAL, source='dom')
+
+    # Parse the HTML of the current page
+    subpage_soup = make_soup(subpage_html, PORTAL, SUBPAGE_STRAINER)
+
+    page_not_found_element = subpage_soup.find('h4', {'class': 'ooa-1o6s6g2 er34gjf0'})
+
+    if page_not_found_element and page_not_found_element.text.strip() == '404 Strona nie została odnaleziona':
+        logger.info("Page not found... Going to the next page.")
+        return None
+
+    single_ad_dict = new_ad(brand, model, subpage_url, PORTAL)
+    missing = extract_page_fields(subpage_soup, SUBPAGE_FIELDS, single_ad_dict)
+    missing += extract_labelled_fields(
+        subpage_soup.find_all('div', {'data-testid': 'advert-details-item'}),
+        get_details_label,
+        SUBPAGE_DETAILS,
+        single_ad_dict,
+    )
+    log_missing_fields(PORTAL, subpage_url, missing)
+
+    # Log the resulting dictionary
+    logger.debug(single_ad_dict)
+
+    # Offers lacking a required field are dropped, whichever way they were read
+    if not is_complete(single_ad_dict):
+        logger.info(f"Offer {subpage_url} lacks a required field. Skipping it.")
+        return None
+
+    return single_ad_dict
+
+
+def scrape_subpage(subpage_url, brand, model, fingerprint=None, deadline=None):
+    """
+    Scrapes detailed information from a car advertisement subpage on Otomoto.pl.
+
+    The subpage is downloaded once through the shared portal session and its body is handed
+    straight to parse_subpage. Offers found in the offer cache are not downloaded while they are
+    fresh or their listing card is unchanged, and are revalidated with a conditional request otherwise.
+
+    Parameters:
+        subpage_url (str): URL of the car advertisement subpage.
+        fingerprint (str, optional): Fingerprint of the offer's listing card.
+        deadline (float, optional): time.monotonic() value after which the request is not retried.
+
+    Returns:
+        dict or None: Dictionary returned by parse_subpage if successful, else None.
+    """
+    # Use a logger with the name of the current function
+    logger = logging.getLogger(__name__)
+
     try:
-        subpage_response = requests.get(subpage_url)
+        cached_ad, headers = lookup_offer(subpage_url, fingerprint)
+
+        if cached_ad is not None:
+            return cached_ad
+
+        with timed('offer_fetch', PORTAL):
+            subpage_response = fetch(subpage_url, PORTAL, headers=headers, deadline=deadline)
         logger.info(f"Scraping subpage: {subpage_url}")
 
+        # The offer did not change since it was cached
+        if subpage_response.status_code == 304:
+            cached_ad = revalidate_offer(subpage_url, fingerprint)
+
+            if cached_ad is not None:
+                return cached_ad
+
+            with timed('offer_fetch', PORTAL):
+                subpage_response = fetch(subpage_url, PORTAL, deadline=deadline)
+
         # Check if the request was successful (status code 200)
         if subpage_response.status_code == 200:
-            logger.debug("Request successful. Parsing HTML.")
-
-            # Parse the HTML of the current page
-            subpage_soup = BeautifulSoup(subpage_response.text, 'html.parser')
-
-            page_not_found_element = subpage_soup.find('h4', {'class': 'ooa-1o6s6g2 er34gjf0'})
-
-            if page_not_found_element and page_not_found_element.text.strip() == '404 Strona nie została odnaleziona':
-                logger.info("Page not found... Going to the next page.")
-            else:
-                logger.debug("Page HTML parsed successfully. Extracting details.")
-                # Find the div elements containing details
-                details_divs = subpage_soup.find_all('div', {'data-testid': 'advert-details-item'})
-
-                # Initialize dictionary with None to store values
-                single_ad_dict = {
-                    "marka_value": brand,
-                    "model_value": model,
-                    "cena_value": None,
-                    "waluta_value": None,
-                    "rok_produkcji_value": None,
-                    "przebieg_value": None,
-                    "pojemnosc_value": None,
-                    "moc_value": None,
-                    "typ_nadwozia_value": None,
-                    "liczba_drzwi_value": None,
-                    "liczba_miejsc_value": None,
-                    "kolor_value": None,
-                    "kraj_pochodzenia_value": None,
-                    "zarejestrowany_w_polsce_value": None,
-                    "stan_value": None,
-                    "lokalizacja_value": None,
-                    "tytul_value": None,
-                    "url_value": subpage_url,
-                    "strona_value": "otomoto",
-                }
-                try:
-                    # Finding title of the advertisement
-                    single_ad_dict["tytul_value"] = subpage_soup.find(
-                        'h3',
-                        class_='offer-title big-text ezl3qpx2 ooa-ebtemw er34gjf0'
-                    ).text.strip()
-                except Exception as e:
-                    # Log any exception that occurs during scraping
-                    logger.error(f"Error when tring to get title of page")
-
-                try:
-                    # Finding location
-                    location_element = subpage_soup.find(
-                        'a',
-                        {
-                            'class': 'edhv9y51 ooa-oxkwx3', 'color': 'text-global-highlight',
-                            'href': lambda x: x and (x.startswith('https://maps') or x.startswith('#map'))
-                        }
-                    )
-
-                    single_ad_dict["lokalizacja_value"] = location_element.find('svg').find_parent().text.strip()
-                except Exception as e:
-                    # Log any exception that occurs during scraping
-                    logger.error(f"Error when tring to get localisation of advertisement")
-
-                try:
-                    # Find the price and currency of the offer
-                    price_number = subpage_soup.find('h3', class_='offer-price__number')
-                    currency = subpage_soup.find('p', class_='offer-price__currency')
-
-                    single_ad_dict["cena_value"] = float(price_number.text.strip().replace(" ", "")) if price_number else None
-                    single_ad_dict["waluta_value"] = currency.text.strip() if currency else None
-                except Exception as e:
-                    # Log any exception that occurs during scraping
-                    logger.error(f"Error when tring to get price of advertisement")
-
-                # Iterate through details_divs
-                for details_div in details_divs:
-
-                    title = details_div.find('p', {'class': 'e18eslyg4 ooa-12b2ph5'}).text.strip()
-                    try:
-                        if title == 'Marka pojazdu':
-                            single_ad_dict["marka_value"] = details_div.find(
-                                'p', {'class': 'e16lfxpc0 ooa-1pe3502 er34gjf0'}
-                            ).text.strip()
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get brand of car")
-
-                    try:
-                        if title == 'Model pojazdu':
-                            single_ad_dict["model_value"] = details_div.find(
-                                'p', {'class': 'e16lfxpc0 ooa-1pe3502 er34gjf0'}
-                            ).text.strip()
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get model of car")
-
-                    try:
-                        if title == 'Rok produkcji':
-                            single_ad_dict["rok_produkcji_value"] = int(
-                                details_div.find('p', {'class': 'e16lfxpc0 ooa-1pe3502 er34gjf0'}).text.strip()
-                            )
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get year of production of car")
-
-                    try:
-                        if title == 'Przebieg':
-                            single_ad_dict["przebieg_value"] = float(
-                                details_div.find('p', {'class': 'e16lfxpc0 ooa-1pe3502 er34gjf0'}).text.strip().replace(" ",
-                                                                                                                       "").replace(
-                                    "km", "")
-                            )
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get mileage of car")
-
-                    try:
-                        if title == 'Pojemność skokowa':
-                            single_ad_dict["pojemnosc_value"] = details_div.find(
-                                'p', {'class': 'e16lfxpc0 ooa-1pe3502 er34gjf0'}
-                            ).text.strip().replace(" ", "").replace("cm3", "")
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get capacity of car")
-
-                    try:
-                        if title == 'Moc':
-                            single_ad_dict["moc_value"] = float(
-                                details_div.find('p', {'class': 'e16lfxpc0 ooa-1pe3502 er34gjf0'}).text.strip().replace("KM",
-                                                                                                                           "").replace(
-                                    " ", "")
-                            )
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get power of car")
-
-                    try:
-                        if title == 'Typ nadwozia':
-                            single_ad_dict["typ_nadwozia_value"] = details_div.find(
-                                'a', {'class': 'e16lfxpc1 ooa-1ftbcn2'}
-                            ).text.strip()
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get type of body of car")
-
-                    try:
-                        if title == 'Liczba drzwi':
-                            single_ad_dict["liczba_drzwi_value"] = details_div.find(
-                                'p', {'class': 'e16lfxpc0 ooa-1pe3502 er34gjf0'}
-                            ).text.strip()
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get number of doors of car")
-
-                    try:
-                        if title == 'Liczba miejsc':
-                            single_ad_dict["liczba_miejsc_value"] = details_div.find(
-                                'p', {'class': 'e16lfxpc0 ooa-1pe3502 er34gjf0'}
-                            ).text.strip()
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get number of seats of car")
-
-                    try:
-                        if title == 'Kolor':
-                            single_ad_dict["kolor_value"] = details_div.find(
-                                'a', {'class': 'e16lfxpc1 ooa-1ftbcn2'}
-                            ).text.strip()
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get color of car")
-
-                    try:
-                        if title == 'Kraj pochodzenia':
-                            single_ad_dict["kraj_pochodzenia_value"] = details_div.find(
-                                'a', {'class': 'e16lfxpc1 ooa-1ftbcn2'}
-                            ).text.strip()
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get country of origin of car")
-
-                    try:
-                        if title == 'Zarejestrowany w Polsce':
-                            single_ad_dict["zarejestrowany_w_polsce_value"] = details_div.find(
-                                'p', {'class': 'e16lfxpc0 ooa-1pe3502 er34gjf0'}
-                            ).text.strip()
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get country of registration of car")
-
-                    try:
-                        if title == 'Stan':
-                            single_ad_dict["stan_value"] = details_div.find(
-                                'a', {'class': 'e16lfxpc1 ooa-1ftbcn2'}
-                            ).text.strip()
-                    except Exception as e:
-                        # Log any exception that occurs during scraping
-                        logger.error(f"Error when tring to get condition of car")
-
-                # Log the resulting dictionary
-                logger.info(single_ad_dict)
+            with timed('extract', PORTAL):
+                single_ad_dict = parse_subpage(subpage_response.text, subpage_url, brand, model)
+
+            if single_ad_dict is not None:
+                store_offer(subpage_url, single_ad_dict, subpage_response.headers, fingerprint)
 
                 return single_ad_dict
 
@@ -246,16 +309,144 @@ def scrape_subpage(subpage_url, brand, model):
         # Log any exception that occurs during scraping
         logger.error(f"Error processing subpage {subpage_url}: {e}")
 
-    # Introduce a random delay between 0.5 and 1.5 seconds
-    delay = random.uniform(0.3, 0.8)
-    time.sleep(delay)
-
     return None
 
 
+def build_main_page_url(
+    brand, model, year_from, year_to, engine_cap_from, engine_cap_to, price_from, price_to,
+    fuel, mileage_from, mileage_to, gearbox, engine_power_from, engine_power_to, town, distance, page_num,
+    order='',
+):
+    """
+    Builds the URL of a page with search results on Otomoto.pl.
+
+    Parameters:
+        Search criteria as in scrape_main_page, the number of the page (page_num) and the sort order
+        of the results (order), one of ORDERS or '' for the portal's default.
+
+    Returns:
+        str: URL of the page with search results.
+    """
+    return (
+        f'https://www.otomoto.pl/osobowe/{brand}/{model}/od-{year_from}/{town}?'
+        f'search%5Bdist%5D={distance}&search%5Bfilter_enum_fuel_type%5D={fuel}&search%5Bfilter_enum_gearbox%5D={gearbox}&'
+        f'search%5Bfilter_float_engine_capacity%3Afrom%5D={engine_cap_from}&search%5Bfilter_float_engine_capacity%3Ato%5D={engine_cap_to}&'
+        f'search%5Bfilter_float_engine_power%3Afrom%5D={engine_power_from}&search%5Bfilter_float_engine_power%3Ato%5D={engine_power_to}&'
+        f'search%5Bfilter_float_mileage%3Afrom%5D={mileage_from}&search%5Bfilter_float_mileage%3Ato%5D={mileage_to}&'
+        f'search%5Bfilter_float_price%3Afrom%5D={price_from}&search%5Bfilter_float_price%3Ato%5D={price_to}&'
+        f'search%5Bfilter_float_year%3Ato%5D={year_to}&page={page_num}'
+        + ORDERS.get(order, '')
+    )
+
+
+def get_max_page(main_page_soup):
+    """
+    Finds the number of pages with search results.
+
+    Parameters:
+        main_page_soup (BeautifulSoup): Parsed page with search results.
+
+    Returns:
+        int: Maximum page number, 1 if the pagination list is missing.
+    """
+    # Find the maximum page number within the provided HTML snippet
+    pagination_list = main_page_soup.find('ul', {'class': 'pagination-list'})
+
+    try:
+        max_page_element = pagination_list.find_all('a', {'class': 'ooa-xdlax9'})[-1]
+        return int(max_page_element.text)
+    except (IndexError, AttributeError, ValueError):
+        logging.warning("Error occurred while extracting max_page. Setting max_page to 1.")
+        return 1
+
+
+def find_offer_links(main_page_soup):
+    """
+    Finds the links to offer subpages on a page with search results.
+
+    Parameters:
+        main_page_soup (BeautifulSoup): Parsed page with search results.
+
+    Returns:
+        dict: First link to every subpage URL, in the order they appear on the page.
+    """
+    offer_links = {}
+
+    # Find and collect links to subpages
+    for subpage_link in main_page_soup.find_all('a', href=True):
+        subpage_url = subpage_link['href']
+
+        # Check if the href attribute contains the desired pattern
+        if subpage_url not in offer_links and 'otomoto.pl/osobowe/oferta/' in subpage_url:
+            offer_links[subpage_url] = subpage_link
+
+    return offer_links
+
+
+def parse_main_page(main_page_html):
+    """
+    Extracts the number of pages and the links to offer subpages from a page with search results.
+
+    Parameters:
+        main_page_html (str): HTML of the page with search results.
+
+    Returns:
+        tuple: Maximum page number, the list of unique subpage URLs in the order they appear on the page
+            and a dictionary mapping every subpage URL to the fingerprint of its listing card.
+    """
+    # Parse the HTML of the current page
+    main_page_soup = make_soup(main_page_html, PORTAL, MAIN_PAGE_STRAINER)
+    offer_links = find_offer_links(main_page_soup)
+    fingerprints = {subpage_url: get_card_fingerprint(link) for subpage_url, link in offer_links.items()}
+
+    return get_max_page(main_page_soup), list(offer_links), fingerprints
+
+
+def parse_listing_page(main_page_html, brand, model):
+    """
+    Extracts the number of pages and an ad from every listing card of a page with search results.
+
+    The ads have the title, price, currency, production year and mileage shown on the cards, the
+    other details are left as None.
+
+    Parameters:
+        main_page_html (str): HTML of the page with search results.
+        brand (str): Brand searched for.
+        model (str): Model searched for.
+
+    Returns:
+        tuple: Maximum page number, the list of unique subpage URLs in the order they appear on the page
+            and a dictionary mapping every subpage URL to the ad built from its listing card and the
+            fingerprint of the card.
+    """
+    # Parse the HTML of the current page
+    main_page_soup = make_soup(main_page_html, PORTAL, MAIN_PAGE_STRAINER)
+    offer_links = find_offer_links(main_page_soup)
+    cards = {}
+
+    for subpage_url, link in offer_links.items():
+        single_ad_dict = new_ad(brand, model, subpage_url, PORTAL)
+        card = link.find_parent('article')
+
+        if card is not None:
+            extract_page_fields(card, CARD_FIELDS, single_ad_dict)
+            extract_labelled_fields(
+                card.find_all('dd', {'data-parameter': True}), get_card_parameter_label, CARD_PARAMETERS, single_ad_dict
+            )
+
+        if single_ad_dict['tytul_value'] is None:
+            single_ad_dict['tytul_value'] = link.get_text(strip=True) or None
+
+        cards[subpage_url] = (single_ad_dict, get_card_fingerprint(link))
+
+    return get_max_page(main_page_soup), list(offer_links), cards
+
+
 def scrape_main_page(
     brand, model, year_from, year_to, engine_cap_from, engine_cap_to, price_from, price_to,
-    fuel, mileage_from, mileage_to, gearbox, engine_power_from, engine_power_to, town, distance
+    fuel, mileage_from, mileage_to, gearbox, engine_power_from, engine_power_to, town, distance,
+    order='', deadline=None, on_ad=None, on_page=None, prefetch=None, fast=False, start=None, limit=None,
+    progress=None, refresh=None,
 ):
     """
     Scrapes car advertisements from Otomoto.pl based on specified search criteria.
@@ -277,79 +468,57 @@ def scrape_main_page(
         engine_power_to (int): Maximum engine power.
         town (str): Location.
         distance (int): Search radius around the specified town.
+        order (str, optional): Sort order of the search results, one of ORDERS or '' for the portal's default.
+        deadline (float, optional): time.monotonic() value after which scraping stops and the ads
+            collected so far are returned.
+        on_ad (callable, optional): Called with every scraped ad as soon as it is ready.
+        on_page (callable, optional): Called with the page number and max_page of every fetched page
+            with search results.
+        prefetch (bool, optional): Request pages 2..max_page in parallel once page 1 is known,
+            None to use the SCRAPER_PREFETCH_PAGES setting.
+        fast (bool, optional): Build the ads from the listing cards without downloading the offer subpages.
+        start (tuple, optional): Page number and position on the page of the first offer to scrape.
+        limit (int, optional): Number of ads after which no further page is requested.
+        progress (dict, optional): Record of the crawl created by crawler.new_progress.
+        refresh (dict, optional): State of a refresh of a saved search created by crawler.new_refresh,
+            whose unchanged offers are taken from the listing cards without downloading their subpages.
 
     Returns:
         list of dict: List of dictionaries containing information about scraped car advertisements.
     """
-    all_ads = []
-    page_num = 1
-    while True:
-        current_url = (
-            f'https://www.otomoto.pl/osobowe/{brand}/{model}/od-{year_from}/{town}?'
-            f'search%5Bdist%5D={distance}&search%5Bfilter_enum_fuel_type%5D={fuel}&search%5Bfilter_enum_gearbox%5D={gearbox}&'
-            f'search%5Bfilter_float_engine_capacity%3Afrom%5D={engine_cap_from}&search%5Bfilter_float_engine_capacity%3Ato%5D={engine_cap_to}&'
-            f'search%5Bfilter_float_engine_power%3Afrom%5D={engine_power_from}&search%5Bfilter_float_engine_power%3Ato%5D={engine_power_to}&'
-            f'search%5Bfilter_float_mileage%3Afrom%5D={mileage_from}&search%5Bfilter_float_mileage%3Ato%5D={mileage_to}&'
-            f'search%5Bfilter_float_price%3Afrom%5D={price_from}&search%5Bfilter_float_price%3Ato%5D={price_to}&'
-            f'search%5Bfilter_float_year%3Ato%5D={year_to}&page={page_num}'
+    scrape_offer = lambda subpage_url, fingerprint=None: scrape_subpage(
+        subpage_url, brand, model, fingerprint, deadline
+    )
+
+    if refresh is not None:
+        parse_page = lambda main_page_html: parse_listing_page(main_page_html, brand, model)
+        scrape_offer = refresh_listing_card(refresh, scrape_offer)
+    elif fast:
+        parse_page = lambda main_page_html: parse_listing_page(main_page_html, brand, model)
+        scrape_offer = use_listing_card
+    else:
+        parse_page = parse_main_page
+
+    # Bands of a split search narrow down the price and production year of the search
+    def build_url(page_num, price_from=price_from, price_to=price_to, year_from=year_from, year_to=year_to):
+        return build_main_page_url(
+            brand, model, year_from, year_to, engine_cap_from, engine_cap_to, price_from, price_to,
+            fuel, mileage_from, mileage_to, gearbox, engine_power_from, engine_power_to, town, distance, page_num,
+            order,
         )
-        print(current_url)
-
-        # Request the current page
-        main_page_response = requests.get(current_url)
-
-        if main_page_response.status_code == 200:
-            # Parse the HTML of the current page
-            main_page_soup = BeautifulSoup(main_page_response.text, 'html.parser')
-
-            # Find the maximum page number within the provided HTML snippet
-            pagination_list = main_page_soup.find('ul', {'class': 'pagination-list'})
-
-            try:
-                max_page_element = pagination_list.find_all('a', {'class': 'ooa-xdlax9'})[-1]
-                max_page = int(max_page_element.text)
-            except (IndexError, AttributeError, ValueError):
-                max_page = 1
-                logging.warning("Error occurred while extracting max_page. Setting max_page to 1.")
-
-            logging.info(f"Maximum Page Number: {max_page}, actual page: {page_num}")
-            logging.info(f"Using url: {current_url}")
-
-            processed_links = set()
-
-            # Find and iterate through links to subpages
-            subpage_links = main_page_soup.find_all('a', href=True)
-
-            for subpage_link in subpage_links:
-                subpage_url = subpage_link['href']
-
-                # Check if the href attribute contains the desired pattern
-                if subpage_url not in processed_links and 'otomoto.pl/osobowe/oferta/' in subpage_url:
-                    processed_links.add(subpage_url)
-                    # Open and scrape the subpage
-                    subpage_response = requests.get(subpage_url)
-
-                    print(subpage_response)
-
-                    if subpage_response.status_code == 200:
-                        result = scrape_subpage(subpage_url, brand, model)
-                        if result is not None:
-                            all_ads.append(result)
-                        else:
-                            logging.info(f"Failed to fetch details for subpage: {subpage_url}")
-
-            # Increment the page number
-            page_num += 1
-
-            # Check if we reached the maximum page number
-            if page_num > max_page:
-                ads_df = pd.DataFrame(all_ads)
-                logging.info(ads_df)
-                logging.info("Reached maximum page number. Stopping.")
-                break
-
-        else:
-            logging.error(f"Failed to fetch main page. Status code: {main_page_response.status_code}")
-            break
 
-    return all_ads
+    return crawl(
+        PORTAL,
+        build_url,
+        parse_page,
+        scrape_offer,
+        deadline=deadline,
+        on_ad=on_ad,
+        on_page=on_page,
+        prefetch=prefetch,
+        store=not fast,
+        start=start,
+        limit=limit,
+        progress=progress,
+        split={'price_from': price_from, 'price_to': price_to, 'year_from': year_from, 'year_to': year_to},
+    )
@@ -0,0 +1,105 @@
+# Standard Library Imports
+import hashlib
+import logging
+
+# Third-Party Library Imports
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+from django.conf import settings
+
+# Local Imports
+from allcaradshub_app.metrics import timed
+
+# Parser used when a portal has no entry in SCRAPER_PARSERS, and the one used when it is not installed
+DEFAULT_PARSER = 'lxml'
+FALLBACK_PARSER = 'html.parser'
+
+
+def get_parser(portal):
+    """
+    Returns the name of the BeautifulSoup tree builder used for a portal's pages.
+
+    Parameters:
+        portal (str): Name of the portal.
+
+    Returns:
+        str: Name of the parser (e.g., 'lxml', 'html.parser').
+    """
+    return getattr(settings, 'SCRAPER_PARSERS', {}).get(portal, DEFAULT_PARSER)
+
+
+def has_class(attrs, class_name):
+    """
+    Checks whether the raw attributes of a tag seen by a SoupStrainer contain a CSS class.
+
+    Parameters:
+        attrs (dict): Attributes of the tag, where 'class' may be a string or a list.
+        class_name (str): CSS class to look for.
+
+    Returns:
+        bool: True if the tag has the class.
+    """
+    classes = attrs.get('class') or []
+
+    if isinstance(classes, str):
+        classes = classes.split()
+
+    return class_name in classes
+
+
+def make_strainer(match):
+    """
+    Creates a SoupStrainer keeping only the top-level elements matched by a function, with their subtrees.
+
+    Parameters:
+        match (callable): Function taking the name and the raw attributes of a tag and returning a bool.
+
+    Returns:
+        SoupStrainer: Strainer to be passed to make_soup.
+    """
+    return SoupStrainer(match)
+
+
+def make_soup(html, portal, parse_only=None):
+    """
+    Parses a page with the portal's parser, building only the subtrees selected by a strainer.
+
+    Restricted parsing can be switched off with the SCRAPER_RESTRICTED_PARSING setting, in which case
+    the full document is built.
+
+    Parameters:
+        html (str): HTML of the page.
+        portal (str): Name of the portal.
+        parse_only (SoupStrainer, optional): Strainer selecting the parts of the page that are needed.
+
+    Returns:
+        BeautifulSoup: Parsed page.
+    """
+    parser = get_parser(portal)
+
+    if not getattr(settings, 'SCRAPER_RESTRICTED_PARSING', True):
+        parse_only = None
+
+    with timed('parse', portal):
+        try:
+            return BeautifulSoup(html, parser, parse_only=parse_only)
+        except FeatureNotFound:
+            logging.warning(f"Parser {parser} is not installed. Falling back to {FALLBACK_PARSER}.")
+            return BeautifulSoup(html, FALLBACK_PARSER, parse_only=parse_only)
+
+
+def get_card_fingerprint(link):
+    """
+    Returns a fingerprint of the listing card an offer link belongs to.
+
+    The card is the closest <article> around the link (the link itself if there is none), so the
+    fingerprint changes whenever the title, price or any other value shown on the card changes.
+
+    Parameters:
+        link (Tag): Link to the offer subpage found on a page with search results.
+
+    Returns:
+        str: Short hash of the text of the card.
+    """
+    card = link.find_parent('article') or link
+    card_text = card.get_text(' ', strip=True)
+    return hashlib.sha1(card_text.encode('utf-8')).hexdigest()[:16]
@@ -0,0 +1,293 @@
+# Standard Library Imports
+import heapq
+import asyncio
+import logging
+import itertools
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-Party Library Imports
+from django.conf import settings
+
+# Local Imports
+from allcaradshub_app.fetch import deadline_reached
+from allcaradshub_app.metrics import bind_context
+
+# Largest number of pages with search results crawled as one chain, and largest number of bands a
+# search is split into, used when SCRAPER_SPLIT_PAGES and SCRAPER_SPLIT_MAX_BANDS are not configured
+# in settings.py
+DEFAULT_SPLIT_PAGES = 20
+DEFAULT_SPLIT_MAX_BANDS = 16
+
+# Price bands narrower than this are split by production year instead
+MIN_PRICE_BAND = 1000
+
+# Bounds of the open ends of the ranges, used only to find where to split them: the most expensive
+# car the search form accepts and the oldest production year
+PRICE_CEILING = 5000000
+YEAR_FLOOR = 1900
+
+# Criteria of the search a band narrows down
+BAND_CRITERIA = ('price_from', 'price_to', 'year_from', 'year_to')
+
+
+def get_split_pages():
+    """
+    Returns the number of pages with search results above which a search is split into bands.
+
+    Returns:
+        int: SCRAPER_SPLIT_PAGES, 0 to never split searches.
+    """
+    return getattr(settings, 'SCRAPER_SPLIT_PAGES', DEFAULT_SPLIT_PAGES)
+
+
+def to_bound(value):
+    """
+    Converts a bound of a search range sent by the search form to a number.
+
+    Parameters:
+        value: Bound such as '20000', 20000 or '' for an open end.
+
+    Returns:
+        int or None: The bound, None for an open end.
+
+    Raises:
+        ValueError: If the bound is not a number.
+    """
+    if value in (None, ''):
+        return None
+
+    return int(float(value))
+
+
+def get_root_band(criteria):
+    """
+    Returns the band covering a whole search.
+
+    Parameters:
+        criteria (dict): 'price_from', 'price_to', 'year_from' and 'year_to' of the search.
+
+    Returns:
+        dict or None: The bounds as numbers, None for open ends, or None if a bound is not a number
+            and the search cannot be split.
+    """
+    try:
+        return {name: to_bound(criteria.get(name)) for name in BAND_CRITERIA}
+    except (TypeError, ValueError):
+        return None
+
+
+def get_band_params(band):
+    """
+    Returns the search criteria of a band in the form accepted by the portals' URL builders.
+
+    Parameters:
+        band (dict): Bounds of the band.
+
+    Returns:
+        dict: 'price_from', 'price_to', 'year_from' and 'year_to', '' for open ends.
+    """
+    return {name: '' if band[name] is None else band[name] for name in BAND_CRITERIA}
+
+
+def split_band(band):
+    """
+    Splits a band into two disjoint halves of its price range or, once it is narrower than
+    MIN_PRICE_BAND, of its production years.
+
+    Open ends stay open in the outer halves, so no offer outside PRICE_CEILING or YEAR_FLOOR is lost.
+
+    Parameters:
+        band (dict): Bounds of the band.
+
+    Returns:
+        list of dict or None: Lower and upper half, or None if the band cannot be split further.
+    """
+    price_from = band['price_from'] or 0
+    price_to = PRICE_CEILING if band['price_to'] is None else band['price_to']
+
+    if price_to - price_from >= 2 * MIN_PRICE_BAND:
+        middle = (price_from + price_to) // 2
+        return [{**band, 'price_to': middle}, {**band, 'price_from': middle + 1}]
+
+    year_from = YEAR_FLOOR if band['year_from'] is None else band['year_from']
+    year_to = date.today().year if band['year_to'] is None else band['year_to']
+
+    if year_to > year_from:
+        middle = (year_from + year_to) // 2
+        return [{**band, 'year_to': middle}, {**band, 'year_from': middle + 1}]
+
+    return None
+
+
+def new_plan():
+    """
+    Creates the state of a plan: the bands still too large, largest first, and the accepted ones.
+
+    Returns:
+        dict: 'pending' heap of (-max_page, order, band, first page) and 'accepted' list of (band, first page).
+    """
+    return {'pending': [], 'accepted': [], 'order': itertools.count()}
+
+
+def add_band(plan, band, first_page):
+    """
+    Adds a probed band to a plan.
+
+    Parameters:
+        plan (dict): State created by new_plan.
+        band (dict): Bounds of the band.
+        first_page (tuple or None): Parsed first page of the band (max_page, subpage URLs and cards or
+            fingerprints), None if it could not be fetched.
+    """
+    if first_page is None:
+        plan['accepted'].append((band, None))
+        return
+
+    max_page = first_page[0]
+
+    # Bands without offers are not crawled at all
+    if max_page == 0:
+        return
+
+    split_pages = get_split_pages()
+
+    if split_pages and max_page > split_pages:
+        heapq.heappush(plan['pending'], (-max_page, next(plan['order']), band, first_page))
+    else:
+        plan['accepted'].append((band, first_page))
+
+
+def pop_band(plan, deadline=None):
+    """
+    Takes the largest band to split next off a plan.
+
+    Bands that cannot be split further are accepted as they are, with a warning, since the portal
+    may not show all their pages.
+
+    Parameters:
+        plan (dict): State created by new_plan.
+        deadline (float, optional): time.monotonic() value after which no band is split.
+
+    Returns:
+        list of dict or None: Halves of the band to probe, or None when the plan is final.
+    """
+    max_bands = getattr(settings, 'SCRAPER_SPLIT_MAX_BANDS', DEFAULT_SPLIT_MAX_BANDS)
+
+    while plan['pending']:
+        if len(plan['pending']) + len(plan['accepted']) >= max_bands or deadline_reached(deadline):
+            return None
+
+        _, _, band, first_page = heapq.heappop(plan['pending'])
+        halves = split_band(band)
+
+        if halves is not None:
+            return halves
+
+        logging.warning(f"Band {get_band_params(band)} has {first_page[0]} pages and cannot be split further.")
+        plan['accepted'].append((band, first_page))
+
+    return None
+
+
+def finish_plan(plan):
+    """
+    Returns the bands of a plan in ascending order of their bounds.
+
+    Parameters:
+        plan (dict): State created by new_plan.
+
+    Returns:
+        list of tuple: Search criteria of every band (see get_band_params) and its parsed first page.
+    """
+    bands = plan['accepted'] + [(band, first_page) for _, _, band, first_page in plan['pending']]
+    sort_key = lambda item: tuple(-1 if item[0][name] is None else item[0][name] for name in BAND_CRITERIA)
+
+    return [(get_band_params(band), first_page) for band, first_page in sorted(bands, key=sort_key)]
+
+
+def plan_bands(criteria, probe, deadline=None):
+    """
+    Splits a search whose results span more than SCRAPER_SPLIT_PAGES pages into disjoint price or
+    production year bands, each small enough to be crawled as one short chain of pages.
+
+    Bands are probed by fetching their first page, which tells their number of pages and is reused
+    when the band is crawled. The largest band is split first, the halves of a band are probed in
+    parallel, and the plan stops at SCRAPER_SPLIT_MAX_BANDS bands.
+
+    Parameters:
+        criteria (dict): 'price_from', 'price_to', 'year_from' and 'year_to' of the search.
+        probe (callable): Function taking the search criteria of a band and returning its parsed first
+            page, or None if it could not be fetched.
+        deadline (float, optional): time.monotonic() value after which no band is split.
+
+    Returns:
+        list of tuple: Search criteria of every band and its parsed first page, a single band
+            with the criteria of the search when it is not split.
+    """
+    root = get_root_band(criteria)
+
+    if root is None:
+        return [(criteria, probe(criteria))]
+
+    plan = new_plan()
+    add_band(plan, root, probe(get_band_params(root)))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        while True:
+            halves = pop_band(plan, deadline)
+
+            if halves is None:
+                break
+
+            futures = [executor.submit(bind_context(probe), get_band_params(half)) for half in halves]
+
+            for half, future in zip(halves, futures):
+                add_band(plan, half, future.result())
+
+    bands = finish_plan(plan)
+
+    if len(bands) > 1:
+        logging.info(f"Split the search into {len(bands)} bands.")
+
+    return bands
+
+
+async def plan_bands_async(criteria, probe, deadline=None):
+    """
+    Splits a search into bands like plan_bands, probing the bands without blocking the event loop.
+
+    Parameters:
+        criteria (dict): 'price_from', 'price_to', 'year_from' and 'year_to' of the search.
+        probe (callable): Coroutine function taking the search criteria of a band and returning its
+            parsed first page, or None if it could not be fetched.
+        deadline (float, optional): time.monotonic() value after which no band is split.
+
+    Returns:
+        list of tuple: Search criteria of every band and its parsed first page.
+    """
+    root = get_root_band(criteria)
+
+    if root is None:
+        return [(criteria, await probe(criteria))]
+
+    plan = new_plan()
+    add_band(plan, root, await probe(get_band_params(root)))
+
+    while True:
+        halves = pop_band(plan, deadline)
+
+        if halves is None:
+            break
+
+        first_pages = await asyncio.gather(*(probe(get_band_params(half)) for half in halves))
+
+        for half, first_page in zip(halves, first_pages):
+            add_band(plan, half, first_page)
+
+    bands = finish_plan(plan)
+
+    if len(bands) > 1:
+        logging.info(f"Split the search into {len(bands)} bands.")
+
+    return bands
@@ -0,0 +1,530 @@
+# Standard Library Imports
+import math
+import time
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from urllib.parse import urlsplit
+
+# Third-Party Library Imports
+from django.conf import settings
+
+# Local Imports
+from allcaradshub_app import gratka, otomoto
+from allcaradshub_app.crawler import collect_progress, new_progress
+from allcaradshub_app.dedup import deduplicate_ads
+from allcaradshub_app.metrics import bind_context
+from allcaradshub_app.resilience import is_degraded
+
+# Deadline of a single portal in seconds, used when it is not configured in settings.py
+DEFAULT_DEADLINE = 120
+
+# Extra time given to a scraper to return its partial results after its deadline passed
+DEADLINE_GRACE = 5
+
+# Statuses reported for every portal in the search response
+STATUS_COMPLETE = 'complete'
+STATUS_TIMED_OUT = 'timed_out'
+STATUS_FAILED = 'failed'
+STATUS_DEGRADED = 'degraded'
+STATUS_LIMITED = 'limited'
+
+# Search modes: every offer subpage is downloaded, or the ads are built from the listing cards and
+# their details are loaded when asked for
+SEARCH_MODE_FULL = 'full'
+SEARCH_MODE_FAST = 'fast'
+SEARCH_MODES = (SEARCH_MODE_FULL, SEARCH_MODE_FAST)
+
+# Sort order of the portals' search results when a search asks for its cheapest ads only, so the
+# portals can stop at the first pages
+ORDER_PRICE_ASC = 'price_asc'
+
+gearbox_translate_gratka = {
+    'manual': 'manualna',
+    'automatic': 'automatyczna',
+}
+fuel_translate_gratka = {
+    'petrol': 'benzyna',
+    'diesel': 'diesel',
+    'hybrid': 'hybryda',
+    'electric': 'elektryczne',
+}
+
+
+def get_search_mode(data):
+    """
+    Returns the search mode asked for by the search form, falling back to the SCRAPER_SEARCH_MODE setting.
+
+    Parameters:
+        data (dict): Search form data, whose 'searchMode' is 'full' or 'fast'.
+
+    Returns:
+        str: 'full' or 'fast'.
+    """
+    search_mode = str(data.get('searchMode') or '').strip().lower()
+
+    if search_mode in SEARCH_MODES:
+        return search_mode
+
+    return getattr(settings, 'SCRAPER_SEARCH_MODE', SEARCH_MODE_FULL)
+
+
+def get_search_options(data):
+    """
+    Reads the options of a search that may stop early from the search form data.
+
+    Parameters:
+        data (dict): Search form data, whose optional 'limit' is the number of cheapest ads asked for,
+            'timeBudget' the number of seconds the search may take and 'cursor' the position to resume
+            an earlier search at, as returned in its response.
+
+    Returns:
+        dict: 'limit' (int or None), 'time_budget' (float or None) and 'cursor', mapping every portal
+            left to search to the (page number, position) to start at, or None to search all portals
+            from the start.
+
+    Raises:
+        ValueError: If an option is invalid.
+    """
+    limit = data.get('limit')
+    time_budget = data.get('timeBudget')
+
+    if limit in (None, ''):
+        limit = None
+    else:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValueError('The limit must be a whole number.')
+
+        if limit < 1:
+            raise ValueError('The limit must be at least 1.')
+
+    if time_budget in (None, ''):
+        time_budget = None
+    else:
+        try:
+            time_budget = float(time_budget)
+        except (TypeError, ValueError):
+            raise ValueError('The time budget must be a number of seconds.')
+
+        if not math.isfinite(time_budget) or time_budget <= 0:
+            raise ValueError('The time budget must be a positive number of seconds.')
+
+    return {'limit': limit, 'time_budget': time_budget, 'cursor': parse_cursor(data.get('cursor'))}
+
+
+def parse_cursor(cursor):
+    """
+    Validates the cursor of a search resuming an earlier one.
+
+    Parameters:
+        cursor (dict or None): Position of every portal left to search, e.g. {'otomoto': {'page': 3,
+            'position': 12}}, as returned by get_next_cursor.
+
+    Returns:
+        dict or None: (page number, position) of every portal left to search, or None if there is no cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or names an unknown portal.
+    """
+    if cursor in (None, ''):
+        return None
+
+    if not isinstance(cursor, dict):
+        raise ValueError('The cursor must map portals to positions.')
+
+    positions = {}
+
+    for name, position in cursor.items():
+        if name not in PORTALS:
+            raise ValueError(f'The cursor names an unknown portal: {name}.')
+
+        try:
+            page_num, index = int(position['page']), int(position['position'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'The cursor of {name} must have a page and a position.')
+
+        if page_num < 1 or index < 0:
+            raise ValueError(f'The cursor of {name} is out of range.')
+
+        positions[name] = (page_num, index)
+
+    return positions
+
+
+def format_position(position):
+    """
+    Formats the position a portal is resumed at for the search response.
+
+    Parameters:
+        position (tuple or None): Page number and position on the page.
+
+    Returns:
+        dict or None: 'page' and 'position', or None if the portal has nothing left to search.
+    """
+    if position is None:
+        return None
+
+    return {'page': position[0], 'position': position[1]}
+
+
+def get_next_cursor(sources):
+    """
+    Returns the cursor resuming a search where it stopped.
+
+    Parameters:
+        sources (dict): Status of every portal as returned by search_all_portals.
+
+    Returns:
+        dict or None: Position of every portal with offers left, to be sent back as the 'cursor' of
+            the next search, or None if every portal was searched to the end.
+    """
+    cursor = {name: source['cursor'] for name, source in sources.items() if source.get('cursor')}
+    return cursor or None
+
+
+def get_price_key(ad):
+    """
+    Returns the key ads are ordered by when the cheapest ones are selected.
+
+    Parameters:
+        ad (dict): Ad dictionary.
+
+    Returns:
+        float: Price of the ad, ads without a price come last.
+    """
+    price = ad.get('cena_value')
+    return math.inf if price is None else price
+
+
+def merge_portal_results(portal_ads, sources, progresses, starts, limit):
+    """
+    Combines the ads of every searched portal into the results of a search.
+
+    Unless the search may stop early, every portal contributes the ads it returned. Otherwise every
+    portal contributes its ads up to the first offer it did not get to, in the order of its pages, and
+    a limited search keeps at most limit of the cheapest ads of all portals, merged by price from the
+    portals' sorted lists. A portal always contributes the offers of its pages up to the last one
+    selected, so a promoted offer listed before cheaper ones comes along with them. The position of
+    the first offer a portal did not contribute is its 'cursor'.
+
+    Parameters:
+        portal_ads (dict): Ads returned by every searched portal.
+        sources (dict): Status of every portal, updated with its number of ads and cursor.
+        progresses (dict or None): Record of the crawl of every searched portal (see crawler.new_progress),
+            None when the search cannot stop early.
+        starts (dict): (page number, position) every searched portal started at.
+        limit (int or None): Number of cheapest ads asked for.
+
+    Returns:
+        list of dict: Ads of all portals, cheapest first in a limited search.
+    """
+    if progresses is None:
+        for name, ads in portal_ads.items():
+            sources[name]['ads'] = len(ads)
+
+        return [ad for ads in portal_ads.values() for ad in ads]
+
+    tracked = {name: collect_progress(progress, starts.get(name)) for name, progress in progresses.items()}
+    taken = {name: len(entries) for name, (entries, _) in tracked.items()}
+
+    if limit is None:
+        list_of_ads = [ad for entries, _ in tracked.values() for _, ad in entries]
+    else:
+        # Promoted offers break the price order of a portal's pages, so its entries are sorted first
+        merged = heapq.merge(*(
+            sorted((get_price_key(ad), name, index) for index, (_, ad) in enumerate(entries))
+            for name, (entries, _) in tracked.items()
+        ))
+        taken = {name: 0 for name in tracked}
+        remaining = limit
+
+        # A portal contributes the offers up to the cheapest ones selected, so it is resumed after them
+        for _, name, index in merged:
+            if index < taken[name]:
+                continue
+
+            if index + 1 - taken[name] <= remaining:
+                remaining -= index + 1 - taken[name]
+                taken[name] = index + 1
+
+            if not remaining:
+                break
+
+        selected = sorted(
+            (get_price_key(ad), name, index)
+            for name, (entries, _) in tracked.items() for index, (_, ad) in enumerate(entries[:taken[name]])
+        )
+        list_of_ads = [tracked[name][0][index][1] for _, name, index in selected]
+
+    for name, (entries, resume) in tracked.items():
+        position = entries[taken[name]][0] if taken[name] < len(entries) else resume
+        sources[name]['ads'] = taken[name]
+        sources[name]['cursor'] = format_position(position)
+
+        if position is not None and sources[name]['status'] == STATUS_COMPLETE:
+            sources[name]['status'] = STATUS_LIMITED
+
+        # A portal that got to its last offer just as its deadline passed has nothing left to resume
+        if position is None and sources[name]['status'] == STATUS_TIMED_OUT:
+            sources[name]['status'] = STATUS_COMPLETE
+
+    return list_of_ads
+
+
+def get_search_params(data):
+    """
+    Builds the search parameters shared by all portals from the JSON data posted by the search form.
+
+    Parameters:
+        data (dict): Search form data (e.g., 'brand', 'model', 'yearFrom', 'priceTo', 'fuelType').
+
+    Returns:
+        dict: Keyword arguments accepted by every scrape_main_page function.
+    """
+    return {
+        'brand': data.get('brand', '').lower(),
+        'model': data.get('model', '').lower(),
+        'year_from': data.get('yearFrom', ''),
+        'year_to': data.get('yearTo', ''),
+        'engine_cap_from': data.get('engineCapFrom', ''),
+        'engine_cap_to': data.get('engineCapTo', ''),
+        'price_from': data.get('priceFrom', ''),
+        'price_to': data.get('priceTo', ''),
+        'fuel': data.get('fuelType', ''),
+        'mileage_from': data.get('mileageFrom', ''),
+        'mileage_to': data.get('mileageTo', ''),
+        'gearbox': data.get('gearboxType', ''),
+        'engine_power_from': data.get('enginePowerFrom', ''),
+        'engine_power_to': data.get('enginePowerTo', ''),
+        'town': data.get('town', ''),
+        'distance': data.get('distanceFromTown', ''),
+        # 'voivodship': data.get('voivodship', ''),
+    }
+
+
+def get_gratka_params(data):
+    """
+    Builds the search parameters for Gratka.pl, which uses Polish names of fuel and gearbox types.
+
+    Parameters:
+        data (dict): Search form data.
+
+    Returns:
+        dict: Keyword arguments for gratka.scrape_main_page.
+    """
+    params = get_search_params(data)
+    params['fuel'] = fuel_translate_gratka.get(data.get('fuelType', ''))
+    params['gearbox'] = gearbox_translate_gratka.get(data.get('gearboxType', ''))
+    return params
+
+
+# Every portal is searched through the same interface: a function building its search parameters
+# from the form data, a scrape_main_page function accepting them plus deadline and on_ad, and the
+# portal module itself, whose URL builder and parsers are reused by the asyncio engine. The domain
+# tells which portal an offer URL belongs to.
+PORTALS = {
+    gratka.PORTAL: {
+        'get_params': get_gratka_params,
+        'scrape': gratka.scrape_main_page,
+        'module': gratka,
+        'domain': 'gratka.pl',
+    },
+    otomoto.PORTAL: {
+        'get_params': get_search_params,
+        'scrape': otomoto.scrape_main_page,
+        'module': otomoto,
+        'domain': 'otomoto.pl',
+    },
+}
+
+
+def get_portal_of_url(url):
+    """
+    Returns the portal an offer URL belongs to.
+
+    Parameters:
+        url (str): URL of a car advertisement subpage.
+
+    Returns:
+        str or None: Name of the portal, or None if the URL does not belong to any of them.
+    """
+    parts = urlsplit(url)
+
+    if parts.scheme not in ('http', 'https'):
+        return None
+
+    host = (parts.hostname or '').lower()
+
+    for name, portal in PORTALS.items():
+        if host == portal['domain'] or host.endswith('.' + portal['domain']):
+            return name
+
+    return None
+
+
+def get_deadline(portal):
+    """
+    Returns the number of seconds a portal is given to finish its part of a search.
+
+    Parameters:
+        portal (str): Name of the portal.
+
+    Returns:
+        float: Deadline of the portal in seconds.
+    """
+    return getattr(settings, 'SCRAPER_DEADLINES', {}).get(portal, DEFAULT_DEADLINE)
+
+
+def get_search_deadline(portal, started, time_budget=None):
+    """
+    Returns the time a portal has to finish its part of a search by.
+
+    Parameters:
+        portal (str): Name of the portal.
+        started (float): time.monotonic() value the search started at.
+        time_budget (float, optional): Number of seconds the whole search may take.
+
+    Returns:
+        float: time.monotonic() value of the deadline, the earlier of the portal's and the budget's.
+    """
+    deadline = started + get_deadline(portal)
+
+    if time_budget is not None:
+        deadline = min(deadline, started + time_budget)
+
+    return deadline
+
+
+def search_all_portals(data, on_ad=None, on_page=None, refresh=None):
+    """
+    Searches all portals concurrently, each within its own deadline.
+
+    The response time is bounded by the slowest portal (or its deadline) instead of the sum of all
+    portals. A portal that hits its deadline contributes the ads scraped so far. A portal whose
+    circuit breaker is open is not searched at all, and one whose breaker opened during the search
+    contributes the ads scraped until then; both are reported as degraded. In the fast search mode
+    the ads are built from the listing cards without downloading the offer subpages.
+
+    A search asking for its cheapest ads only has the portals sort their results by price and stop
+    requesting pages once they have enough, and a time budget brings every deadline forward. Such
+    searches report the position every portal stopped at as its cursor, which a following search
+    resumes at (see get_search_options).
+
+    Parameters:
+        data (dict): Search form data.
+        on_ad (callable, optional): Called with every scraped ad as soon as it is ready.
+        on_page (callable, optional): Called with the name of the portal, the page number and max_page
+            of every fetched page with search results.
+        refresh (dict, optional): State of a refresh of a saved search created by crawler.new_refresh,
+            shared by all portals, so only offers new or changed since its previous run are downloaded.
+
+    Returns:
+        tuple: List of ads from all portals, with cross-portal duplicates merged, and a dictionary
+            mapping every portal to its status ('complete', 'limited', 'timed_out', 'failed' or
+            'degraded'), number of ads, elapsed time in seconds and cursor.
+
+    Raises:
+        ValueError: If an option of get_search_options is invalid.
+    """
+    started = time.monotonic()
+    options = get_search_options(data)
+    executor = ThreadPoolExecutor(max_workers=len(PORTALS))
+    partial_ads = {name: [] for name in PORTALS}
+    partial_lock = threading.Lock()
+    finished = {}
+    futures = {}
+
+    def make_collector(name):
+        def collect(ad):
+            with partial_lock:
+                partial_ads[name].append(ad)
+
+            if on_ad is not None:
+                on_ad(ad)
+
+        return collect
+
+    def make_page_reporter(name):
+        if on_page is None:
+            return None
+
+        return lambda page_num, max_page: on_page(name, page_num, max_page)
+
+    portal_ads = {}
+    sources = {}
+    fast = get_search_mode(data) == SEARCH_MODE_FAST
+    cursor = options['cursor']
+    starts = cursor or {}
+    resumable = options['limit'] is not None or options['time_budget'] is not None or cursor is not None
+    progresses = {} if resumable else None
+
+    for name, portal in PORTALS.items():
+        # A resumed search only searches the portals that had offers left
+        if cursor is not None and name not in cursor:
+            sources[name] = {'status': STATUS_COMPLETE, 'ads': 0, 'elapsed': 0.0, 'cursor': None}
+            continue
+
+        if is_degraded(name):
+            logging.warning(f"Skipping portal {name}, its circuit breaker is open.")
+            sources[name] = {
+                'status': STATUS_DEGRADED, 'ads': 0, 'elapsed': 0.0,
+                'cursor': format_position(starts.get(name, (1, 0))) if resumable else None,
+            }
+            continue
+
+        deadline = get_search_deadline(name, started, options['time_budget'])
+        params = portal['get_params'](data)
+
+        if options['limit'] is not None:
+            params['order'] = ORDER_PRICE_ASC
+
+        if resumable:
+            progresses[name] = new_progress()
+
+        future = executor.submit(
+            bind_context(portal['scrape']), **params, deadline=deadline, on_ad=make_collector(name),
+            on_page=make_page_reporter(name), fast=fast, start=starts.get(name), limit=options['limit'],
+            progress=progresses[name] if resumable else None, refresh=refresh,
+        )
+        future.add_done_callback(lambda _, name=name: finished.setdefault(name, time.monotonic()))
+        futures[name] = (future, deadline)
+
+    for name, (future, deadline) in futures.items():
+        try:
+            ads = future.result(timeout=max(0, deadline - time.monotonic()) + DEADLINE_GRACE)
+            status = STATUS_TIMED_OUT if finished.get(name, time.monotonic()) >= deadline else STATUS_COMPLETE
+        except TimeoutError:
+            logging.warning(f"Portal {name} did not finish within its deadline. Using partial results.")
+            status = STATUS_TIMED_OUT
+        except Exception as e:
+            logging.error(f"Portal {name} failed: {e}")
+            status = STATUS_FAILED
+
+        if status != STATUS_COMPLETE:
+            with partial_lock:
+                ads = list(partial_ads[name])
+
+        # Requests refused by the circuit breaker leave the results incomplete whatever the status
+        if is_degraded(name):
+            status = STATUS_DEGRADED
+
+        portal_ads[name] = ads
+        sources[name] = {
+            'status': status,
+            'ads': len(ads),
+            'elapsed': round(finished.get(name, time.monotonic()) - started, 2),
+            'cursor': None,
+        }
+
+    # Do not wait for scrapers that overran their deadline
+    executor.shutdown(wait=False)
+
+    list_of_ads = merge_portal_results(portal_ads, sources, progresses, starts, options['limit'])
+
+    # The same car is often listed on more than one portal
+    list_of_ads = deduplicate_ads(list_of_ads)
+
+    return list_of_ads, sources
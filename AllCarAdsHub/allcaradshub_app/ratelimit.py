@@ -0,0 +1,235 @@
+# Standard Library Imports
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Third-Party Library Imports
+from django.conf import settings
+
+# Limits of hosts missing from SCRAPER_RATE_LIMITS: requests per second and number of requests sent at once
+DEFAULT_RATE_LIMIT = {'rate': 5.0, 'burst': 10}
+
+# Longest pause in seconds taken after a 429 or 503 response, whatever its Retry-After header asks for
+DEFAULT_MAX_RETRY_AFTER = 60
+
+# Status codes by which a host asks to slow down
+THROTTLE_STATUS_CODES = (429, 503)
+
+# A throttled host gets half of its current rate, and every other response gives back 5% of its configured
+# rate, so the rate settles just below what the host tolerates
+BACKOFF_FACTOR = 0.5
+RECOVERY_STEP = 0.05
+MIN_RATE = 0.1
+
+# One token bucket per host, shared by every search and engine running in this process
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_host(url):
+    """
+    Returns the host a URL is rate limited by.
+
+    Parameters:
+        url (str): URL of a request.
+
+    Returns:
+        str: Host name of the URL in lowercase.
+    """
+    return urlsplit(url).netloc.lower()
+
+
+def get_host_limits(host):
+    """
+    Returns the configured rate and burst of a host.
+
+    Parameters:
+        host (str): Host name.
+
+    Returns:
+        dict: 'rate' in requests per second and 'burst', the number of requests that can be sent at once.
+    """
+    limits = getattr(settings, 'SCRAPER_RATE_LIMITS', {}).get(host)
+
+    if limits is None:
+        limits = getattr(settings, 'SCRAPER_RATE_LIMIT_DEFAULT', DEFAULT_RATE_LIMIT)
+
+    return {'rate': float(limits['rate']), 'burst': float(limits['burst'])}
+
+
+def get_bucket(host):
+    """
+    Returns the token bucket of a host, creating a full one on first use. Must be called with the lock held.
+
+    Parameters:
+        host (str): Host name.
+
+    Returns:
+        dict: 'tokens', 'updated' (time.monotonic() value the tokens were counted at), the configured
+            'max_rate' and 'burst', and the current 'rate'.
+    """
+    bucket = _buckets.get(host)
+
+    if bucket is None:
+        limits = get_host_limits(host)
+        bucket = {
+            'tokens': limits['burst'],
+            'updated': time.monotonic(),
+            'max_rate': limits['rate'],
+            'burst': limits['burst'],
+            'rate': limits['rate'],
+        }
+        _buckets[host] = bucket
+
+    return bucket
+
+
+def refill_bucket(bucket, now):
+    """
+    Adds the tokens earned since the bucket was last counted. Must be called with the lock held.
+
+    The bucket is not refilled while its host asked for a pause.
+
+    Parameters:
+        bucket (dict): Token bucket returned by get_bucket.
+        now (float): Current time.monotonic() value.
+    """
+    if now > bucket['updated']:
+        refilled = bucket['tokens'] + (now - bucket['updated']) * bucket['rate']
+        bucket['tokens'] = min(bucket['burst'], refilled)
+        bucket['updated'] = now
+
+
+def reserve_request(url):
+    """
+    Takes a token from the bucket of the URL's host and returns how long to wait before using it.
+
+    Tokens may be taken in advance, leaving the bucket in debt, so concurrent callers are spread
+    evenly over time instead of all retrying at once.
+
+    Parameters:
+        url (str): URL of the request about to be sent.
+
+    Returns:
+        float: Number of seconds to wait before sending the request.
+    """
+    with _buckets_lock:
+        bucket = get_bucket(get_host(url))
+        now = time.monotonic()
+        refill_bucket(bucket, now)
+        bucket['tokens'] -= 1
+
+        return max(0.0, bucket['updated'] - now) + max(0.0, -bucket['tokens']) / bucket['rate']
+
+
+def wait_for_turn(url):
+    """
+    Blocks the calling thread until the rate limit of the URL's host allows a request.
+
+    Parameters:
+        url (str): URL of the request about to be sent.
+    """
+    delay = reserve_request(url)
+
+    if delay > 0:
+        time.sleep(delay)
+
+
+async def wait_for_turn_async(url):
+    """
+    Waits without blocking the event loop until the rate limit of the URL's host allows a request.
+
+    Parameters:
+        url (str): URL of the request about to be sent.
+    """
+    delay = reserve_request(url)
+
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+def get_retry_after(headers):
+    """
+    Reads the Retry-After header of a response.
+
+    Parameters:
+        headers (Mapping): Response headers.
+
+    Returns:
+        float or None: Number of seconds to wait, or None if the header is missing or malformed.
+    """
+    value = headers.get('Retry-After') if headers is not None else None
+
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def report_response(url, status_code, headers=None):
+    """
+    Adapts the rate of the URL's host to a response.
+
+    A 429 or 503 response halves the rate and pauses the host for the time given by Retry-After,
+    or for the time of one request at the new rate. Any other response moves the rate back towards
+    the configured one.
+
+    Parameters:
+        url (str): URL of the request.
+        status_code (int): Status code of the response.
+        headers (Mapping, optional): Response headers.
+    """
+    host = get_host(url)
+
+    with _buckets_lock:
+        bucket = get_bucket(host)
+
+        if status_code not in THROTTLE_STATUS_CODES:
+            if bucket['rate'] < bucket['max_rate']:
+                bucket['rate'] = min(bucket['max_rate'], bucket['rate'] + bucket['max_rate'] * RECOVERY_STEP)
+            return
+
+        now = time.monotonic()
+        refill_bucket(bucket, now)
+        bucket['rate'] = max(MIN_RATE, bucket['rate'] * BACKOFF_FACTOR)
+        retry_after = get_retry_after(headers)
+
+        if retry_after is None:
+            retry_after = 1 / bucket['rate']
+
+        retry_after = min(retry_after, getattr(settings, 'SCRAPER_RATE_LIMIT_MAX_RETRY_AFTER', DEFAULT_MAX_RETRY_AFTER))
+
+        # New requests wait for the pause and for the requests already waiting in the bucket's debt
+        bucket['updated'] = max(bucket['updated'], now + retry_after)
+        bucket['tokens'] = min(bucket['tokens'], 0.0)
+        rate = bucket['rate']
+
+    logging.warning(
+        f"Host {host} answered {status_code}, pausing for {retry_after:.1f}s "
+        f"and lowering its rate to {rate:.2f} requests per second."
+    )
+
+
+def reset_buckets():
+    """
+    Forgets the token buckets of all hosts, so the next requests start from the configured limits.
+    """
+    with _buckets_lock:
+        _buckets.clear()
@@ -0,0 +1,184 @@
+# Standard Library Imports
+import math
+from dataclasses import dataclass, fields
+
+# Third-Party Library Imports
+import numpy as np
+
+# Local Imports
+from allcaradshub_app.store import AD_FIELDS, INTEGER_FIELDS, to_integer, to_number
+
+
+@dataclass(slots=True)
+class AdRecord:
+    """
+    Ad with typed fields, named like the fields of the Ad model.
+
+    Numbers are normalized whatever the portal or extraction they were scraped with: the price is
+    a float and the other numeric fields are integers, None when missing or malformed.
+    """
+    marka: str = None
+    model: str = None
+    cena: float = None
+    waluta: str = None
+    rok_produkcji: int = None
+    przebieg: int = None
+    pojemnosc: int = None
+    moc: int = None
+    typ_nadwozia: str = None
+    liczba_drzwi: int = None
+    liczba_miejsc: int = None
+    kolor: str = None
+    kraj_pochodzenia: str = None
+    zarejestrowany_w_polsce: str = None
+    stan: str = None
+    lokalizacja: str = None
+    tytul: str = None
+    url: str = None
+    strona: str = None
+    oferty: list = None
+
+    @classmethod
+    def from_dict(cls, ad):
+        """
+        Builds a record from an ad dictionary produced by the scrapers.
+
+        Parameters:
+            ad (dict): Ad with '<field>_value' keys.
+
+        Returns:
+            AdRecord: Record with normalized numeric fields.
+        """
+        values = {}
+
+        for field in RECORD_FIELDS:
+            value = ad.get(f'{field}_value')
+
+            if field in INTEGER_FIELDS:
+                value = to_integer(value)
+            elif field in FLOAT_FIELDS:
+                value = to_number(value)
+
+            values[field] = value
+
+        return cls(**values)
+
+    def to_dict(self):
+        """
+        Returns the ad dictionary of a record, as sent to the browser.
+
+        Returns:
+            dict: Ad with '<field>_value' keys, 'oferty_value' only for ads offered on several portals.
+        """
+        ad = {f'{field}_value': getattr(self, field) for field in AD_FIELDS}
+
+        if self.oferty is not None:
+            ad['oferty_value'] = self.oferty
+
+        return ad
+
+
+# Fields of a record in the order they are shown, and those stored as floats in a table
+RECORD_FIELDS = tuple(field.name for field in fields(AdRecord))
+FLOAT_FIELDS = {'cena'}
+NUMERIC_FIELDS = [field for field in RECORD_FIELDS if field in FLOAT_FIELDS or field in INTEGER_FIELDS]
+
+
+def build_table(list_of_ads):
+    """
+    Builds the columnar table of a result set, holding every field of the ads in one array.
+
+    Numeric fields are float arrays with NaN for missing values, so they can be filtered, sorted and
+    aggregated without converting every ad, and the other fields are object arrays. A number takes
+    8 bytes of an array instead of a Python object and a dictionary slot per ad.
+
+    Parameters:
+        list_of_ads (iterable of dict or AdRecord): Ads of the result set.
+
+    Returns:
+        dict: 'size', the number of ads, and 'columns', the array of every field of RECORD_FIELDS.
+    """
+    records = [ad if isinstance(ad, AdRecord) else AdRecord.from_dict(ad) for ad in list_of_ads]
+    columns = {}
+
+    for field in RECORD_FIELDS:
+        values = [getattr(record, field) for record in records]
+
+        if field in NUMERIC_FIELDS:
+            columns[field] = np.array(values, dtype=float)
+        else:
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            columns[field] = column
+
+    return {'size': len(records), 'columns': columns}
+
+
+def get_all_rows(table):
+    """
+    Returns the positions of every ad of a table.
+
+    Parameters:
+        table (dict): Table built by build_table.
+
+    Returns:
+        np.ndarray: Positions 0 to the number of ads.
+    """
+    return np.arange(table['size'])
+
+
+def get_column_values(table, field, rows):
+    """
+    Returns the values of a field for some ads of a table as Python objects.
+
+    Parameters:
+        table (dict): Table built by build_table.
+        field (str): Field of RECORD_FIELDS.
+        rows (np.ndarray): Positions of the ads.
+
+    Returns:
+        list: Values of the field, floats for the price, integers for the other numeric fields and
+            None for missing values.
+    """
+    values = table['columns'][field][rows]
+
+    if field not in NUMERIC_FIELDS:
+        return values.tolist()
+
+    convert = int if field in INTEGER_FIELDS else float
+    return [None if math.isnan(value) else convert(value) for value in values.tolist()]
+
+
+def iter_records(table, rows=None):
+    """
+    Yields the records of some ads of a table.
+
+    Parameters:
+        table (dict): Table built by build_table.
+        rows (np.ndarray, optional): Positions of the ads, every ad by default.
+
+    Yields:
+        AdRecord: Record of every ad, in the order of the positions.
+    """
+    rows = get_all_rows(table) if rows is None else rows
+    columns = [get_column_values(table, field, rows) for field in RECORD_FIELDS]
+
+    for values in zip(*columns):
+        yield AdRecord(*values)
+
+
+def get_rows(table, rows=None):
+    """
+    Returns the ad dictionaries of some ads of a table, such as one page of the results.
+
+    Only the requested ads are converted, column by column, so a page of a large result set costs
+    as much as the page itself.
+
+    Parameters:
+        table (dict): Table built by build_table.
+        rows (np.ndarray, optional): Positions of the ads, every ad by default.
+
+    Returns:
+        list of dict: Ads with '<field>_value' keys, as returned by AdRecord.to_dict.
+    """
+    return [record.to_dict() for record in iter_records(table, rows)]
@@ -0,0 +1,246 @@
+# Standard Library Imports
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+# Third-Party Library Imports
+from django.conf import settings
+
+# Values used when the SCRAPER_RETRY_* and SCRAPER_BREAKER_* settings are not configured in settings.py
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_BREAKER_WINDOW = 60
+DEFAULT_BREAKER_MIN_REQUESTS = 10
+DEFAULT_BREAKER_ERROR_RATE = 0.5
+DEFAULT_BREAKER_COOLDOWN = 30
+
+# Status codes of responses worth retrying, which also count as errors of the portal
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# States of a circuit breaker: requests pass, requests are refused, or a single trial request passes
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+# One circuit breaker per portal, shared by every search and engine running in this process
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class PortalUnavailableError(Exception):
+    """
+    Raised instead of sending a request to a portal whose circuit breaker is open.
+    """
+
+
+def get_retries():
+    """
+    Returns the number of times a failed request is retried, configured with SCRAPER_RETRIES.
+
+    Returns:
+        int: Number of retries after the first attempt.
+    """
+    return getattr(settings, 'SCRAPER_RETRIES', DEFAULT_RETRIES)
+
+
+def get_backoff(attempt):
+    """
+    Returns the pause before retrying a request: exponential backoff with full jitter.
+
+    The pause is drawn at random up to a bound doubling with every attempt, so the threads that
+    failed together do not retry together.
+
+    Parameters:
+        attempt (int): Number of the failed attempt, starting from 0.
+
+    Returns:
+        float: Number of seconds to wait.
+    """
+    base = getattr(settings, 'SCRAPER_RETRY_BACKOFF_BASE', DEFAULT_BACKOFF_BASE)
+    maximum = getattr(settings, 'SCRAPER_RETRY_BACKOFF_MAX', DEFAULT_BACKOFF_MAX)
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+def should_retry(status_code):
+    """
+    Checks whether a response is a transient error worth retrying.
+
+    Parameters:
+        status_code (int): Status code of the response.
+
+    Returns:
+        bool: True for 429 and 5xx gateway and availability errors.
+    """
+    return status_code in RETRY_STATUS_CODES
+
+
+def get_breaker(portal):
+    """
+    Returns the circuit breaker of a portal, creating a closed one on first use. Must be called with the lock held.
+
+    Parameters:
+        portal (str): Name of the portal.
+
+    Returns:
+        dict: 'state', 'outcomes' (deque of time.monotonic() values and success flags of recent
+            requests), 'opened' (time the breaker opened at) and 'trial' (whether a trial request is
+            in flight).
+    """
+    breaker = _breakers.get(portal)
+
+    if breaker is None:
+        breaker = {'state': BREAKER_CLOSED, 'outcomes': deque(), 'opened': None, 'trial': False}
+        _breakers[portal] = breaker
+
+    return breaker
+
+
+def get_breaker_state(portal):
+    """
+    Returns the state of a portal's circuit breaker without changing it.
+
+    Parameters:
+        portal (str): Name of the portal.
+
+    Returns:
+        str: 'closed', 'open' or 'half_open'.
+    """
+    with _breakers_lock:
+        breaker = get_breaker(portal)
+        cooldown = getattr(settings, 'SCRAPER_BREAKER_COOLDOWN', DEFAULT_BREAKER_COOLDOWN)
+
+        if breaker['state'] == BREAKER_OPEN and time.monotonic() - breaker['opened'] >= cooldown:
+            return BREAKER_HALF_OPEN
+
+        return breaker['state']
+
+
+def is_degraded(portal):
+    """
+    Checks whether searches should skip a portal because its circuit breaker is open.
+
+    A portal whose cooldown passed is not degraded, so the next search sends it a trial request.
+
+    Parameters:
+        portal (str): Name of the portal.
+
+    Returns:
+        bool: True if the breaker of the portal is open.
+    """
+    return get_breaker_state(portal) == BREAKER_OPEN
+
+
+def allow_request(portal):
+    """
+    Checks with a portal's circuit breaker whether a request may be sent.
+
+    Once the cooldown of an open breaker passes, a single trial request is let through, and its
+    outcome closes or reopens the breaker.
+
+    Parameters:
+        portal (str): Name of the portal.
+
+    Raises:
+        PortalUnavailableError: If the breaker is open or a trial request is already in flight.
+    """
+    with _breakers_lock:
+        breaker = get_breaker(portal)
+        cooldown = getattr(settings, 'SCRAPER_BREAKER_COOLDOWN', DEFAULT_BREAKER_COOLDOWN)
+
+        if breaker['state'] == BREAKER_OPEN and time.monotonic() - breaker['opened'] >= cooldown:
+            breaker['state'] = BREAKER_HALF_OPEN
+            breaker['trial'] = False
+
+        if breaker['state'] == BREAKER_CLOSED:
+            return
+
+        if breaker['state'] == BREAKER_HALF_OPEN and not breaker['trial']:
+            breaker['trial'] = True
+            return
+
+    raise PortalUnavailableError(f"Portal {portal} is unavailable, skipping the request.")
+
+
+def record_outcome(portal, success):
+    """
+    Records the outcome of a request in a portal's circuit breaker.
+
+    The breaker opens when at least SCRAPER_BREAKER_MIN_REQUESTS requests were sent within the last
+    SCRAPER_BREAKER_WINDOW seconds and the share of failed ones reached SCRAPER_BREAKER_ERROR_RATE.
+    The outcome of a trial request closes or reopens the breaker.
+
+    Parameters:
+        portal (str): Name of the portal.
+        success (bool): Whether the request got a response that is not a transient error.
+    """
+    window = getattr(settings, 'SCRAPER_BREAKER_WINDOW', DEFAULT_BREAKER_WINDOW)
+    min_requests = getattr(settings, 'SCRAPER_BREAKER_MIN_REQUESTS', DEFAULT_BREAKER_MIN_REQUESTS)
+    error_rate = getattr(settings, 'SCRAPER_BREAKER_ERROR_RATE', DEFAULT_BREAKER_ERROR_RATE)
+    now = time.monotonic()
+
+    with _breakers_lock:
+        breaker = get_breaker(portal)
+        outcomes = breaker['outcomes']
+
+        if breaker['state'] == BREAKER_HALF_OPEN:
+            breaker['trial'] = False
+            outcomes.clear()
+
+            if success:
+                breaker['state'] = BREAKER_CLOSED
+                logging.info(f"Portal {portal} recovered, closing its circuit breaker.")
+            else:
+                breaker['state'] = BREAKER_OPEN
+                breaker['opened'] = now
+                logging.warning(f"Trial request to portal {portal} failed, keeping its circuit breaker open.")
+
+            return
+
+        if breaker['state'] == BREAKER_OPEN:
+            return
+
+        outcomes.append((now, success))
+
+        while outcomes and outcomes[0][0] < now - window:
+            outcomes.popleft()
+
+        failures = sum(1 for _, outcome in outcomes if not outcome)
+
+        if len(outcomes) >= min_requests and failures / len(outcomes) >= error_rate:
+            breaker['state'] = BREAKER_OPEN
+            breaker['opened'] = now
+            logging.warning(
+                f"Portal {portal} failed {failures} of its last {len(outcomes)} requests, opening its circuit breaker."
+            )
+
+
+def abandon_request(portal):
+    """
+    Records in a portal's circuit breaker that a request ended without an outcome.
+
+    A request cancelled by the deadline of its search, or interrupted by an unexpected exception,
+    says nothing about the portal and is not counted. An abandoned trial request reopens the breaker
+    though, since only the outcome of the trial lets the next one through.
+
+    Parameters:
+        portal (str): Name of the portal.
+    """
+    with _breakers_lock:
+        breaker = get_breaker(portal)
+
+        if breaker['state'] == BREAKER_HALF_OPEN and breaker['trial']:
+            breaker['state'] = BREAKER_OPEN
+            breaker['opened'] = time.monotonic()
+            breaker['trial'] = False
+            logging.warning(f"Trial request to portal {portal} was abandoned, keeping its circuit breaker open.")
+
+
+def reset_breakers():
+    """
+    Closes the circuit breakers of all portals and forgets their recent requests.
+    """
+    with _breakers_lock:
+        _breakers.clear()
\ No newline at end of file
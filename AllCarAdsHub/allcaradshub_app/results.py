@@ -0,0 +1,351 @@
+# Standard Library Imports
+import math
+import time
+
+# Third-Party Library Imports
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+# Local Imports
+from allcaradshub_app.records import build_table, get_all_rows, get_rows
+from allcaradshub_app.search_cache import get_search_id
+from allcaradshub_app.store import to_number
+
+# Alias of the cache configured in settings.CACHES that holds the result sets browsed by the results API
+RESULTS_CACHE = 'result_sets'
+
+# Page sizes of the results API, used when not configured in settings.py
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_MAX_PAGE_SIZE = 200
+
+# Fields filtered with <field>_min and <field>_max
+RANGE_FILTER_FIELDS = ['cena', 'rok_produkcji', 'przebieg', 'pojemnosc', 'moc']
+
+# Fields filtered by one or more exact values, compared case-insensitively (e.g., strona=gratka&strona=otomoto)
+EXACT_FILTER_FIELDS = ['strona', 'marka', 'model', 'waluta', 'typ_nadwozia', 'kolor', 'stan']
+
+# Fields the results can be sorted by
+SORT_FIELDS = RANGE_FILTER_FIELDS + ['tytul', 'strona', 'lokalizacja']
+
+
+def get_result_key(result_id):
+    """
+    Returns the cache key of a result set.
+
+    Parameters:
+        result_id (str): ID of the result set.
+
+    Returns:
+        str: Cache key of the result set.
+    """
+    return 'results:' + result_id
+
+
+def store_result_set(data, list_of_ads, sources):
+    """
+    Stores the ads of a search so they can be browsed page by page.
+
+    Unlike the search cache, every result set is stored, including the partial results of a search
+    whose portals timed out. Its ID is the ID of the search, so repeating a search replaces its results.
+    The ads are stored as a columnar table (see build_table), shared by the results, the aggregates
+    and the exports.
+
+    Parameters:
+        data (dict): Search form data.
+        list_of_ads (list of dict): Ads found by the search.
+        sources (dict): Status of every portal as returned by search_all_portals.
+
+    Returns:
+        str: ID of the result set.
+    """
+    result_id = get_search_id(data)
+
+    caches[RESULTS_CACHE].set(get_result_key(result_id), {
+        'created': time.time(),
+        'table': build_table(list_of_ads),
+        'sources': sources,
+    })
+
+    return result_id
+
+
+def get_result_set(result_id):
+    """
+    Returns a stored result set.
+
+    Parameters:
+        result_id (str): ID of the result set.
+
+    Returns:
+        dict or None: 'table' of the ads, 'sources' and 'created', or None if the result set expired.
+    """
+    return caches[RESULTS_CACHE].get(get_result_key(result_id))
+
+
+def get_int_param(query, name, default, minimum=1, maximum=None):
+    """
+    Reads a positive integer query parameter.
+
+    Parameters:
+        query (QueryDict): Query parameters of the request.
+        name (str): Name of the parameter.
+        default (int): Value used when the parameter is missing.
+        minimum (int, optional): Smallest accepted value.
+        maximum (int, optional): Largest accepted value, larger values are clamped to it.
+
+    Returns:
+        int: Value of the parameter.
+
+    Raises:
+        ValueError: If the parameter is not an integer or is smaller than the minimum.
+    """
+    value = query.get(name)
+
+    if value in (None, ''):
+        return default
+
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"Parameter {name} must be an integer.")
+
+    if value < minimum:
+        raise ValueError(f"Parameter {name} must be at least {minimum}.")
+
+    return value if maximum is None else min(value, maximum)
+
+
+def get_range_limits(query):
+    """
+    Reads the range filters from the query parameters.
+
+    Parameters:
+        query (QueryDict): Query parameters of the request.
+
+    Returns:
+        list of tuple: Field, '_min' or '_max' and the limit of every range filter given.
+
+    Raises:
+        ValueError: If a range filter is not a number.
+    """
+    limits = []
+
+    for field in RANGE_FILTER_FIELDS:
+        for suffix in ('_min', '_max'):
+            value = query.get(field + suffix)
+
+            if value in (None, ''):
+                continue
+
+            limit = to_number(value)
+
+            if limit is None:
+                raise ValueError(f"Parameter {field + suffix} must be a number.")
+
+            limits.append((field, suffix, limit))
+
+    return limits
+
+
+def get_filters(query):
+    """
+    Reads the column filters from the query parameters.
+
+    Parameters:
+        query (QueryDict): Query parameters of the request.
+
+    Returns:
+        list of callable: Functions taking a table and returning the mask of its ads matching a filter.
+
+    Raises:
+        ValueError: If a range filter is not a number.
+    """
+    filters = []
+
+    for field, suffix, limit in get_range_limits(query):
+        compare = np.greater_equal if suffix == '_min' else np.less_equal
+
+        # Comparisons with NaN are false, so ads without a value never match a range filter
+        filters.append(
+            lambda table, field=field, compare=compare, limit=limit: compare(table['columns'][field], limit)
+        )
+
+    for field in EXACT_FILTER_FIELDS:
+        values = {value.lower() for value in query.getlist(field) if value}
+
+        if values:
+            filters.append(lambda table, field=field, values=values: get_text_mask(
+                table, field, lambda text: text in values
+            ))
+
+    text = query.get('q', '').strip().lower()
+
+    if text:
+        filters.append(lambda table: get_text_mask(table, 'tytul', lambda title: text in title))
+
+    return filters
+
+
+def get_text_mask(table, field, matches):
+    """
+    Returns the mask of the ads of a table whose text field matches a condition.
+
+    Parameters:
+        table (dict): Table built by build_table.
+        field (str): Text field (e.g., 'strona', 'tytul').
+        matches (callable): Function taking the lowercased text, '' for missing values.
+
+    Returns:
+        np.ndarray: Boolean mask of the ads.
+    """
+    column = table['columns'][field]
+    return np.fromiter((matches(str(value or '').lower()) for value in column), dtype=bool, count=len(column))
+
+
+def filter_rows(table, query):
+    """
+    Finds the ads of a table matching the column filters of the query parameters.
+
+    Parameters:
+        table (dict): Table built by build_table.
+        query (QueryDict): Query parameters of the request.
+
+    Returns:
+        np.ndarray: Positions of the matching ads in the table.
+
+    Raises:
+        ValueError: If a range filter is not a number.
+    """
+    filters = get_filters(query)
+
+    if not filters:
+        return get_all_rows(table)
+
+    mask = np.ones(table['size'], dtype=bool)
+
+    for get_mask in filters:
+        mask &= get_mask(table)
+
+    return np.flatnonzero(mask)
+
+
+def sort_rows(table, rows, sort, descending):
+    """
+    Sorts ads of a table by a field, keeping ads without a value at the end in both directions.
+
+    Ads with equal values keep their order.
+
+    Parameters:
+        table (dict): Table built by build_table.
+        rows (np.ndarray): Positions of the ads to sort.
+        sort (str): Field to sort by (e.g., 'cena', 'przebieg').
+        descending (bool): Whether to sort from the largest value.
+
+    Returns:
+        np.ndarray: Positions of the ads in sorted order.
+    """
+    column = table['columns'][sort][rows]
+
+    if sort in RANGE_FILTER_FIELDS:
+        present = ~np.isnan(column)
+        values = column[present]
+        order = np.argsort(-values if descending else values, kind='stable')
+    else:
+        keys = [str(value or '').lower() for value in column]
+        present = np.array([bool(key) for key in keys], dtype=bool)
+        values = [key for key in keys if key]
+        order = np.array(sorted(range(len(values)), key=values.__getitem__, reverse=descending), dtype=int)
+
+    return np.concatenate([rows[present][order], rows[~present]])
+
+
+def get_sort(query):
+    """
+    Reads the field and direction the results are sorted by from the query parameters.
+
+    Parameters:
+        query (QueryDict): Query parameters of the request.
+
+    Returns:
+        tuple: Field to sort by ('' to keep the order of the search) and whether to sort descending.
+
+    Raises:
+        ValueError: If the field or the direction is invalid.
+    """
+    sort = query.get('sort', '')
+    order = query.get('order', 'asc')
+
+    if sort and sort not in SORT_FIELDS:
+        raise ValueError(f"Cannot sort by {sort}. Choose one of: {', '.join(SORT_FIELDS)}.")
+
+    if order not in ('asc', 'desc'):
+        raise ValueError("Parameter order must be 'asc' or 'desc'.")
+
+    return sort, order == 'desc'
+
+
+def select_rows(table, query):
+    """
+    Finds the ads of a table matching the column filters of the query parameters, in the order asked for.
+
+    Parameters:
+        table (dict): Table built by build_table.
+        query (QueryDict): Query parameters: 'sort', 'order' and the column filters.
+
+    Returns:
+        np.ndarray: Positions of the matching ads in the table.
+
+    Raises:
+        ValueError: If a query parameter is invalid.
+    """
+    sort, descending = get_sort(query)
+    rows = filter_rows(table, query)
+
+    if sort:
+        rows = sort_rows(table, rows, sort, descending)
+
+    return rows
+
+
+def get_results_page(result_id, query):
+    """
+    Filters and sorts a stored result set and returns one page of it.
+
+    Parameters:
+        result_id (str): ID of the result set.
+        query (QueryDict): Query parameters: 'page', 'page_size', 'sort', 'order' ('asc' or 'desc'),
+            range filters such as 'cena_min' or 'przebieg_max', exact filters such as 'strona' and
+            'q' for text in the title.
+
+    Returns:
+        dict or None: The ads of the page with the page number, page size, number of pages, total
+            number of matching ads and number of ads in the result set, or None if the result set expired.
+
+    Raises:
+        ValueError: If a query parameter is invalid.
+    """
+    result_set = get_result_set(result_id)
+
+    if result_set is None:
+        return None
+
+    max_page_size = getattr(settings, 'SCRAPER_RESULTS_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+    page_size = get_int_param(query, 'page_size', DEFAULT_PAGE_SIZE, maximum=max_page_size)
+    page = get_int_param(query, 'page', 1)
+
+    table = result_set['table']
+    rows = select_rows(table, query)
+    total = len(rows)
+    start = (page - 1) * page_size
+
+    return {
+        'result_id': result_id,
+        'page': page,
+        'page_size': page_size,
+        'pages': math.ceil(total / page_size),
+        'total': total,
+        'result_set_size': table['size'],
+        'sources': result_set['sources'],
+        'list_of_ads': get_rows(table, rows[start:start + page_size]),
+    }
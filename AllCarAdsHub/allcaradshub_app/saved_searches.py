@@ -0,0 +1,189 @@
+# Standard Library Imports
+import logging
+from datetime import timedelta
+
+# Third-Party Library Imports
+from django.conf import settings
+from django.utils import timezone
+
+# Local Imports
+from allcaradshub_app.crawler import new_refresh
+from allcaradshub_app.dedup import deduplicate_ads
+from allcaradshub_app.models import SavedSearch
+from allcaradshub_app.portals import STATUS_COMPLETE, get_portal_of_url, search_all_portals
+from allcaradshub_app.records import get_rows
+from allcaradshub_app.results import get_result_set, store_result_set
+
+# Statuses of the offers of a saved search: still listed, or gone since a refresh
+OFFER_ACTIVE = 'active'
+OFFER_REMOVED = 'removed'
+
+# Number of seconds removed offers are remembered, so an offer listed again is not downloaded again
+# if unchanged, used when SCRAPER_SAVED_SEARCH_REMOVED_RETENTION is not configured in settings.py
+DEFAULT_REMOVED_RETENTION = 7 * 86400
+
+# Options of a single run that are not kept with a saved search
+ONE_OFF_OPTIONS = ('cursor', 'name')
+
+
+def create_saved_search(data):
+    """
+    Saves a search and runs it for the first time, downloading every offer it finds.
+
+    Parameters:
+        data (dict): Search form data, with an optional 'name' of the saved search.
+
+    Returns:
+        tuple: The saved search and the response of its first run (see refresh_saved_search).
+    """
+    saved_search = SavedSearch.objects.create(
+        name=str(data.get('name') or '')[:200],
+        params={key: value for key, value in data.items() if key not in ONE_OFF_OPTIONS},
+    )
+
+    return saved_search, refresh_saved_search(saved_search)
+
+
+def find_changes(offers, refresh, sources):
+    """
+    Compares the offers found by a refresh with those of the previous run.
+
+    Offers no longer listed are marked as removed only on portals whose search completed, since a
+    portal that timed out, failed or was limited did not list all of its offers.
+
+    Parameters:
+        offers (dict): Offers of the previous run by their URL, updated in place.
+        refresh (dict): State of the refresh, see crawler.new_refresh.
+        sources (dict): Status of every portal as returned by search_all_portals.
+
+    Returns:
+        dict: URLs of the 'new', 'changed' and 'removed' offers and the number of 'unchanged' ones.
+    """
+    now = timezone.now()
+    changes = {'new': [], 'changed': [], 'removed': [], 'unchanged': 0}
+    complete = {name for name, source in sources.items() if source['status'] == STATUS_COMPLETE}
+
+    for url, fingerprint in refresh['seen'].items():
+        previous = offers.get(url)
+
+        if previous is None or previous['status'] == OFFER_REMOVED:
+            changes['new'].append(url)
+        elif url in refresh['downloaded']:
+            changes['changed'].append(url)
+        else:
+            changes['unchanged'] += 1
+
+        offers[url] = {'fingerprint': fingerprint, 'ad': refresh['ads'][url], 'status': OFFER_ACTIVE}
+
+    retention = getattr(settings, 'SCRAPER_SAVED_SEARCH_REMOVED_RETENTION', DEFAULT_REMOVED_RETENTION)
+
+    for url, offer in list(offers.items()):
+        if url in refresh['seen']:
+            continue
+
+        if offer['status'] == OFFER_ACTIVE and get_portal_of_url(url) in complete:
+            offer.update(status=OFFER_REMOVED, removed=now.isoformat())
+            changes['removed'].append(url)
+        elif offer['status'] == OFFER_REMOVED and offer['removed'] < (now - timedelta(seconds=retention)).isoformat():
+            del offers[url]
+
+    return changes
+
+
+def refresh_saved_search(saved_search):
+    """
+    Runs a saved search again, downloading only the offers that are new or changed since its last run.
+
+    Only the pages with search results are requested for the other offers: an offer whose listing
+    card shows the same price and title keeps its ad, and offers no longer listed are marked as removed.
+    A daily refresh of a search costs its pages with search results plus one request per new or
+    changed offer. The saved search keeps the ID of the result set and the changes, its ads being
+    kept with its offers.
+
+    Parameters:
+        saved_search (SavedSearch): The saved search, updated with the results of the refresh.
+
+    Returns:
+        dict: Fields of the search response ('list_of_ads', 'sources', 'result_id') and the
+            'changes' found by the refresh.
+    """
+    offers = dict(saved_search.offers)
+    refresh = new_refresh(offers)
+
+    list_of_ads, sources = search_all_portals(saved_search.params, refresh=refresh)
+    changes = find_changes(offers, refresh, sources)
+
+    # Offers of portals that did not list all of theirs this time are still shown, merged with
+    # the ads of the other portals they duplicate
+    unseen_ads = [
+        offer['ad'] for url, offer in offers.items()
+        if offer['status'] == OFFER_ACTIVE and url not in refresh['seen']
+    ]
+
+    if unseen_ads:
+        list_of_ads = deduplicate_ads(list_of_ads + unseen_ads)
+
+    result = {
+        'changes': changes,
+        'result_id': store_result_set(saved_search.params, list_of_ads, sources),
+    }
+
+    saved_search.offers = offers
+    saved_search.result = result
+    saved_search.refreshed = timezone.now()
+    saved_search.save(update_fields=['offers', 'result', 'refreshed'])
+
+    logging.info(
+        f"Refreshed saved search {saved_search.pk}: {len(changes['new'])} new, {len(changes['changed'])} changed, "
+        f"{len(changes['removed'])} removed and {changes['unchanged']} unchanged offers, "
+        f"{len(refresh['downloaded'])} subpages requested."
+    )
+
+    return {'list_of_ads': list_of_ads, 'sources': sources, **result}
+
+
+def get_saved_search_ads(saved_search):
+    """
+    Returns the ads of the last run of a saved search.
+
+    Parameters:
+        saved_search (SavedSearch): The saved search, run at least once.
+
+    Returns:
+        list of dict: Ads of its result set while it is stored, otherwise its active offers deduplicated again.
+    """
+    result_set = get_result_set(saved_search.result['result_id'])
+
+    if result_set is not None:
+        return get_rows(result_set['table'])
+
+    return deduplicate_ads([offer['ad'] for offer in saved_search.offers.values() if offer['status'] == OFFER_ACTIVE])
+
+
+def get_saved_search_status(saved_search, with_result=True):
+    """
+    Builds the response describing a saved search.
+
+    Parameters:
+        saved_search (SavedSearch): The saved search.
+        with_result (bool, optional): Include the fields of the response of its last run.
+
+    Returns:
+        dict: ID, name, search parameters, times of creation and last refresh, numbers of active and
+            removed offers and, if asked for, the 'list_of_ads', 'result_id' and 'changes' of the last run.
+    """
+    statuses = [offer['status'] for offer in saved_search.offers.values()]
+    status = {
+        'saved_search_id': str(saved_search.pk),
+        'name': saved_search.name,
+        'params': saved_search.params,
+        'created': saved_search.created.isoformat(),
+        'refreshed': saved_search.refreshed.isoformat() if saved_search.refreshed else None,
+        'active': statuses.count(OFFER_ACTIVE),
+        'removed': statuses.count(OFFER_REMOVED),
+    }
+
+    if with_result and saved_search.result is not None:
+        status.update(saved_search.result, list_of_ads=get_saved_search_ads(saved_search))
+
+    return status
@@ -0,0 +1,156 @@
+# Standard Library Imports
+import json
+import time
+import hashlib
+
+# Third-Party Library Imports
+from django.core.cache import caches
+
+# Local Imports
+from allcaradshub_app.portals import STATUS_COMPLETE, get_search_mode
+
+# Alias of the cache configured in settings.CACHES that holds search results
+SEARCH_CACHE = 'search_results'
+
+# Fields of the search form in the order they are put into the cache key
+SEARCH_FIELDS = [
+    'brand', 'model', 'yearFrom', 'yearTo', 'engineCapFrom', 'engineCapTo', 'priceFrom', 'priceTo',
+    'fuelType', 'mileageFrom', 'mileageTo', 'gearboxType', 'enginePowerFrom', 'enginePowerTo',
+    'town', 'distanceFromTown', 'voivodship',
+]
+
+# Fields compared case-insensitively, like the view lowercases brand and model before scraping
+CASE_INSENSITIVE_FIELDS = {'brand', 'model', 'fuelType', 'gearboxType', 'town', 'voivodship'}
+
+
+def normalize_search_value(field, value):
+    """
+    Converts a value of the search form to its canonical form.
+
+    Missing values, empty strings and nulls (sent by the form for empty number inputs) are all the
+    same search, and so are 2010, 2010.0 and '2010'.
+
+    Parameters:
+        field (str): Name of the search form field.
+        value: Value sent by the search form.
+
+    Returns:
+        str: Canonical value.
+    """
+    if value is None:
+        return ''
+
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    value = str(value).strip()
+
+    try:
+        number = float(value)
+        if number.is_integer():
+            value = str(int(number))
+    except ValueError:
+        pass
+
+    if field in CASE_INSENSITIVE_FIELDS:
+        value = value.lower()
+
+    return value
+
+
+def normalize_search_params(data):
+    """
+    Builds the canonical form of the search parameters posted by the search form.
+
+    Parameters:
+        data (dict): Search form data.
+
+    Returns:
+        dict: Canonical value of every search form field.
+    """
+    params = {field: normalize_search_value(field, data.get(field)) for field in SEARCH_FIELDS}
+
+    # Fast searches return ads without details, so they are cached apart from full ones
+    params['searchMode'] = get_search_mode(data)
+
+    # So do searches for the cheapest ads only and those resuming an earlier search at its cursor
+    params['limit'] = normalize_search_value('limit', data.get('limit'))
+    params['cursor'] = json.dumps(data.get('cursor') or None, sort_keys=True, default=str)
+
+    return params
+
+
+def get_search_id(data):
+    """
+    Returns the ID of a search, shared by all searches with the same canonical parameters.
+
+    Parameters:
+        data (dict): Search form data.
+
+    Returns:
+        str: SHA-256 hash of the canonical parameters.
+    """
+    canonical = json.dumps(normalize_search_params(data), sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def get_search_key(data):
+    """
+    Returns the cache key of a search.
+
+    Parameters:
+        data (dict): Search form data.
+
+    Returns:
+        str: Key identifying all searches with the same canonical parameters.
+    """
+    return 'search:' + get_search_id(data)
+
+
+def get_cached_search(data):
+    """
+    Returns the cached results of a search, if there are any.
+
+    Parameters:
+        data (dict): Search form data.
+
+    Returns:
+        dict or None: Cached 'list_of_ads' and 'sources' plus 'cache_age', the age of the data in seconds.
+    """
+    cached = caches[SEARCH_CACHE].get(get_search_key(data))
+
+    if cached is None:
+        return None
+
+    return {
+        'list_of_ads': cached['list_of_ads'],
+        'sources': cached['sources'],
+        'cache_age': round(time.time() - cached['created'], 1),
+    }
+
+
+def cache_search(data, list_of_ads, sources):
+    """
+    Stores the results of a search for the time configured in settings.CACHES.
+
+    Results are only cached when every portal completed, so a timed out or failed portal is
+    scraped again by the next identical search.
+
+    Parameters:
+        data (dict): Search form data.
+        list_of_ads (list of dict): Ads found by the search.
+        sources (dict): Status of every portal as returned by search_all_portals.
+
+    Returns:
+        bool: True if the results were cached.
+    """
+    if any(source['status'] != STATUS_COMPLETE for source in sources.values()):
+        return False
+
+    caches[SEARCH_CACHE].set(get_search_key(data), {
+        'created': time.time(),
+        'list_of_ads': list_of_ads,
+        'sources': sources,
+    })
+
+    return True
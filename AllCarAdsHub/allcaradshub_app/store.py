@@ -0,0 +1,145 @@
+# Standard Library Imports
+import logging
+from decimal import Decimal, InvalidOperation
+
+# Third-Party Library Imports
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+# Local Imports
+from allcaradshub_app.models import Ad
+
+# Number of ads written by a single INSERT ... ON CONFLICT statement, used when not configured in settings.py
+DEFAULT_BATCH_SIZE = 500
+
+# Fields of Ad filled from the ad dictionaries ('cena' from 'cena_value' and so on)
+AD_FIELDS = [
+    'marka', 'model', 'cena', 'waluta', 'rok_produkcji', 'przebieg', 'pojemnosc', 'moc', 'typ_nadwozia',
+    'liczba_drzwi', 'liczba_miejsc', 'kolor', 'kraj_pochodzenia', 'zarejestrowany_w_polsce', 'stan',
+    'lokalizacja', 'tytul', 'url', 'strona',
+]
+
+INTEGER_FIELDS = {'rok_produkcji', 'przebieg', 'pojemnosc', 'moc', 'liczba_drzwi', 'liczba_miejsc'}
+
+
+def to_number(value):
+    """
+    Converts a scraped value such as 25900.0, '1398' or '1 398' to a float.
+
+    Parameters:
+        value: Scraped value.
+
+    Returns:
+        float or None: Converted value, or None if the value is missing or not a number.
+    """
+    if value is None:
+        return None
+
+    try:
+        return float(str(value).replace(' ', '').replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def to_integer(value):
+    """
+    Converts a scraped value such as 1398, 97.0, '1398' or '1 398' to an integer.
+
+    Parameters:
+        value: Scraped value.
+
+    Returns:
+        int or None: Converted value, or None if the value is missing or not a number.
+    """
+    if value is None:
+        return None
+
+    try:
+        return int(float(str(value).replace(' ', '').replace(',', '.')))
+    except ValueError:
+        return None
+
+
+def to_decimal(value):
+    """
+    Converts a scraped price to a Decimal.
+
+    Parameters:
+        value: Scraped price.
+
+    Returns:
+        Decimal or None: Converted price, or None if the price is missing or not a number.
+    """
+    if value is None:
+        return None
+
+    try:
+        return Decimal(str(value)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def ad_from_dict(ad_dict):
+    """
+    Builds an unsaved Ad from a dictionary produced by scrape_subpage.
+
+    Parameters:
+        ad_dict (dict): Ad dictionary with '<field>_value' keys.
+
+    Returns:
+        Ad: Ad with normalized numeric fields.
+    """
+    values = {}
+
+    for field in AD_FIELDS:
+        value = ad_dict.get(f'{field}_value')
+
+        if field in INTEGER_FIELDS:
+            value = to_integer(value)
+        elif field == 'cena':
+            value = to_decimal(value)
+        elif value is None:
+            value = ''
+
+        values[field] = value
+
+    return Ad(**values)
+
+
+def save_ads(list_of_ads):
+    """
+    Inserts new ads and updates the ones already stored, matching them by URL.
+
+    Ads are written in batches of SCRAPER_STORE_BATCH_SIZE with one INSERT ... ON CONFLICT DO UPDATE
+    statement per batch. Database errors are logged and do not interrupt the search.
+
+    Parameters:
+        list_of_ads (list of dict): Ad dictionaries produced by scrape_subpage.
+
+    Returns:
+        int: Number of ads written.
+    """
+    if not list_of_ads or not getattr(settings, 'SCRAPER_STORE_ADS', True):
+        return 0
+
+    # An offer may be found more than once by a search, a statement cannot update the same row twice
+    ads_by_url = {ad_dict['url_value']: ad_from_dict(ad_dict) for ad_dict in list_of_ads}
+
+    try:
+        Ad.objects.bulk_create(
+            ads_by_url.values(),
+            batch_size=getattr(settings, 'SCRAPER_STORE_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+            update_conflicts=True,
+            unique_fields=['url'],
+            update_fields=[field for field in AD_FIELDS if field != 'url'] + ['last_seen'],
+        )
+    except DatabaseError as e:
+        logging.error(f"Failed to store {len(ads_by_url)} ads: {e}")
+        return 0
+    finally:
+        # Scrapers run in worker threads, which would otherwise keep their connection open
+        close_old_connections()
+
+    logging.info(f"Stored {len(ads_by_url)} ads.")
+
+    return len(ads_by_url)
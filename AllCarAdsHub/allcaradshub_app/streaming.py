@@ -0,0 +1,139 @@
+# Standard Library Imports
+import json
+import queue
+import logging
+import threading
+
+# Third-Party Library Imports
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+
+# Local Imports
+from allcaradshub_app.portals import get_next_cursor, search_all_portals
+from allcaradshub_app.results import store_result_set
+from allcaradshub_app.search_cache import cache_search, get_cached_search
+
+# Formats of the stream: one JSON object per line, or server-sent events
+FORMAT_NDJSON = 'ndjson'
+FORMAT_SSE = 'sse'
+
+CONTENT_TYPES = {
+    FORMAT_NDJSON: 'application/x-ndjson',
+    FORMAT_SSE: 'text/event-stream',
+}
+
+# Number of seconds without events after which a heartbeat keeps proxies from closing the stream
+DEFAULT_HEARTBEAT_INTERVAL = 10
+
+# Marks the end of the events put on the queue by the search thread
+_FINISHED = object()
+
+
+def format_event(event, stream_format):
+    """
+    Serializes a search event for the stream.
+
+    Parameters:
+        event (dict): Event with a 'type' key ('ad', 'progress', 'done' or 'error').
+        stream_format (str): 'ndjson' or 'sse'.
+
+    Returns:
+        str: The event as a line of NDJSON or as a server-sent event named after its type.
+    """
+    payload = json.dumps(event, cls=DjangoJSONEncoder)
+
+    if stream_format == FORMAT_SSE:
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+
+    return payload + '\n'
+
+
+def format_heartbeat(stream_format):
+    """
+    Returns a heartbeat ignored by clients: an SSE comment or an empty NDJSON line.
+
+    Parameters:
+        stream_format (str): 'ndjson' or 'sse'.
+
+    Returns:
+        str: The heartbeat.
+    """
+    return ': heartbeat\n\n' if stream_format == FORMAT_SSE else '\n'
+
+
+def stream_search(data, stream_format=FORMAT_NDJSON):
+    """
+    Searches all portals and yields every ad as soon as it is scraped.
+
+    The search runs in a thread of its own, which reports ads and fetched pages with search results
+    through a queue. The stream yields an 'ad' event per ad, a 'progress' event per page with search
+    results and ends with a 'done' event carrying the per-portal sources, the cursor resuming the search
+    if it stopped early and the ID of the stored result set. A cached search is streamed at once. If
+    the client goes away the search still finishes and lands in the search cache.
+
+    Ads are streamed as they are scraped, before duplicates are merged and before a limited or resumed
+    search keeps its cheapest ads, so the 'ad' events of a running search are marked 'provisional' and
+    the results are those of the result set named by the 'done' event. The ads of a cached search are final.
+
+    Parameters:
+        data (dict): Search form data.
+        stream_format (str, optional): 'ndjson' or 'sse'.
+
+    Yields:
+        str: Serialized events.
+    """
+    cached_search = get_cached_search(data)
+
+    if cached_search is not None:
+        for ad in cached_search['list_of_ads']:
+            yield format_event({'type': 'ad', 'ad': ad, 'provisional': False}, stream_format)
+
+        yield format_event({
+            'type': 'done',
+            'sources': cached_search['sources'],
+            'cursor': get_next_cursor(cached_search['sources']),
+            'cached': True,
+            'cache_age': cached_search['cache_age'],
+            'result_id': store_result_set(data, cached_search['list_of_ads'], cached_search['sources']),
+        }, stream_format)
+        return
+
+    events = queue.Queue()
+
+    def on_page(name, page_num, max_page):
+        events.put({'type': 'progress', 'portal': name, 'page': page_num, 'max_page': max_page})
+
+    def run_search():
+        try:
+            list_of_ads, sources = search_all_portals(
+                data, on_ad=lambda ad: events.put({'type': 'ad', 'ad': ad, 'provisional': True}), on_page=on_page
+            )
+            cache_search(data, list_of_ads, sources)
+            result_id = store_result_set(data, list_of_ads, sources)
+            events.put({
+                'type': 'done', 'sources': sources, 'cursor': get_next_cursor(sources), 'cached': False, 'cache_age': 0,
+                'result_id': result_id,
+            })
+        except Exception as e:
+            logging.error(f"Streamed search failed: {e}")
+            events.put({'type': 'error', 'message': 'Unable to complete the search.'})
+        finally:
+            events.put(_FINISHED)
+            close_old_connections()
+
+    threading.Thread(target=run_search, name='search-stream', daemon=True).start()
+
+    heartbeat_interval = getattr(settings, 'SCRAPER_STREAM_HEARTBEAT', DEFAULT_HEARTBEAT_INTERVAL)
+
+    while True:
+        try:
+            event = events.get(timeout=heartbeat_interval)
+        except queue.Empty:
+            yield format_heartbeat(stream_format)
+            continue
+
+        if event is _FINISHED:
+            break
+
+        yield format_event(event, stream_format)
@@ -0,0 +1,77 @@
+# Standard Library Imports
+import os
+import json
+from unittest import mock
+
+# Local Imports
+from allcaradshub_app.extraction import AD_KEYS
+from allcaradshub_app.fixtures import DEFAULT_FIXTURES_DIRECTORY, INDEX_FILE
+
+
+def make_ad(portal, url, price, **fields):
+    """
+    Builds an ad dictionary the way the scrapers do, with every key of AD_KEYS.
+
+    Parameters:
+        portal (str): Name of the portal.
+        url (str): URL of the offer.
+        price (float or None): Price of the offer.
+        **fields: Other values by the field name without the '_value' suffix.
+
+    Returns:
+        dict: Ad dictionary.
+    """
+    ad = dict.fromkeys(AD_KEYS)
+    ad.update(strona_value=portal, url_value=url, cena_value=price)
+    ad.update({f'{field}_value': value for field, value in fields.items()})
+    return ad
+
+
+def load_fixture_pages(portal):
+    """
+    Reads the recorded pages of a portal from the bundled fixtures by their file name.
+
+    Parameters:
+        portal (str): Name of the portal.
+
+    Returns:
+        dict: URL and HTML of every recorded page, by its file name (e.g., 'main_1.html').
+    """
+    portal_directory = os.path.join(DEFAULT_FIXTURES_DIRECTORY, portal)
+
+    with open(os.path.join(portal_directory, INDEX_FILE), encoding='utf-8') as index_file:
+        index = json.load(index_file)
+
+    pages = {}
+
+    for key, file_name in index['pages'].items():
+        with open(os.path.join(portal_directory, file_name), encoding='utf-8') as page_file:
+            pages[file_name] = (f"https://{index['host']}{key}", page_file.read())
+
+    return pages
+
+
+class FakeListing:
+    """
+    Portal serving pages with search results whose offers are numbered, standing in for fetch and
+    a portal's parse_main_page in crawler tests.
+    """
+    def __init__(self, max_page, offers_per_page=3):
+        self.max_page = max_page
+        self.offers_per_page = offers_per_page
+        self.requested = []
+
+    def build_url(self, page_num, **band):
+        return f'https://portal.test/search?page={page_num}'
+
+    def fetch(self, url, portal, headers=None, deadline=None):
+        self.requested.append(url)
+        return mock.Mock(status_code=200, text=url, headers={})
+
+    def parse_main_page(self, main_page_html):
+        page_num = int(main_page_html.rsplit('=', 1)[1])
+        subpage_urls = [f'https://portal.test/offer/{page_num}-{index}' for index in range(self.offers_per_page)]
+        return self.max_page, subpage_urls, {subpage_url: f'card of {subpage_url}' for subpage_url in subpage_urls}
+
+    def scrape_subpage(self, subpage_url, fingerprint=None):
+        return make_ad('portal', subpage_url, 1000.0)
@@ -0,0 +1,60 @@
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.test import TestCase
+
+# Local Imports
+from allcaradshub_app.results import RESULTS_CACHE, store_result_set
+from allcaradshub_app.tests.test_results import SOURCES, make_ads
+
+
+class AggregatesViewTests(TestCase):
+    def setUp(self):
+        caches[RESULTS_CACHE].clear()
+        self.addCleanup(caches[RESULTS_CACHE].clear)
+        self.result_id = store_result_set({'brand': 'audi', 'model': 'a4'}, make_ads(), SOURCES)
+
+    def get(self, query_string=''):
+        return self.client.get(f'/results/{self.result_id}/aggregates/?{query_string}')
+
+    def test_chart_data(self):
+        aggregates = self.get('bins=2&summary_bins=2').json()
+
+        self.assertEqual((aggregates['total'], aggregates['median_price'], aggregates['median_mileage']), (4, 54900.0, 151200.0))
+        self.assertEqual(aggregates['price_histogram'], {'edges': [17900.0, 71200.0, 124500.0], 'counts': [2, 1]})
+        self.assertEqual(aggregates['price_by_mileage'], {
+            'edges': [88000.0, 188500.0, 289000.0], 'counts': [2, 1], 'median_price': [89700.0, 17900.0],
+        })
+        self.assertEqual(aggregates['price_by_year'], {
+            'years': [2006, 2015, 2019], 'counts': [1, 1, 1], 'median_price': [17900.0, 54900.0, 124500.0],
+            'min_price': [17900.0, 54900.0, 124500.0], 'max_price': [17900.0, 54900.0, 124500.0],
+        })
+        self.assertEqual(aggregates['points']['total'], 3)
+        self.assertEqual(sorted(aggregates['points']['url']), ['g2', 'o1', 'o2'])
+
+    def test_points_are_downsampled(self):
+        points = self.get('max_points=2').json()['points']
+
+        self.assertEqual((points['total'], len(points['price'])), (3, 2))
+        self.assertEqual(self.get('max_points=2').json()['points'], points)
+        self.assertEqual(self.get('max_points=0').json()['points']['url'], [])
+
+    def test_filters_of_the_results_apply(self):
+        aggregates = self.get('strona=otomoto').json()
+
+        self.assertEqual((aggregates['total'], aggregates['median_price']), (2, 89700.0))
+
+    def test_no_matching_ads(self):
+        aggregates = self.get('cena_min=1000000').json()
+
+        self.assertEqual((aggregates['total'], aggregates['median_price']), (0, None))
+        self.assertEqual(aggregates['price_histogram'], {'edges': [], 'counts': []})
+        self.assertEqual(aggregates['price_by_year']['years'], [])
+
+    def test_invalid_parameters_are_rejected(self):
+        for query_string in ['bins=0', 'max_points=-1', 'cena_max=cheap']:
+            with self.subTest(query_string=query_string):
+                self.assertEqual(self.get(query_string).status_code, 400)
+
+    def test_expired_results(self):
+        caches[RESULTS_CACHE].clear()
+        self.assertEqual(self.get().status_code, 404)
@@ -0,0 +1,163 @@
+# Standard Library Imports
+import asyncio
+import contextlib
+from types import SimpleNamespace
+from unittest import mock
+
+# Third-Party Library Imports
+import aiohttp
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import async_engine
+from allcaradshub_app.async_engine import fetch_async, scrape_main_page_async
+from allcaradshub_app.ratelimit import reset_buckets
+from allcaradshub_app.resilience import reset_breakers
+from allcaradshub_app.tests.helpers import FakeListing, make_ad
+
+
+class FakeResponse:
+    """
+    Response of FakeSession, used as an async context manager like aiohttp's.
+    """
+    def __init__(self, status, body=''):
+        self.status = status
+        self.body = body
+        self.headers = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def text(self):
+        return self.body
+
+
+class FakeSession:
+    """
+    Session answering every request with the next of the given status codes or exceptions.
+    """
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requested = []
+
+    def get(self, url, headers=None):
+        self.requested.append(url)
+        outcome = self.outcomes.pop(0)
+
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+        return FakeResponse(outcome, url)
+
+
+def make_portal_module(listing):
+    """
+    Builds a portal module serving the pages of a FakeListing.
+    """
+    def build_main_page_url(brand, model, page_num, **params):
+        return listing.build_url(page_num)
+
+    def parse_listing_page(main_page_html, brand, model):
+        max_page, subpage_urls, fingerprints = listing.parse_main_page(main_page_html)
+        cards = {subpage_url: (make_ad('portal', subpage_url, None), fingerprints[subpage_url]) for subpage_url in subpage_urls}
+        return max_page, subpage_urls, cards
+
+    return SimpleNamespace(
+        PORTAL='portal',
+        build_main_page_url=build_main_page_url,
+        parse_main_page=listing.parse_main_page,
+        parse_listing_page=parse_listing_page,
+        parse_subpage=lambda subpage_html, subpage_url, brand, model: make_ad('portal', subpage_url, 1000.0),
+    )
+
+
+@override_settings(
+    SCRAPER_RETRIES=2, SCRAPER_RETRY_BACKOFF_BASE=0.01, SCRAPER_RETRY_BACKOFF_MAX=0.01, SCRAPER_RATE_LIMITS={},
+    SCRAPER_RATE_LIMIT_DEFAULT={'rate': 1000, 'burst': 100}, SCRAPER_SPLIT_PAGES=0, SCRAPER_PREFETCH_PAGES=False,
+)
+class AsyncEngineTests(TestCase):
+    def setUp(self):
+        reset_buckets()
+        reset_breakers()
+        caches['offers'].clear()
+        self.addCleanup(reset_buckets)
+        self.addCleanup(reset_breakers)
+
+    def scrape(self, listing, **options):
+        """
+        Runs scrape_main_page_async on a FakeListing, returning the ads and the requested URLs.
+        """
+        requested = []
+
+        async def fetch(session, url, portal, headers=None):
+            requested.append(url)
+            return 200, url, {}
+
+        @contextlib.asynccontextmanager
+        async def create_session():
+            yield None
+
+        with mock.patch.object(async_engine, 'fetch_async', fetch), \
+                mock.patch.object(async_engine, 'create_session', create_session), \
+                mock.patch.object(async_engine, 'save_ads') as save_ads:
+            list_of_ads = asyncio.run(scrape_main_page_async(
+                make_portal_module(listing), {'brand': 'audi', 'model': 'a4'}, **options
+            ))
+
+        return list_of_ads, requested, save_ads
+
+    def test_fetch_retries_transient_errors(self):
+        session = FakeSession(aiohttp.ClientConnectionError('reset'), 503, 200)
+        status, body, _ = asyncio.run(fetch_async(session, 'https://portal.test/offer', 'portal'))
+
+        self.assertEqual((status, body), (200, 'https://portal.test/offer'))
+        self.assertEqual(len(session.requested), 3)
+
+    def test_fetch_raises_last_error(self):
+        session = FakeSession(*[asyncio.TimeoutError()] * 3)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(fetch_async(session, 'https://portal.test/offer', 'portal'))
+
+    def test_every_page_and_subpage_is_scraped(self):
+        reported = []
+        list_of_ads, requested, save_ads = self.scrape(FakeListing(max_page=2), on_ad=reported.append)
+
+        self.assertEqual([ad['url_value'] for ad in list_of_ads], [
+            f'https://portal.test/offer/{page_num}-{index}' for page_num in (1, 2) for index in range(3)
+        ])
+        self.assertEqual(len(requested), 8)
+        self.assertEqual(len(reported), 6)
+        save_ads.assert_called_once_with(list_of_ads)
+
+    def test_limit_stops_walking_pages(self):
+        list_of_ads, requested, _ = self.scrape(FakeListing(max_page=5), limit=4)
+
+        self.assertEqual(len(list_of_ads), 6)
+        self.assertEqual([url for url in requested if 'search' in url], [
+            'https://portal.test/search?page=1', 'https://portal.test/search?page=2',
+        ])
+
+    def test_fast_mode_reads_listing_cards_off_the_event_loop(self):
+        in_event_loop = []
+
+        def use_listing_card(subpage_url, card):
+            try:
+                asyncio.get_running_loop()
+                in_event_loop.append(True)
+            except RuntimeError:
+                in_event_loop.append(False)
+
+            return card[0]
+
+        with mock.patch.object(async_engine, 'use_listing_card', use_listing_card):
+            list_of_ads, requested, save_ads = self.scrape(FakeListing(max_page=2), fast=True)
+
+        self.assertEqual(len(list_of_ads), 6)
+        self.assertEqual(in_event_loop, [False] * 6)
+        self.assertTrue(all('search' in url for url in requested))
+        save_ads.assert_not_called()
@@ -0,0 +1,119 @@
+# Standard Library Imports
+import threading
+from unittest import mock
+
+# Third-Party Library Imports
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import crawler
+from allcaradshub_app.crawler import crawl
+from allcaradshub_app.tests.helpers import FakeListing
+
+
+@override_settings(SCRAPER_MAX_WORKERS=4, SCRAPER_PREFETCH_PAGES=False, SCRAPER_SPLIT_PAGES=0)
+class CrawlTests(TestCase):
+    def crawl(self, listing, **options):
+        with mock.patch.object(crawler, 'fetch', listing.fetch):
+            return crawl('portal', listing.build_url, listing.parse_main_page, listing.scrape_subpage, store=False, **options)
+
+    def test_every_page_is_walked_in_order(self):
+        listing = FakeListing(max_page=3)
+        pages = []
+
+        list_of_ads = self.crawl(listing, on_page=lambda page_num, max_page: pages.append((page_num, max_page)))
+
+        self.assertEqual([ad['url_value'] for ad in list_of_ads], [
+            f'https://portal.test/offer/{page_num}-{index}' for page_num in (1, 2, 3) for index in range(3)
+        ])
+        self.assertEqual(pages, [(1, 3), (2, 3), (3, 3)])
+
+    def test_subpages_get_their_card_fingerprint(self):
+        listing = FakeListing(max_page=1)
+        fingerprints = {}
+
+        def scrape_subpage(subpage_url, fingerprint=None):
+            fingerprints[subpage_url] = fingerprint
+
+        listing.scrape_subpage = scrape_subpage
+
+        self.assertEqual(self.crawl(listing), [])
+        self.assertEqual(fingerprints['https://portal.test/offer/1-2'], 'card of https://portal.test/offer/1-2')
+
+    def test_ads_are_stored(self):
+        listing = FakeListing(max_page=1)
+
+        with mock.patch.object(crawler, 'fetch', listing.fetch), mock.patch.object(crawler, 'save_ads') as save_ads:
+            list_of_ads = crawl('portal', listing.build_url, listing.parse_main_page, listing.scrape_subpage)
+
+        save_ads.assert_called_once_with(list_of_ads)
+
+    def test_deadline_is_passed_to_fetch(self):
+        listing = FakeListing(max_page=1)
+        deadlines = []
+        fetch = listing.fetch
+        listing.fetch = lambda url, portal, headers=None, deadline=None: deadlines.append(deadline) or fetch(url, portal)
+
+        self.crawl(listing, deadline=10 ** 9)
+
+        self.assertEqual(deadlines, [10 ** 9])
+
+
+@override_settings(SCRAPER_MAX_WORKERS=4, SCRAPER_LISTING_WORKERS=3, SCRAPER_SPLIT_PAGES=0)
+class PrefetchTests(TestCase):
+    def crawl(self, listing, **options):
+        with mock.patch.object(crawler, 'fetch', listing.fetch):
+            return crawl(
+                'portal', listing.build_url, listing.parse_main_page, listing.scrape_subpage, store=False, prefetch=True,
+                **options
+            )
+
+    def test_remaining_pages_are_fetched_in_parallel(self):
+        listing = FakeListing(max_page=4)
+        barrier = threading.Barrier(3, timeout=5)
+        fetch = listing.fetch
+
+        def fetch_in_parallel(url, portal, headers=None, deadline=None):
+            # Pages 2 to 4 only return once all of them were requested
+            if not url.endswith('page=1'):
+                barrier.wait()
+            return fetch(url, portal)
+
+        listing.fetch = fetch_in_parallel
+        list_of_ads = self.crawl(listing)
+
+        self.assertEqual([ad['url_value'] for ad in list_of_ads], [
+            f'https://portal.test/offer/{page_num}-{index}' for page_num in (1, 2, 3, 4) for index in range(3)
+        ])
+
+    def test_offer_promoted_on_several_pages_is_scraped_once(self):
+        listing = FakeListing(max_page=2)
+        parse_main_page = listing.parse_main_page
+        scraped = []
+
+        def parse_with_promoted_offer(main_page_html):
+            max_page, subpage_urls, fingerprints = parse_main_page(main_page_html)
+            return max_page, ['https://portal.test/offer/promoted'] + subpage_urls, fingerprints
+
+        listing.parse_main_page = parse_with_promoted_offer
+        listing.scrape_subpage = lambda subpage_url, fingerprint=None: scraped.append(subpage_url) or {'url_value': subpage_url}
+
+        list_of_ads = self.crawl(listing)
+
+        self.assertEqual(len(list_of_ads), 7)
+        self.assertEqual(scraped.count('https://portal.test/offer/promoted'), 1)
+
+    def test_setting_enables_prefetch(self):
+        self.assertFalse(crawler.prefetch_enabled(False))
+
+        with override_settings(SCRAPER_PREFETCH_PAGES=True):
+            self.assertTrue(crawler.prefetch_enabled(None))
+
+    def test_limited_crawl_walks_pages_one_by_one(self):
+        listing = FakeListing(max_page=5)
+        list_of_ads = self.crawl(listing, limit=4)
+
+        self.assertEqual(len(list_of_ads), 6)
+        self.assertEqual(listing.requested, [
+            'https://portal.test/search?page=1', 'https://portal.test/search?page=2',
+        ])
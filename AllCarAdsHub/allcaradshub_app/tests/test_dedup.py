@@ -0,0 +1,51 @@
+# Third-Party Library Imports
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app.dedup import deduplicate_ads
+from allcaradshub_app.tests.helpers import make_ad
+
+
+class DeduplicationTests(TestCase):
+    def setUp(self):
+        fields = {
+            'tytul': 'Audi A4 2.0 TDI Avant', 'marka': 'audi', 'model': 'a4', 'rok_produkcji': 2015,
+            'przebieg': 150000,
+        }
+        self.otomoto_ad = make_ad('otomoto', 'o1', 50000.0, **fields)
+        self.gratka_ad = make_ad('gratka', 'g1', 50000.0, **fields)
+        self.olx_ad = make_ad('olx', 'x1', 50000.0, **fields)
+
+    def get_urls(self, ad):
+        return [offer['url_value'] for offer in ad['oferty_value']]
+
+    def test_same_car_on_two_portals_is_merged(self):
+        list_of_ads = deduplicate_ads([self.otomoto_ad, self.gratka_ad])
+
+        self.assertEqual(len(list_of_ads), 1)
+        self.assertEqual(list_of_ads[0]['url_value'], 'o1')
+        self.assertEqual(self.get_urls(list_of_ads[0]), ['o1', 'g1'])
+
+    def test_merged_ads_are_merged_further(self):
+        merged = deduplicate_ads([self.otomoto_ad, self.gratka_ad])
+        list_of_ads = deduplicate_ads(merged + [self.olx_ad])
+
+        self.assertEqual(len(list_of_ads), 1)
+        self.assertEqual(self.get_urls(list_of_ads[0]), ['o1', 'g1', 'x1'])
+
+    def test_ads_of_the_same_portal_are_not_merged(self):
+        other_ad = dict(self.otomoto_ad, url_value='o2')
+        list_of_ads = deduplicate_ads([self.otomoto_ad, self.gratka_ad, other_ad])
+
+        self.assertEqual(len(list_of_ads), 2)
+        self.assertEqual(sorted(len(ad.get('oferty_value') or [ad]) for ad in list_of_ads), [1, 2])
+
+    def test_different_cars_are_kept(self):
+        other_ad = dict(self.gratka_ad, cena_value=80000.0, przebieg_value=60000, tytul_value='Audi A4 Allroad')
+        self.assertEqual(deduplicate_ads([self.otomoto_ad, other_ad]), [self.otomoto_ad, other_ad])
+
+    @override_settings(SCRAPER_DEDUP=False)
+    def test_deduplication_can_be_disabled(self):
+        list_of_ads = [self.otomoto_ad, self.gratka_ad]
+        self.assertEqual(deduplicate_ads(list_of_ads), list_of_ads)
+
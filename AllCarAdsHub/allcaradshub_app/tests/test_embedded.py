@@ -0,0 +1,65 @@
+# Third-Party Library Imports
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import gratka
+from allcaradshub_app.embedded import find_json_ld, find_next_data, find_vehicle, get_path, is_complete, to_year
+from allcaradshub_app.tests.helpers import load_fixture_pages, make_ad
+from allcaradshub_app.tests.test_extraction import parse_offers
+
+JSON_LD_PAGE = '''
+<script type="application/ld+json">{"@graph": [{"@type": "BreadcrumbList"}, {"@type": ["Car"], "offers": {"price": 1}}]}</script>
+<script type="application/ld+json">{not json}</script>
+<script id="__NEXT_DATA__" type="application/json">{"props": {"pageProps": {"advert": {"id": 7}}}}</script>
+'''
+
+
+class EmbeddedDataTests(TestCase):
+    def test_json_ld_objects_are_found(self):
+        objects = find_json_ld(JSON_LD_PAGE)
+
+        self.assertEqual(len(objects), 3)
+        self.assertEqual(find_vehicle(objects), {'@type': ['Car'], 'offers': {'price': 1}})
+        self.assertIsNone(find_vehicle(objects[:2]))
+
+    def test_next_data_is_found(self):
+        data = find_next_data(JSON_LD_PAGE)
+
+        self.assertEqual(get_path(data, ('props', 'pageProps', 'advert', 'id')), 7)
+        self.assertIsNone(get_path(data, ('props', 'missing', 'id')))
+        self.assertIsNone(find_next_data('<html></html>'))
+
+    def test_years_are_read_from_dates(self):
+        self.assertEqual(to_year('2015-06-01'), 2015)
+        self.assertEqual(to_year('2015'), 2015)
+
+    def test_ad_without_a_required_field_is_incomplete(self):
+        ad = make_ad('otomoto', 'o1', 54900.0, tytul='Audi A4', waluta='PLN', rok_produkcji=2015, przebieg=151200)
+
+        self.assertTrue(is_complete(ad))
+        self.assertFalse(is_complete(dict(ad, przebieg_value=None)))
+
+
+class EmbeddedExtractionTests(TestCase):
+    def test_both_modes_read_the_same_offers(self):
+        with override_settings(SCRAPER_EXTRACTION='embedded'):
+            embedded_ads = {portal: parse_offers(portal) for portal in ('otomoto', 'gratka')}
+
+        with override_settings(SCRAPER_EXTRACTION='dom'):
+            dom_ads = {portal: parse_offers(portal) for portal in ('otomoto', 'gratka')}
+
+        self.assertEqual(embedded_ads['otomoto'], dom_ads['otomoto'])
+        self.assertEqual(embedded_ads['gratka'].keys(), dom_ads['gratka'].keys())
+        self.assertIsNone(embedded_ads['gratka']['offer_8.html'])
+
+        for file_name, ad in embedded_ads['gratka'].items():
+            for key in ('tytul_value', 'cena_value', 'rok_produkcji_value', 'przebieg_value', 'lokalizacja_value'):
+                with self.subTest(page=file_name, key=key):
+                    self.assertEqual(ad and ad[key], dom_ads['gratka'][file_name] and dom_ads['gratka'][file_name][key])
+
+    @override_settings(SCRAPER_EXTRACTION='embedded')
+    def test_offer_without_embedded_data_falls_back_to_dom(self):
+        url, html = load_fixture_pages('gratka')['offer_6.html']
+
+        self.assertIsNone(gratka.parse_embedded_subpage(html, url, 'audi', 'a4'))
+        self.assertEqual(gratka.parse_subpage(html, url, 'audi', 'a4')['url_value'], url)
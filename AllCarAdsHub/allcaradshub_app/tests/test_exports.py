@@ -0,0 +1,96 @@
+# Standard Library Imports
+import io
+import csv
+from unittest import skipIf
+
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app.exports import iter_table_chunks, pa, pq, write_csv, write_parquet
+from allcaradshub_app.extraction import AD_KEYS
+from allcaradshub_app.models import Ad
+from allcaradshub_app.records import build_table, get_all_rows, get_rows
+from allcaradshub_app.results import RESULTS_CACHE, store_result_set
+from allcaradshub_app.store import ad_from_dict
+from allcaradshub_app.tests.helpers import make_ad
+from allcaradshub_app.tests.test_results import SOURCES, make_ads
+
+
+def read_csv(content):
+    """
+    Reads an exported CSV file.
+
+    Parameters:
+        content (str): Content of the file.
+
+    Returns:
+        list of dict: Rows by the names of the columns.
+    """
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+@override_settings(SCRAPER_EXPORT_CHUNK_SIZE=3)
+class ExportTests(TestCase):
+    def setUp(self):
+        self.list_of_ads = [
+            make_ad('otomoto', f'o{index}', None if index == 2 else 1000.0 * index, tytul=f'Audi A4 {index}',
+                    rok_produkcji=2000 + index)
+            for index in range(7)
+        ]
+        self.table = build_table(self.list_of_ads)
+        self.rows = get_all_rows(self.table)
+
+    def test_write_csv(self):
+        parts = list(write_csv(iter_table_chunks(self.table, self.rows)))
+        rows = list(csv.reader(io.StringIO(''.join(parts))))
+
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(rows[0], list(AD_KEYS))
+        self.assertEqual(len(rows), 8)
+
+        ad = dict(zip(rows[0], rows[2]))
+        self.assertEqual((ad['url_value'], ad['cena_value'], ad['rok_produkcji_value']), ('o1', '1000.0', '2001'))
+        self.assertEqual(dict(zip(rows[0], rows[3]))['cena_value'], '')
+
+    @skipIf(pa is None, 'Parquet exports need the pyarrow package.')
+    def test_write_parquet(self):
+        parquet_file = pq.ParquetFile(io.BytesIO(b''.join(write_parquet(iter_table_chunks(self.table, self.rows)))))
+        table = parquet_file.read()
+
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        self.assertEqual(table.column_names, list(AD_KEYS))
+        self.assertEqual(table.schema.field('cena_value').type, pa.float64())
+        self.assertEqual(table.schema.field('rok_produkcji_value').type, pa.int64())
+        self.assertEqual(table.to_pylist(), get_rows(self.table))
+
+
+class ExportViewTests(TestCase):
+    def setUp(self):
+        caches[RESULTS_CACHE].clear()
+        self.addCleanup(caches[RESULTS_CACHE].clear)
+        self.result_id = store_result_set({'brand': 'audi', 'model': 'a4'}, make_ads(), SOURCES)
+
+    def test_result_set_is_exported_filtered_and_sorted(self):
+        response = self.client.get(f'/results/{self.result_id}/export/?strona=otomoto&sort=cena&order=desc')
+
+        self.assertEqual(response['Content-Type'].split(';')[0], 'text/csv')
+        self.assertIn(f'filename="ads-{self.result_id}.csv"', response['Content-Disposition'])
+        self.assertEqual([row['url_value'] for row in read_csv(b''.join(response.streaming_content).decode())], ['o2', 'o1'])
+
+    def test_stored_ads_are_exported(self):
+        Ad.objects.bulk_create([ad_from_dict(ad) for ad in make_ads()])
+
+        response = self.client.get('/ads/export/?strona=gratka&sort=cena')
+        rows = read_csv(b''.join(response.streaming_content).decode())
+
+        self.assertEqual([row['url_value'] for row in rows], ['g2', 'g1'])
+        self.assertEqual((rows[0]['cena_value'], rows[1]['cena_value']), ('17900.0', ''))
+
+    def test_invalid_exports_are_rejected(self):
+        self.assertEqual(self.client.get(f'/results/{self.result_id}/export/?format=xlsx').status_code, 400)
+        self.assertEqual(self.client.get('/ads/export/?sort=url').status_code, 400)
+
+        caches[RESULTS_CACHE].clear()
+        self.assertEqual(self.client.get(f'/results/{self.result_id}/export/').status_code, 404)
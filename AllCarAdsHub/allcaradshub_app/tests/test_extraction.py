@@ -0,0 +1,77 @@
+# Third-Party Library Imports
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import gratka, otomoto
+from allcaradshub_app.extraction import AD_KEYS, strip_units, to_float, to_int
+from allcaradshub_app.tests.helpers import load_fixture_pages
+
+SCRAPERS = {'otomoto': otomoto, 'gratka': gratka}
+
+
+def parse_offers(portal, brand='audi', model='a4'):
+    """
+    Parses the recorded offer subpages of a portal.
+
+    Parameters:
+        portal (str): Name of the portal.
+        brand (str, optional): Brand searched for.
+        model (str, optional): Model searched for.
+
+    Returns:
+        dict: Ad returned by parse_subpage, or None, by the file name of the page (e.g., 'offer_1.html').
+    """
+    return {
+        file_name: SCRAPERS[portal].parse_subpage(html, url, brand, model)
+        for file_name, (url, html) in load_fixture_pages(portal).items() if file_name.startswith('offer_')
+    }
+
+
+class ConverterTests(TestCase):
+    def test_numbers_are_read_with_units_and_decimal_commas(self):
+        self.assertEqual(to_float('49 900,50 zł'), 49900.5)
+        self.assertEqual(to_float('120 000 km'), 120000.0)
+        self.assertEqual(to_int('2015'), 2015)
+
+        with self.assertRaises(ValueError):
+            to_float('brak')
+
+    def test_units_are_stripped_before_converting(self):
+        self.assertEqual(strip_units('cm3', convert=to_int)('1 968 cm3'), 1968)
+        self.assertEqual(strip_units('KM')('150 KM'), '150')
+
+
+@override_settings(SCRAPER_EXTRACTION='dom')
+class DomExtractionTests(TestCase):
+    def test_main_pages(self):
+        for portal, scraper in SCRAPERS.items():
+            pages = load_fixture_pages(portal)
+
+            for file_name in ('main_1.html', 'main_2.html'):
+                with self.subTest(portal=portal, page=file_name):
+                    max_page, subpage_urls, fingerprints = scraper.parse_main_page(pages[file_name][1])
+                    self.assertEqual(max_page, 2)
+                    self.assertEqual(len(subpage_urls), 4)
+                    self.assertEqual(set(fingerprints), set(subpage_urls))
+
+    def test_offer_fields(self):
+        ad = parse_offers('otomoto')['offer_3.html']
+
+        self.assertEqual(tuple(ad), AD_KEYS)
+        self.assertEqual(ad['tytul_value'], 'Audi A4 2.0 TDI quattro S line')
+        self.assertEqual(
+            (ad['cena_value'], ad['rok_produkcji_value'], ad['przebieg_value'], ad['pojemnosc_value']),
+            (54900.0, 2015, 151200, 1968),
+        )
+        self.assertEqual(ad['lokalizacja_value'], 'Poznań, Wielkopolskie')
+        self.assertEqual((ad['marka_value'], ad['strona_value']), ('Audi', 'otomoto'))
+
+    def test_labelled_fields_of_gratka(self):
+        ad = parse_offers('gratka')['offer_2.html']
+
+        self.assertEqual(ad['cena_value'], 38500.0)
+        self.assertEqual((ad['kraj_pochodzenia_value'], ad['zarejestrowany_w_polsce_value']), ('Niemcy', 'Tak'))
+
+    def test_offer_lacking_a_required_field_is_dropped(self):
+        self.assertTrue(all(parse_offers('otomoto').values()))
+        self.assertEqual(sorted(name for name, ad in parse_offers('gratka').items() if ad is None), ['offer_8.html'])
@@ -0,0 +1,126 @@
+# Standard Library Imports
+from unittest import mock
+
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import crawler, gratka, otomoto, views
+from allcaradshub_app.crawler import use_listing_card
+from allcaradshub_app.fixtures import get_fixture_key
+from allcaradshub_app.offer_cache import OFFER_CACHE, store_offer
+from allcaradshub_app.portals import PORTALS
+from allcaradshub_app.tests.helpers import load_fixture_pages, make_ad
+
+
+class FixtureServer:
+    """
+    Answers the requests of a portal with its recorded pages, remembering the requested ones.
+    """
+    def __init__(self, portal):
+        self.pages = {get_fixture_key(url): html for url, html in load_fixture_pages(portal).values()}
+        self.requested = []
+
+    def fetch(self, url, portal, headers=None, deadline=None):
+        self.requested.append(get_fixture_key(url))
+        return mock.Mock(status_code=200, text=self.pages[get_fixture_key(url)], headers={})
+
+
+class ListingCardTests(TestCase):
+    def setUp(self):
+        caches[OFFER_CACHE].clear()
+        self.addCleanup(caches[OFFER_CACHE].clear)
+
+    def test_cards_of_gratka(self):
+        max_page, subpage_urls, cards = gratka.parse_listing_page(
+            load_fixture_pages('gratka')['main_1.html'][1], 'audi', 'a4'
+        )
+        ad, _ = cards[subpage_urls[0]]
+
+        self.assertEqual(max_page, 2)
+        self.assertEqual(
+            (ad['cena_value'], ad['rok_produkcji_value'], ad['przebieg_value'], ad['pojemnosc_value']),
+            (17900.0, 2006, 289000, 1896),
+        )
+        self.assertIn('Lublin', ad['lokalizacja_value'])
+        self.assertEqual(ad['strona_value'], 'gratka')
+
+    def test_cards_of_otomoto(self):
+        max_page, subpage_urls, cards = otomoto.parse_listing_page(
+            load_fixture_pages('otomoto')['main_1.html'][1], 'audi', 'a4'
+        )
+
+        self.assertEqual((max_page, len(subpage_urls)), (2, 4))
+
+        for subpage_url in subpage_urls:
+            ad, fingerprint = cards[subpage_url]
+
+            with self.subTest(url=subpage_url):
+                self.assertEqual(ad['url_value'], subpage_url)
+                self.assertIsNotNone(ad['cena_value'])
+                self.assertIsNotNone(ad['tytul_value'])
+                self.assertTrue(fingerprint)
+
+    @override_settings(SCRAPER_OFFER_FRESHNESS=0)
+    def test_cached_offer_replaces_its_unchanged_card(self):
+        card_ad = make_ad('gratka', 'https://gratka.pl/g1', 17900.0)
+        full_ad = make_ad('gratka', 'https://gratka.pl/g1', 17900.0, kolor='Czarny')
+
+        self.assertEqual(use_listing_card('https://gratka.pl/g1', (card_ad, 'card')), card_ad)
+
+        store_offer('https://gratka.pl/g1', full_ad, {}, 'card')
+
+        self.assertEqual(use_listing_card('https://gratka.pl/g1', (card_ad, 'card')), full_ad)
+        self.assertEqual(use_listing_card('https://gratka.pl/g1', (card_ad, 'new card')), card_ad)
+
+
+@override_settings(SCRAPER_SPLIT_PAGES=0, SCRAPER_PREFETCH_PAGES=False)
+class FastSearchTests(TestCase):
+    def setUp(self):
+        caches[OFFER_CACHE].clear()
+        self.addCleanup(caches[OFFER_CACHE].clear)
+
+    def test_only_pages_with_search_results_are_requested(self):
+        for portal, scraper in [('otomoto', otomoto), ('gratka', gratka)]:
+            server = FixtureServer(portal)
+            params = PORTALS[portal]['get_params']({'brand': 'audi', 'model': 'a4'})
+
+            with self.subTest(portal=portal), mock.patch.object(crawler, 'fetch', server.fetch), \
+                    mock.patch.object(crawler, 'save_ads') as save_ads:
+                list_of_ads = scraper.scrape_main_page(**params, fast=True)
+
+                self.assertEqual(len(list_of_ads), 8)
+                self.assertEqual(len(server.requested), 2)
+                self.assertTrue(all(ad['strona_value'] == portal for ad in list_of_ads))
+                save_ads.assert_not_called()
+
+
+@override_settings(SCRAPER_OFFER_FRESHNESS=0, SCRAPER_EXTRACTION='embedded')
+class OfferDetailsViewTests(TestCase):
+    def setUp(self):
+        caches[OFFER_CACHE].clear()
+        self.addCleanup(caches[OFFER_CACHE].clear)
+        self.url = load_fixture_pages('gratka')['offer_2.html'][0]
+
+    def test_offer_is_downloaded_and_stored(self):
+        server = FixtureServer('gratka')
+
+        with mock.patch.object(gratka, 'fetch', server.fetch), mock.patch.object(views, 'save_ads') as save_ads:
+            response = self.client.get('/offer-details/', {'url': self.url, 'brand': 'audi', 'model': 'a4'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['url_value'], response.json()['cena_value']), (self.url, 38500.0))
+        save_ads.assert_called_once_with([response.json()])
+
+    def test_url_of_another_site_is_rejected(self):
+        response = self.client.get('/offer-details/', {'url': 'https://example.com/offer/1'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_offer_that_cannot_be_downloaded(self):
+        with mock.patch.object(gratka, 'scrape_subpage', return_value=None), \
+                mock.patch.object(views, 'save_ads') as save_ads:
+            response = self.client.get('/offer-details/', {'url': self.url})
+
+        self.assertEqual(response.status_code, 502)
+        save_ads.assert_not_called()
@@ -0,0 +1,135 @@
+# Standard Library Imports
+import time
+import threading
+from unittest import mock
+
+# Third-Party Library Imports
+import requests
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import fetch as fetch_module
+from allcaradshub_app.fetch import fetch, get_session, resolve_url, scrape_concurrently
+from allcaradshub_app.ratelimit import reset_buckets
+from allcaradshub_app.resilience import reset_breakers
+
+
+@override_settings(
+    SCRAPER_RETRIES=2, SCRAPER_RETRY_BACKOFF_BASE=0.01, SCRAPER_RETRY_BACKOFF_MAX=0.01, SCRAPER_RATE_LIMITS={},
+    SCRAPER_RATE_LIMIT_DEFAULT={'rate': 1000, 'burst': 100},
+)
+class FetchTests(TestCase):
+    url = 'https://portal.test/offer/1'
+
+    def setUp(self):
+        reset_buckets()
+        reset_breakers()
+        self.addCleanup(reset_buckets)
+        self.addCleanup(reset_breakers)
+        patcher = mock.patch.object(fetch_module, 'get_session')
+        self.session = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def respond(self, *outcomes):
+        self.session.get.side_effect = [
+            outcome if isinstance(outcome, Exception) else mock.Mock(status_code=outcome, headers={})
+            for outcome in outcomes
+        ]
+
+    def test_transient_errors_are_retried(self):
+        self.respond(requests.ConnectionError('reset'), 503, 200)
+
+        self.assertEqual(fetch(self.url, 'portal').status_code, 200)
+        self.assertEqual(self.session.get.call_count, 3)
+
+    def test_last_response_is_returned_after_retries(self):
+        self.respond(503, 502, 500)
+
+        self.assertEqual(fetch(self.url, 'portal').status_code, 500)
+        self.assertEqual(self.session.get.call_count, 3)
+
+    def test_client_errors_are_not_retried(self):
+        self.respond(404, 200)
+        self.assertEqual(fetch(self.url, 'portal').status_code, 404)
+
+        self.respond(requests.TooManyRedirects('loop'), 200)
+        with self.assertRaises(requests.TooManyRedirects):
+            fetch(self.url, 'portal')
+
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_backoff_stops_at_deadline(self):
+        self.respond(503, 200)
+
+        with mock.patch.object(fetch_module, 'get_backoff', return_value=30):
+            started = time.monotonic()
+            response = fetch(self.url, 'portal', deadline=started + 0.05)
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_no_retry_after_deadline(self):
+        self.respond(requests.ConnectionError('reset'), 200)
+
+        with self.assertRaises(requests.ConnectionError):
+            fetch(self.url, 'portal', deadline=time.monotonic() - 1)
+
+        self.assertEqual(self.session.get.call_count, 1)
+
+
+class SessionTests(TestCase):
+    @override_settings(SCRAPER_MAX_WORKERS=3)
+    def test_session_is_shared_per_portal(self):
+        with mock.patch.dict(fetch_module._sessions, clear=True):
+            session = get_session('portal')
+
+            self.assertIs(get_session('portal'), session)
+            self.assertIsNot(get_session('other'), session)
+            self.assertEqual(session.get_adapter('https://portal.test')._pool_maxsize, 3)
+
+    @override_settings(SCRAPER_HOST_OVERRIDES={'gratka.pl': 'http://127.0.0.1:8001'})
+    def test_host_overrides(self):
+        self.assertEqual(resolve_url('https://gratka.pl/a?b=1'), 'http://127.0.0.1:8001/a?b=1')
+        self.assertEqual(resolve_url('https://www.otomoto.pl/a'), 'https://www.otomoto.pl/a')
+
+
+@override_settings(SCRAPER_MAX_WORKERS=4)
+class ScrapeConcurrentlyTests(TestCase):
+    def test_results_keep_order_of_urls(self):
+        reported = []
+        urls = [f'u{index}' for index in range(10)]
+
+        def scrape(url):
+            time.sleep(0.001 * (10 - int(url[1:])))
+            return None if url == 'u3' else url.upper()
+
+        results = scrape_concurrently(scrape, urls, on_result=reported.append)
+
+        self.assertEqual(results, [url.upper() for url in urls if url != 'u3'])
+        self.assertEqual(sorted(reported), sorted(results))
+
+    def test_subpages_run_in_parallel(self):
+        barrier = threading.Barrier(4, timeout=5)
+
+        def scrape(url):
+            # Fails with BrokenBarrierError unless the four subpages are scraped at the same time
+            barrier.wait()
+            return url
+
+        self.assertEqual(scrape_concurrently(scrape, list('abcd')), list('abcd'))
+
+    def test_pending_subpages_are_dropped_at_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def scrape(url):
+            if url != 'fast':
+                release.wait(5)
+            return url
+
+        started = time.monotonic()
+        results = scrape_concurrently(scrape, ['fast', 'slow'], deadline=started + 0.1)
+
+        self.assertEqual(results, ['fast'])
+        self.assertLess(time.monotonic() - started, 2)
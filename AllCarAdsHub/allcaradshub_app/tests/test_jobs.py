@@ -0,0 +1,113 @@
+# Standard Library Imports
+import json
+from datetime import timedelta
+from unittest import mock
+
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+# Local Imports
+from allcaradshub_app import jobs
+from allcaradshub_app.jobs import claim_job, claim_next_job, cleanup_jobs, enqueue_search, run_job
+from allcaradshub_app.models import SearchJob
+from allcaradshub_app.portals import STATUS_COMPLETE
+from allcaradshub_app.search_cache import SEARCH_CACHE
+from allcaradshub_app.tests.helpers import make_ad
+
+SOURCES = {'otomoto': {'status': STATUS_COMPLETE, 'ads': 1}, 'gratka': {'status': STATUS_COMPLETE, 'ads': 0}}
+
+
+# run_job closes the connection of its thread, which would end the transaction of a TestCase
+@override_settings(SCRAPER_JOB_BACKEND='database', SCRAPER_JOB_STALE_AFTER=600, SCRAPER_JOB_RETENTION=3600)
+class SearchJobTests(TransactionTestCase):
+    def setUp(self):
+        caches[SEARCH_CACHE].clear()
+        self.addCleanup(caches[SEARCH_CACHE].clear)
+        self.list_of_ads = [make_ad('otomoto', 'https://www.otomoto.pl/o1', 54900.0)]
+
+    def search(self, data, on_ad=None, on_page=None):
+        on_page('otomoto', 1, 1)
+        on_ad(self.list_of_ads[0])
+        return self.list_of_ads, SOURCES
+
+    def test_job_is_claimed_once(self):
+        job = enqueue_search({'brand': 'audi', 'model': 'a4'})
+
+        claimed = claim_job(job.pk, 'worker-1')
+
+        self.assertEqual((claimed.status, claimed.worker), (SearchJob.RUNNING, 'worker-1'))
+        self.assertIsNotNone(claimed.started)
+        self.assertIsNone(claim_job(job.pk, 'worker-2'))
+
+    def test_oldest_queued_job_is_claimed_first(self):
+        first = enqueue_search({'brand': 'audi', 'model': 'a4'})
+        second = enqueue_search({'brand': 'audi', 'model': 'a6'})
+
+        self.assertEqual(claim_next_job('worker').pk, first.pk)
+        self.assertEqual(claim_next_job('worker').pk, second.pk)
+        self.assertIsNone(claim_next_job('worker'))
+
+    def test_finished_job_holds_the_search_response(self):
+        job = claim_job(enqueue_search({'brand': 'audi', 'model': 'a4'}).pk, 'worker')
+
+        with mock.patch.object(jobs, 'search_all_portals', self.search):
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, SearchJob.DONE)
+        self.assertEqual(job.progress['otomoto'], {'pages': 1, 'max_page': 1, 'ads': 1})
+        self.assertEqual((job.result['list_of_ads'], job.result['sources']), (self.list_of_ads, SOURCES))
+        self.assertFalse(job.result['cached'])
+
+        # The finished search is cached, so the same search gives a job that is already done
+        self.assertEqual(enqueue_search({'brand': 'audi', 'model': 'a4'}).status, SearchJob.DONE)
+
+    def test_failed_search_fails_the_job(self):
+        job = claim_job(enqueue_search({'brand': 'audi', 'model': 'a4'}).pk, 'worker')
+
+        with mock.patch.object(jobs, 'search_all_portals', side_effect=RuntimeError('boom')):
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (SearchJob.FAILED, 'boom'))
+
+    def test_stale_and_old_jobs_are_cleaned_up(self):
+        now = timezone.now()
+        stale = SearchJob.objects.create(params={}, status=SearchJob.RUNNING, started=now - timedelta(seconds=601))
+        running = SearchJob.objects.create(params={}, status=SearchJob.RUNNING, started=now - timedelta(seconds=60))
+        old = SearchJob.objects.create(params={}, status=SearchJob.DONE, finished=now - timedelta(seconds=3601))
+        recent = SearchJob.objects.create(params={}, status=SearchJob.FAILED, finished=now - timedelta(seconds=60))
+
+        cleanup_jobs()
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, SearchJob.FAILED)
+        self.assertEqual(SearchJob.objects.get(pk=running.pk).status, SearchJob.RUNNING)
+        self.assertFalse(SearchJob.objects.filter(pk=old.pk).exists())
+        self.assertTrue(SearchJob.objects.filter(pk=recent.pk).exists())
+
+    def test_jobs_views(self):
+        response = self.client.post('/jobs/', json.dumps({'brand': 'audi', 'model': 'a4'}), content_type='application/json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], SearchJob.QUEUED)
+        self.assertEqual(self.client.get(response.json()['status_url']).json()['job_id'], response.json()['job_id'])
+
+    def test_invalid_search_requests_are_rejected(self):
+        for method, body, status in [
+            ('get', None, 405),
+            ('post', 'not json', 400),
+            ('post', json.dumps({'brand': 'audi', 'model': 'a4', 'limit': -1}), 400),
+        ]:
+            with self.subTest(method=method, body=body):
+                if method == 'get':
+                    response = self.client.get('/jobs/')
+                else:
+                    response = self.client.post('/jobs/', body, content_type='application/json')
+
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(response.json()['status'], 'error')
+
+        self.assertFalse(SearchJob.objects.exists())
@@ -0,0 +1,85 @@
+# Standard Library Imports
+import json
+from unittest import mock
+
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.test import TestCase
+
+# Local Imports
+from allcaradshub_app import metrics, views
+from allcaradshub_app.metrics import increment, observe, render_metrics, timed
+from allcaradshub_app.portals import STATUS_COMPLETE
+from allcaradshub_app.search_cache import SEARCH_CACHE
+
+
+# Metrics are kept for the whole process, so every test uses a portal label of its own
+class MetricsTests(TestCase):
+    def get_lines(self, portal):
+        return [line for line in render_metrics().splitlines() if f'portal="{portal}"' in line]
+
+    def test_counters_are_rendered_exactly(self):
+        increment('scraper_responses_total', 1234567, portal='counted', status='200')
+        increment('scraper_responses_total', 0.5, portal='counted', status='error')
+
+        self.assertEqual(self.get_lines('counted'), [
+            'scraper_responses_total{portal="counted",status="200"} 1234567',
+            'scraper_responses_total{portal="counted",status="error"} 0.5',
+        ])
+
+    def test_histograms_are_cumulative(self):
+        observe('scraper_stage_seconds', 0.004, portal='observed', stage='parse')
+        observe('scraper_stage_seconds', 0.2, portal='observed', stage='parse')
+        observe('scraper_stage_seconds', 1000.0, portal='observed', stage='parse')
+
+        lines = self.get_lines('observed')
+
+        self.assertIn('scraper_stage_seconds_bucket{portal="observed",stage="parse",le="0.005"} 1', lines)
+        self.assertIn('scraper_stage_seconds_bucket{portal="observed",stage="parse",le="0.25"} 2', lines)
+        self.assertIn('scraper_stage_seconds_bucket{portal="observed",stage="parse",le="120"} 2', lines)
+        self.assertIn('scraper_stage_seconds_bucket{portal="observed",stage="parse",le="+Inf"} 3', lines)
+        self.assertIn(f'scraper_stage_seconds_sum{{portal="observed",stage="parse"}} {0.004 + 0.2 + 1000.0!r}', lines)
+        self.assertIn('scraper_stage_seconds_count{portal="observed",stage="parse"} 3', lines)
+
+    def test_small_sums_keep_their_precision(self):
+        observe('scraper_stage_seconds', 0.0000012, portal='fast', stage='parse')
+        self.assertIn('scraper_stage_seconds_sum{portal="fast",stage="parse"} 1.2e-06', self.get_lines('fast'))
+
+    def test_nested_spans_are_not_counted_twice(self):
+        clock = iter([0.0, 1.0, 1.25, 2.0])
+
+        with mock.patch.object(metrics.time, 'perf_counter', side_effect=lambda: next(clock)):
+            with timed('extract', 'nested'):
+                with timed('parse', 'nested'):
+                    pass
+
+        lines = self.get_lines('nested')
+
+        self.assertIn('scraper_stage_seconds_sum{portal="nested",stage="parse"} 0.25', lines)
+        self.assertIn('scraper_stage_seconds_sum{portal="nested",stage="extract"} 1.75', lines)
+
+    def test_label_values_are_escaped(self):
+        increment('scraper_responses_total', portal='quoted "portal"\n', status='200')
+        self.assertIn('portal="quoted \\"portal\\"\\n"', render_metrics())
+
+    def test_metrics_view(self):
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn('# TYPE scraper_stage_seconds histogram', response.content.decode())
+
+    def test_view_timings_are_returned_on_request(self):
+        caches[SEARCH_CACHE].clear()
+        self.addCleanup(caches[SEARCH_CACHE].clear)
+
+        def search(data):
+            with timed('listing_fetch', 'timed'):
+                pass
+
+            return [], {'otomoto': {'status': STATUS_COMPLETE, 'ads': 0}}
+
+        with mock.patch.object(views, 'search_all_portals', search):
+            response = self.client.post('/?timings=1', json.dumps({'brand': 'audi', 'model': 'a4'}), content_type='application/json')
+
+        self.assertEqual(response.json()['timings']['portals']['timed']['listing_fetch']['count'], 1)
+        self.assertIn('search_view_responses_total{status="200",view="home"}', render_metrics())
@@ -0,0 +1,106 @@
+# Standard Library Imports
+from unittest import mock
+
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import gratka, offer_cache
+from allcaradshub_app.offer_cache import OFFER_CACHE, lookup_offer, revalidate_offer, store_offer
+from allcaradshub_app.tests.helpers import load_fixture_pages, make_ad
+
+VALIDATORS = {'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2026 07:28:00 GMT'}
+
+
+@override_settings(SCRAPER_OFFER_FRESHNESS=3600)
+class OfferCacheTests(TestCase):
+    url = 'https://gratka.pl/motoryzacja/audi-a4/ob/1'
+
+    def setUp(self):
+        caches[OFFER_CACHE].clear()
+        self.addCleanup(caches[OFFER_CACHE].clear)
+        self.ad = make_ad('gratka', self.url, 38500.0)
+        patcher = mock.patch.object(offer_cache.time, 'time', return_value=1000.0)
+        self.time = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unknown_offer_is_downloaded(self):
+        self.assertEqual(lookup_offer(self.url), (None, {}))
+
+    def test_fresh_offer_is_used(self):
+        store_offer(self.url, self.ad, VALIDATORS, 'card')
+        self.time.return_value = 1000.0 + 3599
+        self.assertEqual(lookup_offer(self.url, 'changed card'), (self.ad, {}))
+
+    def test_offer_with_unchanged_card_is_used(self):
+        store_offer(self.url, self.ad, VALIDATORS, 'card')
+        self.time.return_value = 1000.0 + 7200
+        self.assertEqual(lookup_offer(self.url, 'card'), (self.ad, {}))
+
+    def test_stale_offer_is_revalidated_conditionally(self):
+        store_offer(self.url, self.ad, VALIDATORS, 'card')
+        self.time.return_value = 1000.0 + 7200
+
+        self.assertEqual(lookup_offer(self.url, 'changed card'), (None, {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 21 Oct 2026 07:28:00 GMT',
+        }))
+        self.assertEqual(lookup_offer(self.url), lookup_offer(self.url, 'changed card'))
+
+    def test_offer_without_validators_is_downloaded(self):
+        store_offer(self.url, self.ad, {})
+        self.time.return_value = 1000.0 + 7200
+        self.assertEqual(lookup_offer(self.url), (None, {}))
+
+    def test_revalidated_offer_is_fresh_again(self):
+        store_offer(self.url, self.ad, VALIDATORS, 'card')
+        self.time.return_value = 1000.0 + 7200
+
+        self.assertEqual(revalidate_offer(self.url, 'new card'), self.ad)
+        self.assertEqual(lookup_offer(self.url, 'other card'), (self.ad, {}))
+
+        self.time.return_value = 1000.0 + 7200 * 2
+        self.assertEqual(lookup_offer(self.url, 'new card'), (self.ad, {}))
+
+    def test_evicted_offer_cannot_be_revalidated(self):
+        self.assertIsNone(revalidate_offer(self.url))
+
+
+@override_settings(SCRAPER_OFFER_FRESHNESS=0, SCRAPER_EXTRACTION='dom')
+class ScrapeSubpageTests(TestCase):
+    def setUp(self):
+        caches[OFFER_CACHE].clear()
+        self.addCleanup(caches[OFFER_CACHE].clear)
+        self.url, self.html = load_fixture_pages('gratka')['offer_2.html']
+        self.requests = []
+
+    def respond(self, *statuses):
+        responses = [mock.Mock(status_code=status, text=self.html, headers=VALIDATORS) for status in statuses]
+
+        def fetch(url, portal, headers=None, deadline=None):
+            self.requests.append(headers)
+            return responses.pop(0)
+
+        return mock.patch.object(gratka, 'fetch', fetch)
+
+    def test_unchanged_offer_costs_a_304(self):
+        with self.respond(200, 304):
+            ad = gratka.scrape_subpage(self.url, 'audi', 'a4')
+
+            with mock.patch.object(gratka, 'parse_subpage') as parse_subpage:
+                self.assertEqual(gratka.scrape_subpage(self.url, 'audi', 'a4'), ad)
+
+        parse_subpage.assert_not_called()
+        self.assertEqual(ad['cena_value'], 38500.0)
+        self.assertEqual(self.requests, [{}, {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 21 Oct 2026 07:28:00 GMT',
+        }])
+
+    def test_changed_offer_is_parsed_again(self):
+        with self.respond(200, 200):
+            gratka.scrape_subpage(self.url, 'audi', 'a4')
+
+            with mock.patch.object(gratka, 'parse_subpage', return_value={'url_value': self.url}) as parse_subpage:
+                self.assertEqual(gratka.scrape_subpage(self.url, 'audi', 'a4'), {'url_value': self.url})
+
+        parse_subpage.assert_called_once()
@@ -0,0 +1,115 @@
+# Standard Library Imports
+import math
+from unittest import mock
+
+# Third-Party Library Imports
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import crawler, planner
+from allcaradshub_app.crawler import crawl
+from allcaradshub_app.tests.helpers import FakeListing
+
+
+@override_settings(SCRAPER_SPLIT_PAGES=20, SCRAPER_SPLIT_MAX_BANDS=16)
+class PlannerTests(TestCase):
+    def probe(self, params):
+        """
+        Returns the first page of a band listing one page of offers per 2000 zł of its price range.
+        """
+        price_from = params['price_from'] or 0
+        price_to = params['price_to'] or planner.PRICE_CEILING
+        return math.ceil((price_to - price_from + 1) / 2000), [], {}
+
+    def test_split_band_halves_price_range(self):
+        band = {'price_from': None, 'price_to': 10000, 'year_from': 2010, 'year_to': None}
+        self.assertEqual(planner.split_band(band), [
+            {'price_from': None, 'price_to': 5000, 'year_from': 2010, 'year_to': None},
+            {'price_from': 5001, 'price_to': 10000, 'year_from': 2010, 'year_to': None},
+        ])
+
+    def test_split_band_halves_years_of_narrow_price_range(self):
+        band = {'price_from': 1000, 'price_to': 2000, 'year_from': 2010, 'year_to': 2013}
+        self.assertEqual(planner.split_band(band), [
+            {'price_from': 1000, 'price_to': 2000, 'year_from': 2010, 'year_to': 2011},
+            {'price_from': 1000, 'price_to': 2000, 'year_from': 2012, 'year_to': 2013},
+        ])
+
+    def test_split_band_stops_at_single_year(self):
+        band = {'price_from': 1000, 'price_to': 2000, 'year_from': 2010, 'year_to': 2010}
+        self.assertIsNone(planner.split_band(band))
+
+    def test_add_band(self):
+        plan = planner.new_plan()
+        planner.add_band(plan, {'price_from': 1}, (0, [], {}))
+        planner.add_band(plan, {'price_from': 2}, None)
+        planner.add_band(plan, {'price_from': 3}, (5, [], {}))
+        planner.add_band(plan, {'price_from': 4}, (30, [], {}))
+
+        self.assertEqual([band['price_from'] for band, _ in plan['accepted']], [2, 3])
+        self.assertEqual([band['price_from'] for _, _, band, _ in plan['pending']], [4])
+
+    def test_pop_band_stops_at_deadline(self):
+        plan = planner.new_plan()
+        planner.add_band(plan, planner.get_root_band({}), (30, [], {}))
+        self.assertIsNone(planner.pop_band(plan, deadline=0))
+
+    def test_small_search_is_not_split(self):
+        criteria = {'price_from': '20000', 'price_to': '30000', 'year_from': '', 'year_to': ''}
+        bands = planner.plan_bands(criteria, self.probe)
+
+        self.assertEqual(bands, [({'price_from': 20000, 'price_to': 30000, 'year_from': '', 'year_to': ''}, (6, [], {}))])
+
+    def test_large_search_is_split_into_disjoint_bands(self):
+        criteria = {'price_from': '0', 'price_to': '100000', 'year_from': '', 'year_to': ''}
+        bands = planner.plan_bands(criteria, self.probe)
+
+        self.assertEqual(len(bands), 4)
+        self.assertEqual(bands[0][0]['price_from'], 0)
+        self.assertEqual(bands[-1][0]['price_to'], 100000)
+
+        for (params, first_page), (next_params, _) in zip(bands, bands[1:]):
+            self.assertEqual(params['price_to'] + 1, next_params['price_from'])
+            self.assertLessEqual(first_page[0], 20)
+
+    def test_split_stops_at_max_bands(self):
+        criteria = {'price_from': '', 'price_to': '', 'year_from': '', 'year_to': ''}
+
+        with override_settings(SCRAPER_SPLIT_MAX_BANDS=3):
+            bands = planner.plan_bands(criteria, self.probe)
+
+        self.assertEqual(len(bands), 3)
+        self.assertEqual(bands[0][0]['price_from'], '')
+        self.assertEqual(bands[-1][0]['price_to'], '')
+
+    def test_search_with_invalid_bound_is_not_split(self):
+        criteria = {'price_from': 'abc', 'price_to': '', 'year_from': '', 'year_to': ''}
+        self.assertEqual(planner.plan_bands(criteria, lambda params: (50, [], {})), [(criteria, (50, [], {}))])
+
+
+
+@override_settings(SCRAPER_SPLIT_PAGES=2, SCRAPER_SPLIT_MAX_BANDS=4, SCRAPER_PREFETCH_PAGES=False, SCRAPER_MAX_WORKERS=4)
+class CrawlBandsTests(TestCase):
+    def test_long_search_is_crawled_in_bands_without_duplicates(self):
+        listing = FakeListing(max_page=3)
+        split = {'price_from': '', 'price_to': '', 'year_from': '', 'year_to': ''}
+
+        with mock.patch.object(crawler, 'fetch', listing.fetch):
+            list_of_ads = crawl(
+                'portal', listing.build_url, listing.parse_main_page, listing.scrape_subpage, store=False, split=split,
+            )
+
+        # Every band of the fake portal lists the same offers, which are merged
+        self.assertEqual(sorted(ad['url_value'] for ad in list_of_ads), sorted(
+            f'https://portal.test/offer/{page_num}-{index}' for page_num in (1, 2, 3) for index in range(3)
+        ))
+        self.assertGreater(len(listing.requested), 3)
+
+    def test_limited_crawl_is_not_split(self):
+        listing = FakeListing(max_page=3)
+        split = {'price_from': '', 'price_to': '', 'year_from': '', 'year_to': ''}
+
+        with mock.patch.object(crawler, 'fetch', listing.fetch):
+            crawl('portal', listing.build_url, listing.parse_main_page, listing.scrape_subpage, store=False, split=split, limit=3)
+
+        self.assertEqual(listing.requested, ['https://portal.test/search?page=1'])
@@ -0,0 +1,107 @@
+# Third-Party Library Imports
+from django.test import TestCase
+
+# Local Imports
+from allcaradshub_app.crawler import new_progress, record_page
+from allcaradshub_app.portals import (
+    STATUS_COMPLETE, STATUS_LIMITED, STATUS_TIMED_OUT, get_next_cursor, get_search_options, merge_portal_results,
+    parse_cursor,
+)
+from allcaradshub_app.tests.helpers import make_ad
+
+
+class MergePortalResultsTests(TestCase):
+    def track(self, portal, prices, attempted=None):
+        """
+        Builds the record of a crawl of one page listing offers with the given prices.
+        """
+        progress = new_progress()
+        urls = [f'{portal}-{index}' for index in range(len(prices))]
+        record_page(progress, 1, 1, urls)
+
+        for url, price in list(zip(urls, prices))[:attempted]:
+            progress['results'][url] = make_ad(portal, url, price)
+
+        return progress
+
+    def test_without_progress_every_ad_is_kept(self):
+        portal_ads = {'otomoto': [make_ad('otomoto', 'o1', 1.0)], 'gratka': [make_ad('gratka', 'g1', 2.0)]}
+        sources = {'otomoto': {'status': STATUS_COMPLETE}, 'gratka': {'status': STATUS_COMPLETE}}
+
+        list_of_ads = merge_portal_results(portal_ads, sources, None, {}, None)
+
+        self.assertEqual([ad['url_value'] for ad in list_of_ads], ['o1', 'g1'])
+        self.assertEqual(sources['otomoto'], {'status': STATUS_COMPLETE, 'ads': 1})
+
+    def test_limit_keeps_cheapest_ads_and_promoted_offers_before_them(self):
+        progresses = {'otomoto': self.track('otomoto', [900, 100, 200, 300]), 'gratka': self.track('gratka', [150, 250, 350])}
+        sources = {'otomoto': {'status': STATUS_COMPLETE}, 'gratka': {'status': STATUS_COMPLETE}}
+
+        list_of_ads = merge_portal_results({}, sources, progresses, {}, 3)
+
+        self.assertEqual([ad['cena_value'] for ad in list_of_ads], [100, 150, 900])
+        self.assertEqual(sources['otomoto'], {'status': STATUS_LIMITED, 'ads': 2, 'cursor': {'page': 1, 'position': 2}})
+        self.assertEqual(sources['gratka'], {'status': STATUS_LIMITED, 'ads': 1, 'cursor': {'page': 1, 'position': 1}})
+
+    def test_crawl_stopped_early_is_resumed_at_first_offer_not_attempted(self):
+        progresses = {'otomoto': self.track('otomoto', [100, 200, 300], attempted=2)}
+        sources = {'otomoto': {'status': STATUS_TIMED_OUT}}
+
+        list_of_ads = merge_portal_results({}, sources, progresses, {}, None)
+
+        self.assertEqual([ad['url_value'] for ad in list_of_ads], ['otomoto-0', 'otomoto-1'])
+        self.assertEqual(sources['otomoto'], {'status': STATUS_TIMED_OUT, 'ads': 2, 'cursor': {'page': 1, 'position': 2}})
+
+    def test_crawl_resumed_from_cursor_starts_at_its_position(self):
+        progresses = {'otomoto': self.track('otomoto', [100, 200, 300])}
+        sources = {'otomoto': {'status': STATUS_TIMED_OUT}}
+
+        list_of_ads = merge_portal_results({}, sources, progresses, {'otomoto': (1, 1)}, None)
+
+        self.assertEqual([ad['url_value'] for ad in list_of_ads], ['otomoto-1', 'otomoto-2'])
+        self.assertEqual(sources['otomoto'], {'status': STATUS_COMPLETE, 'ads': 2, 'cursor': None})
+
+    def test_parse_cursor(self):
+        self.assertIsNone(parse_cursor(None))
+        self.assertIsNone(parse_cursor(''))
+        self.assertEqual(
+            parse_cursor({'otomoto': {'page': '3', 'position': 12}, 'gratka': {'page': 1, 'position': 0}}),
+            {'otomoto': (3, 12), 'gratka': (1, 0)},
+        )
+
+    def test_parse_cursor_rejects_malformed_cursors(self):
+        for cursor in [
+            ['otomoto'],
+            {'olx': {'page': 1, 'position': 0}},
+            {'otomoto': {'page': 1}},
+            {'otomoto': {'page': 'first', 'position': 0}},
+            {'otomoto': None},
+            {'otomoto': {'page': 0, 'position': 0}},
+            {'otomoto': {'page': 1, 'position': -1}},
+        ]:
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                parse_cursor(cursor)
+
+
+    def test_next_cursor_lists_portals_with_offers_left(self):
+        sources = {
+            'otomoto': {'status': STATUS_LIMITED, 'cursor': {'page': 1, 'position': 2}},
+            'gratka': {'status': STATUS_COMPLETE, 'cursor': None},
+        }
+
+        self.assertEqual(get_next_cursor(sources), {'otomoto': {'page': 1, 'position': 2}})
+        self.assertIsNone(get_next_cursor({'gratka': {'status': STATUS_COMPLETE}}))
+
+
+class SearchOptionsTests(TestCase):
+    def test_options(self):
+        self.assertEqual(get_search_options({}), {'limit': None, 'time_budget': None, 'cursor': None})
+        self.assertEqual(
+            get_search_options({'limit': '20', 'timeBudget': 2.5, 'cursor': {'gratka': {'page': 2, 'position': 0}}}),
+            {'limit': 20, 'time_budget': 2.5, 'cursor': {'gratka': (2, 0)}},
+        )
+
+    def test_invalid_options_are_rejected(self):
+        for data in [{'limit': 'ten'}, {'limit': 0}, {'timeBudget': 'soon'}, {'timeBudget': -1}, {'timeBudget': 'inf'}]:
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                get_search_options(data)
@@ -0,0 +1,72 @@
+# Standard Library Imports
+from unittest import mock
+
+# Third-Party Library Imports
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import ratelimit
+
+
+@override_settings(SCRAPER_RATE_LIMITS={}, SCRAPER_RATE_LIMIT_DEFAULT={'rate': 2, 'burst': 2})
+class RateLimitTests(TestCase):
+    url = 'https://www.otomoto.pl/osobowe/audi/a4'
+
+    def setUp(self):
+        ratelimit.reset_buckets()
+        self.addCleanup(ratelimit.reset_buckets)
+        patcher = mock.patch('allcaradshub_app.ratelimit.time.monotonic', return_value=1000.0)
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_is_free_then_requests_are_spread_by_rate(self):
+        delays = [ratelimit.reserve_request(self.url) for _ in range(4)]
+        self.assertEqual(delays, [0.0, 0.0, 0.5, 1.0])
+
+    def test_bucket_refills_over_time_up_to_burst(self):
+        for _ in range(2):
+            ratelimit.reserve_request(self.url)
+
+        self.monotonic.return_value = 1100.0
+        self.assertEqual(ratelimit.reserve_request(self.url), 0.0)
+        self.assertEqual(ratelimit.reserve_request(self.url), 0.0)
+        self.assertEqual(ratelimit.reserve_request(self.url), 0.5)
+
+    def test_hosts_have_separate_buckets(self):
+        for _ in range(2):
+            ratelimit.reserve_request(self.url)
+
+        self.assertEqual(ratelimit.reserve_request('https://gratka.pl/motoryzacja'), 0.0)
+
+    @override_settings(SCRAPER_RATE_LIMITS={'gratka.pl': {'rate': 1, 'burst': 1}})
+    def test_host_limits_override_default(self):
+        self.assertEqual(ratelimit.get_host_limits('gratka.pl'), {'rate': 1.0, 'burst': 1.0})
+        self.assertEqual(ratelimit.get_host_limits('www.otomoto.pl'), {'rate': 2.0, 'burst': 2.0})
+
+    def test_retry_after(self):
+        self.assertEqual(ratelimit.get_retry_after({'Retry-After': '7'}), 7.0)
+        self.assertEqual(ratelimit.get_retry_after({'Retry-After': '-3'}), 0.0)
+        self.assertEqual(ratelimit.get_retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}), 0.0)
+        self.assertIsNone(ratelimit.get_retry_after({'Retry-After': 'soon'}))
+        self.assertIsNone(ratelimit.get_retry_after({}))
+        self.assertIsNone(ratelimit.get_retry_after(None))
+
+    def test_throttled_response_pauses_host_and_halves_rate(self):
+        ratelimit.report_response(self.url, 429, {'Retry-After': '3'})
+
+        # The pause, then one request at the halved rate of 1 request per second
+        self.assertEqual(ratelimit.reserve_request(self.url), 4.0)
+
+    @override_settings(SCRAPER_RATE_LIMIT_MAX_RETRY_AFTER=5)
+    def test_retry_after_is_capped(self):
+        ratelimit.report_response(self.url, 503, {'Retry-After': '3600'})
+        self.assertEqual(ratelimit.reserve_request(self.url), 6.0)
+
+    def test_rate_recovers_after_successful_responses(self):
+        ratelimit.report_response(self.url, 429)
+
+        for _ in range(100):
+            ratelimit.report_response(self.url, 200)
+
+        bucket = ratelimit.get_bucket(ratelimit.get_host(self.url))
+        self.assertEqual(bucket['rate'], bucket['max_rate'])
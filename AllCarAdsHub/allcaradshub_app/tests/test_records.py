@@ -0,0 +1,70 @@
+# Standard Library Imports
+import math
+
+# Third-Party Library Imports
+import numpy as np
+from django.test import TestCase
+
+# Local Imports
+from allcaradshub_app.records import AdRecord, build_table, get_column_values, get_rows, iter_records
+from allcaradshub_app.tests.helpers import make_ad
+from allcaradshub_app.tests.test_results import make_ads
+
+
+class AdRecordTests(TestCase):
+    def test_numbers_are_normalized(self):
+        record = AdRecord.from_dict(make_ad(
+            'gratka', 'g1', '17 900', rok_produkcji='2006', przebieg=289000.0, pojemnosc='1 896', moc='brak',
+        ))
+
+        self.assertEqual(
+            (record.cena, record.rok_produkcji, record.przebieg, record.pojemnosc, record.moc),
+            (17900.0, 2006, 289000, 1896, None),
+        )
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_dictionary_has_the_keys_of_the_scrapers(self):
+        ad = make_ad('gratka', 'g1', 17900.0, tytul='Audi A4 B7')
+
+        self.assertEqual(AdRecord.from_dict(ad).to_dict(), ad)
+        self.assertNotIn('oferty_value', AdRecord.from_dict(ad).to_dict())
+
+
+class TableTests(TestCase):
+    def setUp(self):
+        self.list_of_ads = make_ads()
+        self.list_of_ads[0]['oferty_value'] = [{'strona_value': 'otomoto', 'url_value': 'o1', 'cena_value': 54900.0}]
+        self.table = build_table(self.list_of_ads)
+
+    def test_numeric_columns_are_floats_with_nan(self):
+        columns = self.table['columns']
+
+        self.assertEqual(self.table['size'], 4)
+        self.assertEqual(columns['cena'].dtype, np.float64)
+        self.assertEqual(columns['przebieg'].dtype, np.float64)
+        self.assertEqual(columns['tytul'].dtype, object)
+        self.assertTrue(math.isnan(columns['cena'][1]))
+        self.assertEqual(columns['przebieg'][0], 151200)
+
+    def test_rows_round_trip(self):
+        list_of_ads = get_rows(self.table)
+
+        self.assertEqual(list_of_ads, [AdRecord.from_dict(ad).to_dict() for ad in self.list_of_ads])
+        self.assertEqual(list_of_ads[0]['przebieg_value'], 151200)
+        self.assertIsInstance(list_of_ads[0]['rok_produkcji_value'], int)
+        self.assertIsNone(list_of_ads[1]['cena_value'])
+        self.assertEqual(list_of_ads[0]['oferty_value'][0]['url_value'], 'o1')
+        self.assertNotIn('oferty_value', list_of_ads[1])
+
+    def test_some_rows_are_converted(self):
+        rows = np.array([3, 1])
+
+        self.assertEqual([record.url for record in iter_records(self.table, rows)], ['o2', 'g1'])
+        self.assertEqual(get_column_values(self.table, 'przebieg', rows), [88000, None])
+        self.assertEqual(get_column_values(self.table, 'strona', rows), ['otomoto', 'gratka'])
+
+    def test_empty_table(self):
+        table = build_table([])
+
+        self.assertEqual(table['size'], 0)
+        self.assertEqual(get_rows(table), [])
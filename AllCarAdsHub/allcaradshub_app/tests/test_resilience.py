@@ -0,0 +1,167 @@
+# Standard Library Imports
+import asyncio
+from unittest import mock
+
+# Third-Party Library Imports
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import fetch as fetch_module, resilience
+from allcaradshub_app.async_engine import fetch_async
+
+
+@override_settings(
+    SCRAPER_BREAKER_MIN_REQUESTS=4, SCRAPER_BREAKER_ERROR_RATE=0.5, SCRAPER_BREAKER_COOLDOWN=30,
+    SCRAPER_BREAKER_WINDOW=60, SCRAPER_RETRY_BACKOFF_BASE=0.5, SCRAPER_RETRY_BACKOFF_MAX=4,
+)
+class ResilienceTests(TestCase):
+    portal = 'otomoto'
+
+    def setUp(self):
+        resilience.reset_breakers()
+        self.addCleanup(resilience.reset_breakers)
+        patcher = mock.patch('allcaradshub_app.resilience.time.monotonic', return_value=1000.0)
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, *outcomes):
+        for success in outcomes:
+            resilience.record_outcome(self.portal, success)
+
+    def test_should_retry(self):
+        for status_code in (429, 500, 502, 503, 504):
+            self.assertTrue(resilience.should_retry(status_code))
+
+        for status_code in (200, 301, 403, 404):
+            self.assertFalse(resilience.should_retry(status_code))
+
+    def test_backoff_is_bounded(self):
+        for attempt, bound in [(0, 0.5), (1, 1.0), (2, 2.0), (3, 4.0), (10, 4.0)]:
+            for _ in range(20):
+                self.assertTrue(0 <= resilience.get_backoff(attempt) <= bound)
+
+    def test_breaker_stays_closed_below_min_requests(self):
+        self.record(False, False, False)
+        self.assertEqual(resilience.get_breaker_state(self.portal), resilience.BREAKER_CLOSED)
+        resilience.allow_request(self.portal)
+
+    def test_breaker_stays_closed_below_error_rate(self):
+        self.record(True, True, True, False, True, False, True)
+        self.assertEqual(resilience.get_breaker_state(self.portal), resilience.BREAKER_CLOSED)
+
+    def test_breaker_opens_at_error_rate(self):
+        self.record(True, False, True, False)
+
+        self.assertTrue(resilience.is_degraded(self.portal))
+        self.assertFalse(resilience.is_degraded('gratka'))
+
+        with self.assertRaises(resilience.PortalUnavailableError):
+            resilience.allow_request(self.portal)
+
+    def test_old_outcomes_leave_the_window(self):
+        self.record(False, False, True)
+        self.monotonic.return_value = 1100.0
+        self.record(True)
+        self.assertEqual(resilience.get_breaker_state(self.portal), resilience.BREAKER_CLOSED)
+
+    def test_half_open_breaker_lets_one_trial_through(self):
+        self.record(False, False, False, False)
+        self.monotonic.return_value = 1031.0
+
+        self.assertEqual(resilience.get_breaker_state(self.portal), resilience.BREAKER_HALF_OPEN)
+        self.assertFalse(resilience.is_degraded(self.portal))
+        resilience.allow_request(self.portal)
+
+        with self.assertRaises(resilience.PortalUnavailableError):
+            resilience.allow_request(self.portal)
+
+    def test_successful_trial_closes_breaker(self):
+        self.record(False, False, False, False)
+        self.monotonic.return_value = 1031.0
+        resilience.allow_request(self.portal)
+        self.record(True)
+
+        self.assertEqual(resilience.get_breaker_state(self.portal), resilience.BREAKER_CLOSED)
+        resilience.allow_request(self.portal)
+
+    def test_failed_trial_reopens_breaker(self):
+        self.record(False, False, False, False)
+        self.monotonic.return_value = 1031.0
+        resilience.allow_request(self.portal)
+        self.record(False)
+
+        self.assertEqual(resilience.get_breaker_state(self.portal), resilience.BREAKER_OPEN)
+
+        self.monotonic.return_value = 1062.0
+        self.assertEqual(resilience.get_breaker_state(self.portal), resilience.BREAKER_HALF_OPEN)
+
+
+    def test_abandoned_trial_reopens_breaker(self):
+        self.record(False, False, False, False)
+        self.monotonic.return_value = 1031.0
+        resilience.allow_request(self.portal)
+        resilience.abandon_request(self.portal)
+
+        self.assertEqual(resilience.get_breaker_state(self.portal), resilience.BREAKER_OPEN)
+
+        self.monotonic.return_value = 1062.0
+        resilience.allow_request(self.portal)
+
+    def test_abandoned_request_of_closed_breaker_is_not_counted(self):
+        self.record(True, False, True)
+        resilience.abandon_request(self.portal)
+        self.record(True)
+
+        self.assertEqual(resilience.get_breaker_state(self.portal), resilience.BREAKER_CLOSED)
+
+
+# Runs on the real clock, which the event loop of fetch_async depends on
+@override_settings(
+    SCRAPER_BREAKER_MIN_REQUESTS=4, SCRAPER_BREAKER_ERROR_RATE=0.5, SCRAPER_BREAKER_COOLDOWN=0, SCRAPER_RETRIES=0,
+    SCRAPER_RATE_LIMITS={}, SCRAPER_RATE_LIMIT_DEFAULT={'rate': 1000, 'burst': 100},
+)
+class AbandonedTrialTests(TestCase):
+    portal = 'otomoto'
+
+    def setUp(self):
+        resilience.reset_breakers()
+        self.addCleanup(resilience.reset_breakers)
+
+    def open_breaker(self):
+        for _ in range(4):
+            resilience.record_outcome(self.portal, False)
+
+    def test_trial_interrupted_in_fetch_reopens_breaker(self):
+        self.open_breaker()
+
+        with mock.patch.object(fetch_module, 'wait_for_turn'), \
+                mock.patch.object(fetch_module, 'get_session') as get_session:
+            get_session.return_value.get.side_effect = KeyboardInterrupt
+
+            with self.assertRaises(KeyboardInterrupt):
+                fetch_module.fetch('https://www.otomoto.pl/osobowe/audi/a4', self.portal)
+
+        # Without a cooldown the abandoned trial is followed by the next one at once
+        resilience.allow_request(self.portal)
+
+    def test_cancelled_trial_in_fetch_async_reopens_breaker(self):
+        self.open_breaker()
+
+        class HangingSession:
+            def get(self, url, headers=None):
+                return self
+
+            async def __aenter__(self):
+                await asyncio.sleep(60)
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+        async def fetch_with_deadline():
+            await asyncio.wait_for(fetch_async(HangingSession(), 'https://www.otomoto.pl/osobowe', self.portal), 0.01)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(fetch_with_deadline())
+
+        # Without a cooldown the abandoned trial is followed by the next one at once
+        resilience.allow_request(self.portal)
@@ -0,0 +1,94 @@
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app.portals import STATUS_COMPLETE
+from allcaradshub_app.records import build_table
+from allcaradshub_app.results import RESULTS_CACHE, select_rows, store_result_set
+from allcaradshub_app.tests.helpers import make_ad
+
+SOURCES = {'otomoto': {'status': STATUS_COMPLETE, 'ads': 2}, 'gratka': {'status': STATUS_COMPLETE, 'ads': 2}}
+
+
+def make_ads():
+    """
+    Builds the ads of a search on both portals, one of them without a price or mileage.
+
+    Returns:
+        list of dict: Ad dictionaries.
+    """
+    return [
+        make_ad('otomoto', 'o1', 54900.0, tytul='Audi A4 Avant', rok_produkcji=2015, przebieg='151 200'),
+        make_ad('gratka', 'g1', None, tytul='Audi A4 Sedan', rok_produkcji=2008, przebieg=None),
+        make_ad('Gratka', 'g2', 17900.0, tytul='Audi A4 B7', rok_produkcji=2006, przebieg=289000),
+        make_ad('otomoto', 'o2', 124500.0, tytul='Audi A4 allroad', rok_produkcji=2019, przebieg=88000),
+    ]
+
+
+class SelectRowsTests(TestCase):
+    def setUp(self):
+        self.table = build_table(make_ads())
+
+    def select(self, query_string):
+        rows = select_rows(self.table, QueryDict(query_string))
+        return [self.table['columns']['url'][row] for row in rows]
+
+    def test_rows_are_sorted_with_missing_values_last(self):
+        self.assertEqual(self.select(''), ['o1', 'g1', 'g2', 'o2'])
+        self.assertEqual(self.select('sort=cena'), ['g2', 'o1', 'o2', 'g1'])
+        self.assertEqual(self.select('sort=cena&order=desc'), ['o2', 'o1', 'g2', 'g1'])
+        self.assertEqual(self.select('sort=tytul&order=desc'), ['g1', 'g2', 'o1', 'o2'])
+
+    def test_rows_are_filtered(self):
+        self.assertEqual(self.select('cena_min=20000&cena_max=100000'), ['o1'])
+        self.assertEqual(self.select('rok_produkcji_min=2008&sort=rok_produkcji'), ['g1', 'o1', 'o2'])
+        self.assertEqual(self.select('strona=GRATKA'), ['g1', 'g2'])
+        self.assertEqual(self.select('strona=gratka&strona=otomoto&cena_max=60000'), ['o1', 'g2'])
+        self.assertEqual(self.select('q=ALLROAD'), ['o2'])
+
+    def test_invalid_parameters_are_rejected(self):
+        for query_string in ['cena_min=cheap', 'sort=url', 'sort=cena&order=up']:
+            with self.subTest(query_string=query_string), self.assertRaises(ValueError):
+                self.select(query_string)
+
+
+@override_settings(SCRAPER_RESULTS_MAX_PAGE_SIZE=3)
+class ResultsViewTests(TestCase):
+    def setUp(self):
+        caches[RESULTS_CACHE].clear()
+        self.addCleanup(caches[RESULTS_CACHE].clear)
+        self.result_id = store_result_set({'brand': 'audi', 'model': 'a4'}, make_ads(), SOURCES)
+
+    def get(self, query_string=''):
+        return self.client.get(f'/results/{self.result_id}/?{query_string}')
+
+    def test_results_are_paged(self):
+        first = self.get('page_size=2&sort=cena').json()
+        second = self.get('page_size=2&sort=cena&page=2').json()
+
+        self.assertEqual((first['page'], first['pages'], first['total'], first['result_set_size']), (1, 2, 4, 4))
+        self.assertEqual([ad['url_value'] for ad in first['list_of_ads']], ['g2', 'o1'])
+        self.assertEqual([ad['url_value'] for ad in second['list_of_ads']], ['o2', 'g1'])
+        self.assertEqual(first['sources'], SOURCES)
+
+    def test_page_size_is_capped(self):
+        self.assertEqual(self.get('page_size=100').json()['page_size'], 3)
+
+    def test_filtered_results(self):
+        response = self.get('strona=otomoto&przebieg_max=100000').json()
+
+        self.assertEqual(response['total'], 1)
+        self.assertEqual(response['list_of_ads'][0]['url_value'], 'o2')
+
+    def test_invalid_parameters_are_rejected(self):
+        for query_string in ['page=0', 'page_size=many', 'sort=url']:
+            with self.subTest(query_string=query_string):
+                response = self.get(query_string)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['status'], 'error')
+
+    def test_expired_results(self):
+        caches[RESULTS_CACHE].clear()
+        self.assertEqual(self.get().status_code, 404)
@@ -0,0 +1,184 @@
+# Standard Library Imports
+import json
+from datetime import timedelta
+from unittest import mock
+
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# Local Imports
+from allcaradshub_app import saved_searches
+from allcaradshub_app.crawler import get_offer_fingerprint, new_refresh, refresh_listing_card
+from allcaradshub_app.models import SavedSearch
+from allcaradshub_app.portals import STATUS_COMPLETE, STATUS_TIMED_OUT
+from allcaradshub_app.results import RESULTS_CACHE
+from allcaradshub_app.saved_searches import OFFER_ACTIVE, OFFER_REMOVED, create_saved_search, find_changes
+from allcaradshub_app.tests.helpers import make_ad
+
+OTOMOTO_URL = 'https://www.otomoto.pl/osobowe/oferta/audi-a4-ID{}.html'
+GRATKA_URL = 'https://gratka.pl/motoryzacja/audi-a4/ob/{}'
+
+
+class FakePortals:
+    """
+    Lists the given ads on their portals' pages with search results, the way search_all_portals does
+    for a refresh: every offer goes through refresh_listing_card.
+    """
+    def __init__(self, list_of_ads, statuses=None):
+        self.list_of_ads = list_of_ads
+        self.statuses = statuses or {}
+        self.downloaded = []
+
+    def scrape_subpage(self, subpage_url, fingerprint=None):
+        self.downloaded.append(subpage_url)
+        return next(ad for ad in self.list_of_ads if ad['url_value'] == subpage_url)
+
+    def search(self, data, on_ad=None, on_page=None, refresh=None):
+        scrape = refresh_listing_card(refresh, self.scrape_subpage)
+        list_of_ads = [scrape(ad['url_value'], (ad, 'card')) for ad in self.list_of_ads]
+        sources = {
+            name: {'status': self.statuses.get(name, STATUS_COMPLETE), 'ads': 0} for name in ('otomoto', 'gratka')
+        }
+        return list_of_ads, sources
+
+
+class RefreshListingCardTests(TestCase):
+    def setUp(self):
+        self.ad = make_ad('otomoto', OTOMOTO_URL.format(1), 54900.0, tytul='Audi A4')
+        self.offers = {self.ad['url_value']: {'fingerprint': get_offer_fingerprint(self.ad), 'ad': self.ad}}
+        self.refresh = new_refresh(self.offers)
+        self.scrape_subpage = mock.Mock(return_value='downloaded ad')
+
+    def test_unchanged_offer_is_not_downloaded(self):
+        scrape = refresh_listing_card(self.refresh, self.scrape_subpage)
+
+        self.assertEqual(scrape(self.ad['url_value'], (dict(self.ad), 'card')), self.ad)
+        self.scrape_subpage.assert_not_called()
+        self.assertEqual(self.refresh['seen'], {self.ad['url_value']: get_offer_fingerprint(self.ad)})
+
+    def test_changed_offer_is_downloaded(self):
+        scrape = refresh_listing_card(self.refresh, self.scrape_subpage)
+        card_ad = dict(self.ad, cena_value=49900.0)
+
+        self.assertEqual(scrape(self.ad['url_value'], (card_ad, 'card')), 'downloaded ad')
+        self.scrape_subpage.assert_called_once_with(self.ad['url_value'], 'card')
+        self.assertEqual(self.refresh['downloaded'], {self.ad['url_value']})
+
+    def test_offer_that_cannot_be_downloaded_keeps_its_previous_ad(self):
+        self.scrape_subpage.return_value = None
+        scrape = refresh_listing_card(self.refresh, self.scrape_subpage)
+
+        self.assertEqual(scrape(self.ad['url_value'], (dict(self.ad, cena_value=49900.0), 'card')), self.ad)
+        self.assertIsNone(self.refresh['seen'][self.ad['url_value']])
+
+
+@override_settings(SCRAPER_SAVED_SEARCH_REMOVED_RETENTION=3600)
+class FindChangesTests(TestCase):
+    def make_offer(self, url, status=OFFER_ACTIVE, **fields):
+        return {'fingerprint': 'f', 'ad': make_ad('', url, 1000.0), 'status': status, **fields}
+
+    def test_offers_are_compared_with_the_previous_run(self):
+        offers = {
+            OTOMOTO_URL.format(1): self.make_offer(OTOMOTO_URL.format(1)),
+            OTOMOTO_URL.format(2): self.make_offer(OTOMOTO_URL.format(2)),
+            OTOMOTO_URL.format(3): self.make_offer(OTOMOTO_URL.format(3)),
+            GRATKA_URL.format(1): self.make_offer(GRATKA_URL.format(1)),
+        }
+        refresh = new_refresh(offers)
+        refresh['seen'] = {OTOMOTO_URL.format(1): 'f', OTOMOTO_URL.format(2): 'g', OTOMOTO_URL.format(4): 'h'}
+        refresh['ads'] = {url: make_ad('otomoto', url, 2000.0) for url in refresh['seen']}
+        refresh['downloaded'] = {OTOMOTO_URL.format(2), OTOMOTO_URL.format(4)}
+        sources = {'otomoto': {'status': STATUS_COMPLETE}, 'gratka': {'status': STATUS_TIMED_OUT}}
+
+        changes = find_changes(offers, refresh, sources)
+
+        self.assertEqual(changes, {
+            'new': [OTOMOTO_URL.format(4)], 'changed': [OTOMOTO_URL.format(2)], 'removed': [OTOMOTO_URL.format(3)],
+            'unchanged': 1,
+        })
+        self.assertEqual(offers[OTOMOTO_URL.format(3)]['status'], OFFER_REMOVED)
+        # The gratka search timed out, so its offer may still be listed
+        self.assertEqual(offers[GRATKA_URL.format(1)]['status'], OFFER_ACTIVE)
+        self.assertEqual(offers[OTOMOTO_URL.format(4)]['ad']['cena_value'], 2000.0)
+
+    def test_removed_offers_are_forgotten_after_the_retention(self):
+        long_ago = (timezone.now() - timedelta(seconds=7200)).isoformat()
+        recently = timezone.now().isoformat()
+        offers = {
+            OTOMOTO_URL.format(1): self.make_offer(OTOMOTO_URL.format(1), OFFER_REMOVED, removed=long_ago),
+            OTOMOTO_URL.format(2): self.make_offer(OTOMOTO_URL.format(2), OFFER_REMOVED, removed=recently),
+        }
+
+        find_changes(offers, new_refresh(offers), {'otomoto': {'status': STATUS_COMPLETE}})
+
+        self.assertEqual(list(offers), [OTOMOTO_URL.format(2)])
+
+
+class SavedSearchTests(TestCase):
+    def setUp(self):
+        caches[RESULTS_CACHE].clear()
+        self.addCleanup(caches[RESULTS_CACHE].clear)
+        self.list_of_ads = [
+            make_ad('otomoto', OTOMOTO_URL.format(1), 54900.0, tytul='Audi A4 Avant'),
+            make_ad('otomoto', OTOMOTO_URL.format(2), 38500.0, tytul='Audi A4 B8'),
+            make_ad('gratka', GRATKA_URL.format(1), 17900.0, tytul='Audi A4 B7'),
+        ]
+
+    def run_search(self, portals, function, *args):
+        with mock.patch.object(saved_searches, 'search_all_portals', portals.search):
+            return function(*args)
+
+    def test_refresh_only_downloads_new_and_changed_offers(self):
+        portals = FakePortals(self.list_of_ads)
+        saved_search, first_run = self.run_search(portals, create_saved_search, {'brand': 'audi', 'model': 'a4', 'name': 'A4'})
+
+        self.assertEqual(len(portals.downloaded), 3)
+        self.assertEqual(len(first_run['changes']['new']), 3)
+        self.assertEqual((saved_search.name, saved_search.params), ('A4', {'brand': 'audi', 'model': 'a4'}))
+
+        portals = FakePortals([
+            dict(self.list_of_ads[0], cena_value=52900.0),
+            self.list_of_ads[2],
+            make_ad('gratka', GRATKA_URL.format(2), 21900.0, tytul='Audi A4 B6'),
+        ])
+        refreshed = self.run_search(portals, saved_searches.refresh_saved_search, saved_search)
+
+        self.assertEqual(sorted(portals.downloaded), [GRATKA_URL.format(2), OTOMOTO_URL.format(1)])
+        self.assertEqual(refreshed['changes'], {
+            'new': [GRATKA_URL.format(2)], 'changed': [OTOMOTO_URL.format(1)], 'removed': [OTOMOTO_URL.format(2)],
+            'unchanged': 1,
+        })
+
+        saved_search.refresh_from_db()
+        self.assertEqual(saved_search.offers[OTOMOTO_URL.format(2)]['status'], OFFER_REMOVED)
+        self.assertEqual(saved_search.offers[OTOMOTO_URL.format(1)]['ad']['cena_value'], 52900.0)
+
+    def test_saved_search_views(self):
+        portals = FakePortals(self.list_of_ads)
+        body = json.dumps({'brand': 'audi', 'model': 'a4', 'name': 'A4'})
+
+        with mock.patch.object(saved_searches, 'search_all_portals', portals.search):
+            created = self.client.post('/saved-searches/', body, content_type='application/json')
+            saved_search_url = f"/saved-searches/{created.json()['saved_search_id']}/"
+            refreshed = self.client.post(saved_search_url + 'refresh/')
+
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual((created.json()['active'], len(created.json()['list_of_ads'])), (3, 3))
+        self.assertEqual(refreshed.json()['changes']['unchanged'], 3)
+        self.assertEqual(len(portals.downloaded), 3)
+
+        listed = self.client.get('/saved-searches/').json()['saved_searches']
+        self.assertEqual([saved_search['name'] for saved_search in listed], ['A4'])
+        self.assertNotIn('list_of_ads', listed[0])
+
+        self.assertEqual(len(self.client.get(saved_search_url).json()['list_of_ads']), 3)
+        self.assertEqual(self.client.delete(saved_search_url).json()['status'], 'deleted')
+        self.assertFalse(SavedSearch.objects.exists())
+
+    def test_invalid_requests_are_rejected(self):
+        self.assertEqual(self.client.put('/saved-searches/').status_code, 405)
+        self.assertEqual(self.client.post('/saved-searches/', 'not json', content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.get(f'/saved-searches/{SavedSearch._meta.pk.default()}/refresh/').status_code, 405)
+        self.assertFalse(SavedSearch.objects.exists())
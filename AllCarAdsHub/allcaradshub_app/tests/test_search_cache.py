@@ -0,0 +1,71 @@
+# Standard Library Imports
+import json
+from unittest import mock
+
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.test import TestCase
+
+# Local Imports
+from allcaradshub_app import search_cache, views
+from allcaradshub_app.portals import STATUS_COMPLETE, STATUS_TIMED_OUT
+from allcaradshub_app.search_cache import SEARCH_CACHE, cache_search, get_cached_search, get_search_key
+from allcaradshub_app.tests.helpers import make_ad
+
+COMPLETE = {'otomoto': {'status': STATUS_COMPLETE, 'ads': 1}, 'gratka': {'status': STATUS_COMPLETE, 'ads': 0}}
+
+
+class SearchCacheTests(TestCase):
+    def setUp(self):
+        caches[SEARCH_CACHE].clear()
+        self.addCleanup(caches[SEARCH_CACHE].clear)
+        self.list_of_ads = [make_ad('otomoto', 'o1', 50000.0)]
+
+    def test_equivalent_searches_share_a_key(self):
+        key = get_search_key({'brand': 'Audi', 'model': 'A4', 'yearFrom': 2010, 'priceTo': None})
+
+        self.assertEqual(get_search_key({'brand': 'audi', 'model': ' a4 ', 'yearFrom': '2010.0', 'priceTo': ''}), key)
+        self.assertEqual(get_search_key({'brand': 'audi', 'model': 'a4', 'yearFrom': 2010.0}), key)
+
+    def test_different_searches_have_different_keys(self):
+        key = get_search_key({'brand': 'audi', 'model': 'a4'})
+
+        for data in [
+            {'brand': 'audi', 'model': 'a6'},
+            {'brand': 'audi', 'model': 'a4', 'priceTo': 20000},
+            {'brand': 'audi', 'model': 'a4', 'searchMode': 'fast'},
+            {'brand': 'audi', 'model': 'a4', 'limit': 10},
+            {'brand': 'audi', 'model': 'a4', 'cursor': {'otomoto': {'page': 2, 'position': 0}}},
+        ]:
+            with self.subTest(data=data):
+                self.assertNotEqual(get_search_key(data), key)
+
+    def test_cached_search_reports_its_age(self):
+        data = {'brand': 'audi', 'model': 'a4'}
+
+        with mock.patch.object(search_cache.time, 'time', return_value=1000.0):
+            self.assertTrue(cache_search(data, self.list_of_ads, COMPLETE))
+
+        with mock.patch.object(search_cache.time, 'time', return_value=1042.25):
+            cached = get_cached_search({'brand': 'AUDI', 'model': 'a4'})
+
+        self.assertEqual(cached, {'list_of_ads': self.list_of_ads, 'sources': COMPLETE, 'cache_age': 42.2})
+
+    def test_incomplete_search_is_not_cached(self):
+        data = {'brand': 'audi', 'model': 'a4'}
+        sources = dict(COMPLETE, gratka={'status': STATUS_TIMED_OUT, 'ads': 0})
+
+        self.assertFalse(cache_search(data, self.list_of_ads, sources))
+        self.assertIsNone(get_cached_search(data))
+
+    def test_identical_search_is_served_from_cache(self):
+        body = json.dumps({'brand': 'audi', 'model': 'a4'})
+
+        with mock.patch.object(views, 'search_all_portals', return_value=(self.list_of_ads, COMPLETE)) as search:
+            first = self.client.post('/', body, content_type='application/json').json()
+            second = self.client.post('/', body, content_type='application/json').json()
+
+        search.assert_called_once()
+        self.assertEqual((first['cached'], first['cache_age']), (False, 0))
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['list_of_ads'], first['list_of_ads'])
@@ -0,0 +1,54 @@
+# Standard Library Imports
+from decimal import Decimal
+
+# Third-Party Library Imports
+from django.test import TransactionTestCase, override_settings
+
+# Local Imports
+from allcaradshub_app.models import Ad
+from allcaradshub_app.store import save_ads
+from allcaradshub_app.tests.helpers import make_ad
+
+
+# save_ads closes the connection of its thread, which would end the transaction of a TestCase
+class SaveAdsTests(TransactionTestCase):
+    def test_new_ads_are_inserted_with_typed_fields(self):
+        self.assertEqual(save_ads([
+            make_ad('otomoto', 'https://www.otomoto.pl/o1', 54900.0, rok_produkcji='2015', przebieg='151 200', moc=None),
+            make_ad('gratka', 'https://gratka.pl/g1', None, tytul='Audi A4'),
+        ]), 2)
+
+        ad = Ad.objects.get(url='https://www.otomoto.pl/o1')
+        self.assertEqual((ad.cena, ad.rok_produkcji, ad.przebieg, ad.moc), (Decimal('54900.00'), 2015, 151200, None))
+        self.assertEqual((ad.tytul, ad.strona), ('', 'otomoto'))
+        self.assertIsNone(Ad.objects.get(url='https://gratka.pl/g1').cena)
+
+    def test_stored_ads_are_updated_by_url(self):
+        save_ads([make_ad('otomoto', 'https://www.otomoto.pl/o1', 54900.0, tytul='Audi A4')])
+        first_seen = Ad.objects.get().first_seen
+
+        save_ads([make_ad('otomoto', 'https://www.otomoto.pl/o1', 49900.0, tytul='Audi A4 Avant')])
+
+        ad = Ad.objects.get()
+        self.assertEqual((ad.cena, ad.tytul, ad.first_seen), (Decimal('49900.00'), 'Audi A4 Avant', first_seen))
+        self.assertGreaterEqual(ad.last_seen, first_seen)
+
+    def test_offer_found_twice_is_written_once(self):
+        self.assertEqual(save_ads([
+            make_ad('otomoto', 'https://www.otomoto.pl/o1', 54900.0),
+            make_ad('otomoto', 'https://www.otomoto.pl/o1', 53900.0),
+        ]), 1)
+        self.assertEqual(Ad.objects.get().cena, Decimal('53900.00'))
+
+    @override_settings(SCRAPER_STORE_BATCH_SIZE=2)
+    def test_ads_are_written_in_batches(self):
+        save_ads([make_ad('otomoto', f'https://www.otomoto.pl/o{index}', 1000.0 * index) for index in range(5)])
+        self.assertEqual(Ad.objects.count(), 5)
+
+    @override_settings(SCRAPER_STORE_ADS=False)
+    def test_storing_can_be_disabled(self):
+        self.assertEqual(save_ads([make_ad('otomoto', 'https://www.otomoto.pl/o1', 54900.0)]), 0)
+        self.assertFalse(Ad.objects.exists())
+
+    def test_nothing_to_store(self):
+        self.assertEqual(save_ads([]), 0)
@@ -0,0 +1,95 @@
+# Standard Library Imports
+import json
+import threading
+from unittest import mock
+
+# Third-Party Library Imports
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+# Local Imports
+from allcaradshub_app import streaming
+from allcaradshub_app.portals import STATUS_COMPLETE
+from allcaradshub_app.search_cache import SEARCH_CACHE
+from allcaradshub_app.streaming import FORMAT_SSE, format_event, stream_search
+from allcaradshub_app.tests.helpers import make_ad
+
+SOURCES = {'otomoto': {'status': STATUS_COMPLETE, 'ads': 2}, 'gratka': {'status': STATUS_COMPLETE, 'ads': 0}}
+
+
+class StreamSearchTests(TestCase):
+    def setUp(self):
+        caches[SEARCH_CACHE].clear()
+        self.addCleanup(caches[SEARCH_CACHE].clear)
+        self.list_of_ads = [make_ad('otomoto', f'https://www.otomoto.pl/o{index}', 50000.0 + index) for index in range(2)]
+
+    def search(self, data, on_ad=None, on_page=None):
+        on_page('otomoto', 1, 1)
+
+        for ad in self.list_of_ads:
+            on_ad(ad)
+
+        return self.list_of_ads, SOURCES
+
+    def stream(self, data, stream_format=streaming.FORMAT_NDJSON):
+        with mock.patch.object(streaming, 'search_all_portals', self.search):
+            return list(stream_search(data, stream_format))
+
+    def test_ads_are_streamed_as_they_are_scraped(self):
+        events = [json.loads(line) for line in self.stream({'brand': 'audi', 'model': 'a4'})]
+
+        self.assertEqual([event['type'] for event in events], ['progress', 'ad', 'ad', 'done'])
+        self.assertEqual(events[0], {'type': 'progress', 'portal': 'otomoto', 'page': 1, 'max_page': 1})
+        self.assertEqual([event['ad'] for event in events[1:3]], self.list_of_ads)
+        self.assertTrue(all(event['provisional'] for event in events[1:3]))
+        self.assertEqual((events[3]['sources'], events[3]['cached']), (SOURCES, False))
+        self.assertIn('result_id', events[3])
+
+    def test_cached_search_is_streamed_at_once(self):
+        self.stream({'brand': 'audi', 'model': 'a4'})
+
+        with mock.patch.object(streaming, 'search_all_portals') as search:
+            events = [json.loads(line) for line in stream_search({'brand': 'audi', 'model': 'a4'})]
+
+        search.assert_not_called()
+        self.assertEqual([event['type'] for event in events], ['ad', 'ad', 'done'])
+        self.assertFalse(any(event['provisional'] for event in events[:2]))
+        self.assertTrue(events[2]['cached'])
+
+    def test_failed_search_ends_with_an_error(self):
+        with mock.patch.object(streaming, 'search_all_portals', side_effect=RuntimeError('boom')):
+            events = [json.loads(line) for line in stream_search({'brand': 'audi', 'model': 'a4'})]
+
+        self.assertEqual(events, [{'type': 'error', 'message': 'Unable to complete the search.'}])
+
+    @override_settings(SCRAPER_STREAM_HEARTBEAT=0.01)
+    def test_heartbeat_is_sent_while_waiting(self):
+        release = threading.Event()
+
+        def slow_search(data, on_ad=None, on_page=None):
+            release.wait(5)
+            return [], SOURCES
+
+        with mock.patch.object(streaming, 'search_all_portals', slow_search):
+            stream = stream_search({'brand': 'audi', 'model': 'a4'})
+            self.assertEqual(next(stream), '\n')
+            release.set()
+            self.assertEqual(json.loads([part for part in stream if part != '\n'][-1])['type'], 'done')
+
+    def test_server_sent_events_are_named_after_their_type(self):
+        self.assertEqual(
+            format_event({'type': 'done', 'cached': True}, FORMAT_SSE),
+            'event: done\ndata: {"type": "done", "cached": true}\n\n',
+        )
+
+    def test_stream_view(self):
+        body = json.dumps({'brand': 'audi', 'model': 'a4'})
+
+        with mock.patch.object(streaming, 'search_all_portals', self.search):
+            response = self.client.post('/search-stream/?format=sse', body, content_type='application/json')
+            content = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(content.count('event: ad\n'), 2)
+        self.assertTrue(content.startswith('event: progress\n'))
@@ -3,24 +3,29 @@ from django.shortcuts import render
 # Create your views here.
 
 from django.shortcuts import render
-from allcaradshub_app.gratka import scrape_main_page as gratka_scrap
-from allcaradshub_app.otomoto import scrape_main_page as otomoto_scrap
-from django.http import JsonResponse
+from allcaradshub_app.portals import (
+    PORTALS, get_next_cursor, get_portal_of_url, get_search_options, search_all_portals,
+)
+from allcaradshub_app.async_engine import search_all_portals_async
+from allcaradshub_app.search_cache import cache_search, get_cached_search
+from allcaradshub_app.results import get_results_page, store_result_set
+from allcaradshub_app.aggregates import get_aggregates
+from allcaradshub_app.exports import EXPORT_FORMATS, export_result_set, export_stored_ads
+from allcaradshub_app.jobs import enqueue_search, get_job_status
+from allcaradshub_app.metrics import get_timings, instrument_view, render_metrics
+from allcaradshub_app.streaming import CONTENT_TYPES, FORMAT_NDJSON, FORMAT_SSE, stream_search
+from allcaradshub_app.models import SavedSearch, SearchJob
+from allcaradshub_app.saved_searches import create_saved_search, get_saved_search_status, refresh_saved_search
+from allcaradshub_app.store import save_ads
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 import json
 
-gearbox_translate_gratka = {
-    'manual': 'manualna',
-    'automatic': 'automatyczna',
-}
-fuel_translate_gratka = {
-    'petrol': 'benzyna',
-    'diesel': 'diesel',
-    'hybrid': 'hybryda',
-    'electric': 'elektryczne',
-}
-
 
+@instrument_view('home')
 def home(request):
     context = {}
 
@@ -28,61 +33,42 @@ def home(request):
         try:
             # Parse JSON data from the request body
             data = json.loads(request.body)
-            #'''
-            # Access individual form fields using data dictionary for gratka
-
             # Show loading bar
             #context = show_loading_bar(context)
-            list_of_ads = []
-            #'''
-            gratka_list = gratka_scrap(
-                brand=data.get('brand', '').lower(),
-                model=data.get('model', '').lower(),
-                year_from=data.get('yearFrom', ''),
-                year_to=data.get('yearTo', ''),
-                engine_cap_from=data.get('engineCapFrom', ''),
-                engine_cap_to=data.get('engineCapTo', ''),
-                price_from=data.get('priceFrom', ''),
-                price_to=data.get('priceTo', ''),
-                fuel=fuel_translate_gratka.get(data.get('fuelType', '')),
-                mileage_from=data.get('mileageFrom', ''),
-                mileage_to=data.get('mileageTo', ''),
-                gearbox=gearbox_translate_gratka.get(data.get('gearboxType', '')),
-                engine_power_from=data.get('enginePowerFrom', ''),
-                engine_power_to=data.get('enginePowerTo', ''),
-                town=data.get('town', ''),
-                distance=data.get('distanceFromTown', ''),
-                # voivodship = data.get('voivodship', '')
-            )
-            list_of_ads.extend(gratka_list)
-
-            #'''
-            otomoto_list = otomoto_scrap(
-                brand=data.get('brand', '').lower(),
-                model=data.get('model', '').lower(),
-                year_from=data.get('yearFrom', ''),
-                year_to=data.get('yearTo', ''),
-                engine_cap_from=data.get('engineCapFrom', ''),
-                engine_cap_to=data.get('engineCapTo', ''),
-                price_from=data.get('priceFrom', ''),
-                price_to=data.get('priceTo', ''),
-                fuel=data.get('fuelType', ''),
-                mileage_from=data.get('mileageFrom', ''),
-                mileage_to=data.get('mileageTo', ''),
-                gearbox=data.get('gearboxType', ''),
-                engine_power_from=data.get('enginePowerFrom', ''),
-                engine_power_to=data.get('enginePowerTo', ''),
-                town=data.get('town', ''),
-                distance=data.get('distanceFromTown', ''),
-                # voivodship = data.get('voivodship', '')
-            )
-            list_of_ads.extend(otomoto_list)
-            #'''
+
+            # The limit, time budget and cursor are checked before anything is scraped
+            get_search_options(data)
+
+            # Identical searches are served from the cache until it expires
+            cached_search = get_cached_search(data)
+
+            if cached_search is not None:
+                context.update(cached_search)
+                context['cursor'] = get_next_cursor(cached_search['sources'])
+                context['cached'] = True
+                context['result_id'] = store_result_set(data, cached_search['list_of_ads'], cached_search['sources'])
+
+                # Time spent per portal and stage, asked for with ?timings=1
+                if request.GET.get('timings'):
+                    context['timings'] = get_timings()
+
+                return JsonResponse(context)
+
+            # Search all portals concurrently, each within its own deadline
+            list_of_ads, sources = search_all_portals(data)
+            cache_search(data, list_of_ads, sources)
 
             # Add the list_of_ads to the context
             context['list_of_ads'] = list_of_ads
+            context['result_id'] = store_result_set(data, list_of_ads, sources)
+            context['sources'] = sources
+            context['cursor'] = get_next_cursor(sources)
+            context['cached'] = False
+            context['cache_age'] = 0
 
-            print(context)
+            # Time spent per portal and stage, asked for with ?timings=1
+            if request.GET.get('timings'):
+                context['timings'] = get_timings()
 
             return JsonResponse(context)
 
@@ -93,6 +79,10 @@ def home(request):
             response_data = {'status': 'error', 'message': 'Invalid JSON data in the request.'}
             return JsonResponse(response_data, status=400)
 
+        except ValueError as e:
+            response_data = {'status': 'error', 'message': str(e)}
+            return JsonResponse(response_data, status=400)
+
     # Call your imported function with the dictionary
     # scrape_main_page(search_params)
 
@@ -100,6 +90,307 @@ def home(request):
     return render(request, 'home.html', context)
 
 
+def parse_search_request(request):
+    """
+    Reads the JSON data of a search from the body of a POST request and checks its options.
+
+    Parameters:
+        request (HttpRequest): Request to one of the search views.
+
+    Returns:
+        tuple: The data of the search and None, or None and the JsonResponse with the error when the
+            request is not a POST, its body is not JSON or its limit, time budget or cursor is invalid.
+    """
+    if request.method != 'POST':
+        response_data = {'status': 'error', 'message': 'Only POST requests are supported.'}
+        return None, JsonResponse(response_data, status=405)
+
+    try:
+        # Parse JSON data from the request body
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        response_data = {'status': 'error', 'message': 'Invalid JSON data in the request.'}
+        return None, JsonResponse(response_data, status=400)
+
+    try:
+        # The limit, time budget and cursor are checked before anything is scraped
+        get_search_options(data)
+    except ValueError as e:
+        response_data = {'status': 'error', 'message': str(e)}
+        return None, JsonResponse(response_data, status=400)
+
+    return data, None
+
+
+@instrument_view('search_async')
+async def search_async(request):
+    """
+    Searches all portals on the asyncio scraping engine.
+
+    Accepts the same JSON data as the home view. When served through AllCarAdsHub/asgi.py the search
+    does not hold a worker thread, so one process can drive many concurrent searches. Like the home
+    view, it adds the time spent per portal and stage to the response with ?timings=1.
+    """
+    data, error_response = parse_search_request(request)
+
+    if error_response is not None:
+        return error_response
+
+    # Identical searches are served from the cache until it expires
+    cached_search = await sync_to_async(get_cached_search)(data)
+
+    if cached_search is not None:
+        result_id = await sync_to_async(store_result_set)(data, cached_search['list_of_ads'], cached_search['sources'])
+        response_data = {
+            **cached_search, 'cursor': get_next_cursor(cached_search['sources']), 'cached': True, 'result_id': result_id,
+        }
+    else:
+        list_of_ads, sources = await search_all_portals_async(data)
+        await sync_to_async(cache_search)(data, list_of_ads, sources)
+        result_id = await sync_to_async(store_result_set)(data, list_of_ads, sources)
+        response_data = {
+            'list_of_ads': list_of_ads, 'sources': sources, 'cursor': get_next_cursor(sources), 'cached': False,
+            'cache_age': 0, 'result_id': result_id,
+        }
+
+    if request.GET.get('timings'):
+        response_data['timings'] = get_timings()
+
+    return JsonResponse(response_data)
+
+
+def search_jobs(request):
+    """
+    Starts a search in the background.
+
+    Accepts the same JSON data as the home view and answers at once with the ID of the job, whose
+    progress and results are polled through search_job_status.
+    """
+    data, error_response = parse_search_request(request)
+
+    if error_response is not None:
+        return error_response
+
+    job = enqueue_search(data)
+    response_data = {**get_job_status(job), 'status_url': reverse('search_job_status', args=[job.pk])}
+
+    return JsonResponse(response_data, status=202)
+
+
+def search_job_status(request, job_id):
+    """
+    Returns the status, per-portal progress and, once done, the results of a background search.
+    """
+    job = get_object_or_404(SearchJob, pk=job_id)
+
+    return JsonResponse(get_job_status(job))
+
+
+def search_stream(request):
+    """
+    Streams the ads of a search as they are scraped.
+
+    Accepts the same JSON data as the home view. Events are sent as NDJSON, or as server-sent events
+    when asked for with ?format=sse or an 'Accept: text/event-stream' header.
+    """
+    data, error_response = parse_search_request(request)
+
+    if error_response is not None:
+        return error_response
+
+    if request.GET.get('format') == FORMAT_SSE or 'text/event-stream' in request.headers.get('Accept', ''):
+        stream_format = FORMAT_SSE
+    else:
+        stream_format = FORMAT_NDJSON
+
+    response = StreamingHttpResponse(stream_search(data, stream_format), content_type=CONTENT_TYPES[stream_format])
+    # Keep proxies from buffering the stream until it ends
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+
+    return response
+
+
+def search_results(request, result_id):
+    """
+    Returns one page of the ads of a search, filtered and sorted on the server.
+
+    The result_id is returned by every search endpoint. See results.get_results_page for the
+    query parameters.
+    """
+    try:
+        results_page = get_results_page(result_id, request.GET)
+    except ValueError as e:
+        response_data = {'status': 'error', 'message': str(e)}
+        return JsonResponse(response_data, status=400)
+
+    if results_page is None:
+        response_data = {'status': 'error', 'message': 'The results expired. Please search again.'}
+        return JsonResponse(response_data, status=404)
+
+    return JsonResponse(results_page)
+
+
+def search_aggregates(request, result_id):
+    """
+    Returns the data of the price histogram, the price-vs-mileage and price-vs-year summaries and a
+    sample of scatterplot points of a search, computed on the server.
+
+    Accepts the column filters of search_results. See aggregates.get_aggregates for the other
+    query parameters.
+    """
+    try:
+        aggregates = get_aggregates(result_id, request.GET)
+    except ValueError as e:
+        response_data = {'status': 'error', 'message': str(e)}
+        return JsonResponse(response_data, status=400)
+
+    if aggregates is None:
+        response_data = {'status': 'error', 'message': 'The results expired. Please search again.'}
+        return JsonResponse(response_data, status=404)
+
+    return JsonResponse(aggregates)
+
+
+def saved_searches(request):
+    """
+    Lists the saved searches on GET, and saves a search and runs it for the first time on POST.
+
+    A saved search accepts the same JSON data as the home view, with an optional 'name'. Its
+    refreshes only download the offers that are new or changed since its previous run.
+    """
+    if request.method == 'GET':
+        saved = SavedSearch.objects.order_by('-created')
+        return JsonResponse({'saved_searches': [get_saved_search_status(search, with_result=False) for search in saved]})
+
+    if request.method != 'POST':
+        response_data = {'status': 'error', 'message': 'Only GET and POST requests are supported.'}
+        return JsonResponse(response_data, status=405)
+
+    data, error_response = parse_search_request(request)
+
+    if error_response is not None:
+        return error_response
+
+    saved_search, _ = create_saved_search(data)
+
+    return JsonResponse(get_saved_search_status(saved_search), status=201)
+
+
+def saved_search_detail(request, saved_search_id):
+    """
+    Returns a saved search with the results of its last run on GET, and deletes it on DELETE.
+    """
+    saved_search = get_object_or_404(SavedSearch, pk=saved_search_id)
+
+    if request.method == 'DELETE':
+        saved_search.delete()
+        return JsonResponse({'status': 'deleted', 'saved_search_id': str(saved_search_id)})
+
+    if request.method != 'GET':
+        response_data = {'status': 'error', 'message': 'Only GET and DELETE requests are supported.'}
+        return JsonResponse(response_data, status=405)
+
+    return JsonResponse(get_saved_search_status(saved_search))
+
+
+def saved_search_refresh(request, saved_search_id):
+    """
+    Refreshes a saved search, requesting its pages with search results and only the subpages of
+    offers that are new or changed since its previous run. The response lists the 'changes'.
+    """
+    if request.method != 'POST':
+        response_data = {'status': 'error', 'message': 'Only POST requests are supported.'}
+        return JsonResponse(response_data, status=405)
+
+    saved_search = get_object_or_404(SavedSearch, pk=saved_search_id)
+    refresh_saved_search(saved_search)
+
+    return JsonResponse(get_saved_search_status(saved_search))
+
+
+def export_results(request, result_id):
+    """
+    Streams the ads of a search as a CSV or Parquet file, a chunk of ads at a time.
+
+    Takes the format in ?format=csv (the default) or ?format=parquet, and the sort order and column
+    filters of search_results. See exports.export_result_set.
+    """
+    try:
+        export = export_result_set(result_id, request.GET)
+    except ValueError as e:
+        response_data = {'status': 'error', 'message': str(e)}
+        return JsonResponse(response_data, status=400)
+
+    if export is None:
+        response_data = {'status': 'error', 'message': 'The results expired. Please search again.'}
+        return JsonResponse(response_data, status=404)
+
+    parts, export_format = export
+    content_type, extension = EXPORT_FORMATS[export_format]
+
+    response = StreamingHttpResponse(parts, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="ads-{result_id}.{extension}"'
+
+    return response
+
+
+def export_ads(request):
+    """
+    Streams the ads kept in the database as a CSV or Parquet file, a chunk of ads at a time.
+
+    Accepts the parameters of export_results, with the exact filters such as ?marka= and ?model=
+    selecting the stored ads. See exports.get_stored_ads.
+    """
+    try:
+        parts, export_format = export_stored_ads(request.GET)
+    except ValueError as e:
+        response_data = {'status': 'error', 'message': str(e)}
+        return JsonResponse(response_data, status=400)
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+
+    response = StreamingHttpResponse(parts, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="ads.{extension}"'
+
+    return response
+
+
+def offer_details(request):
+    """
+    Returns the full ad of an offer found by a fast search, whose details were not downloaded.
+
+    Takes the URL of the offer subpage in ?url= and the brand and model of the search in ?brand=
+    and ?model=. The offer is served from the offer cache when possible, and kept in the Ad model.
+    """
+    subpage_url = request.GET.get('url', '')
+    portal = get_portal_of_url(subpage_url)
+
+    if portal is None:
+        response_data = {'status': 'error', 'message': 'The URL does not belong to any of the portals.'}
+        return JsonResponse(response_data, status=400)
+
+    single_ad_dict = PORTALS[portal]['module'].scrape_subpage(
+        subpage_url, request.GET.get('brand', ''), request.GET.get('model', '')
+    )
+
+    if single_ad_dict is None:
+        response_data = {'status': 'error', 'message': 'The offer could not be downloaded.'}
+        return JsonResponse(response_data, status=502)
+
+    save_ads([single_ad_dict])
+
+    return JsonResponse(single_ad_dict)
+
+
+def metrics(request):
+    """
+    Exposes the timings of the scraping stages and search views and the counts of portal responses
+    of this process in the Prometheus text format.
+    """
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # Helper function to show the loading bar
 def show_loading_bar(context):
     context['show_loading_bar'] = True